@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+1リーグ制の会場配置最適化（Anchor-Pod CP。docs/schedule-generation-specification.md 4.2 の Python 版）
+
+チームを会場ごとの Pod（3〜5チーム）に分け、Pod 内の並び（スロット順）を決める。
+並びの A戦ペア（0-1, 2-3, 1-2, 0-3）が実際に対戦し、B戦ペア（0-2, 1-3）はタイブレークにだけ使う。
+
+- ホストチーム（host_venue_id が会場IDのチーム）は自会場に固定（移動しない）
+- Pod のサイズは 3a + 4b + 5c = N, a + b + c = V の解（compute_pod_plan）。解がなければ teams_per_venue で揃える
+- 評価は辞書式（上が絶対的に優先）: Day1再戦 > 同リーグ > 同地域 > 地元同士。
+  B戦ペアは同リーグ > 同地域 > 地元同士 をA戦より下の桁で数える（B戦の Day1再戦は A戦と同じハード制約）
+- Multi-start: 初回はホストアンカー付き貪欲法、2回目以降はホスト維持ランダム配置。
+  各試行で 会場内スロット最適化 → 会場間スワップ最適化。
+  spec は Day1再戦・同リーグがなくなったら打ち切るが、ここでは時間の範囲で A戦の違反が 0 になるまで続ける
+  （time_budget_ms=0 なら貪欲法 + 会場内スロット最適化だけ）
+
+高速化（フロントエンドの TypeScript 版は会場内の 4! 通りと配置全体を毎回評価する）
+- ペアのコスト（A戦 / B戦）はチーム × チームの表に前計算する
+- Pod の並びのスコアは「どのペアが A戦 / B戦 になるか」だけで決まるので、並びはその組ごとに1つだけ試す
+  （4チームなら 24 通り → 3 通り）
+- 会場間スワップは入れ替える2会場だけを評価し直し、会場ごとのスコアの差分で採否を決める
+- 試行回数は time_budget_ms から決めるので、同じ seed なら同じ結果になる
+  （マシンが遅くて時間を超えそうなときはそこで打ち切る）
+"""
+
+import random
+import time
+from dataclasses import dataclass
+from itertools import permutations
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple, Union
+
+# 辞書式スコアの重み（spec 4.2.3 encodeLexToScore）
+DAY1_REPEAT_WEIGHT = 10 ** 9
+SAME_LEAGUE_WEIGHT = 10 ** 6
+SAME_REGION_WEIGHT = 10 ** 3
+LOCAL_VS_LOCAL_WEIGHT = 1
+
+# B戦ペアはA戦のスコアより下の桁（A戦のスコア × B_MATCH_SCALE + B戦のスコア）
+B_MATCH_SCALE = 10 ** 6
+B_SAME_LEAGUE_WEIGHT = 100
+B_SAME_REGION_WEIGHT = 10
+B_LOCAL_VS_LOCAL_WEIGHT = 1
+
+# Pod 内の並びの A戦 / B戦ペア（スロット順の位置。両方とも Pod のサイズ未満のものだけ使う）
+A_MATCH_PAIRS = [(0, 1), (2, 3), (1, 2), (0, 3)]
+B_MATCH_PAIRS = [(0, 2), (1, 3)]
+
+# 1ミリ秒あたりの試行回数（試行回数を時間から決めるための目安）
+RESTARTS_PER_MS = 0.05
+# 会場間スワップの最大周回数（spec 4.2.6 maxIter）
+MAX_SWAP_PASSES = 50
+
+
+@dataclass
+class PodTeam:
+    """配置するチーム（制約の評価に使う項目だけ）"""
+    id: int
+    league_id: Optional[Union[int, str]] = None
+    region: Optional[str] = None
+    local: bool = False                  # 地元校
+    host_venue_id: Optional[int] = None  # ホストの場合、その会場ID
+
+
+@dataclass
+class PodScore:
+    """配置の評価（すべて小さいほど良い）"""
+    day1_repeat: int = 0       # Day1再戦（A戦・B戦とも。ハード制約）
+    same_league: int = 0       # A戦の同リーグ
+    same_region: int = 0       # A戦の同地域
+    local_vs_local: int = 0    # A戦の地元同士
+    b_same_league: int = 0     # B戦の同リーグ（参考）
+    b_same_region: int = 0     # B戦の同地域（参考）
+    b_local_vs_local: int = 0  # B戦の地元同士（参考）
+
+    def encode(self) -> int:
+        return encode_lex(self.day1_repeat, self.same_league, self.same_region, self.local_vs_local) * B_MATCH_SCALE + (
+            self.b_same_league * B_SAME_LEAGUE_WEIGHT
+            + self.b_same_region * B_SAME_REGION_WEIGHT
+            + self.b_local_vs_local * B_LOCAL_VS_LOCAL_WEIGHT
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "day1Repeat": self.day1_repeat,
+            "sameLeague": self.same_league,
+            "sameRegion": self.same_region,
+            "localVsLocal": self.local_vs_local,
+            "bMatchSameLeague": self.b_same_league,
+            "bMatchSameRegion": self.b_same_region,
+            "bMatchLocalVsLocal": self.b_local_vs_local,
+            "score": self.encode(),
+        }
+
+
+def encode_lex(day1_repeat: int, same_league: int, same_region: int, local_vs_local: int) -> int:
+    return (
+        day1_repeat * DAY1_REPEAT_WEIGHT
+        + same_league * SAME_LEAGUE_WEIGHT
+        + same_region * SAME_REGION_WEIGHT
+        + local_vs_local * LOCAL_VS_LOCAL_WEIGHT
+    )
+
+
+def compute_pod_plan(n_teams: int, n_venues: int) -> Optional[List[int]]:
+    """3a + 4b + 5c = N, a + b + c = V を満たす各会場の Pod サイズ（3 → 4 → 5 の順。解がなければ None）"""
+    for a in range(n_venues + 1):
+        for c in range(n_venues - a + 1):
+            b = n_venues - a - c
+            if 3 * a + 4 * b + 5 * c == n_teams:
+                return [3] * a + [4] * b + [5] * c
+    return None
+
+
+def day1_banned_pairs(day1_assignments: Iterable[Sequence[int]]) -> Tuple[Set[Tuple[int, int]], Set[Tuple[int, int]]]:
+    """Day1 の会場ごとのチームID（スロット順）から (A戦ペア, B戦ペア) を取り出す（(小さいID, 大きいID) の集合）"""
+    a_pairs: Set[Tuple[int, int]] = set()
+    b_pairs: Set[Tuple[int, int]] = set()
+    for team_ids in day1_assignments:
+        for pairs, found in ((A_MATCH_PAIRS, a_pairs), (B_MATCH_PAIRS, b_pairs)):
+            for i, j in pairs:
+                if j < len(team_ids):
+                    x, y = team_ids[i], team_ids[j]
+                    found.add((min(x, y), max(x, y)))
+    return a_pairs, b_pairs
+
+
+def _patterns(size: int) -> List[Tuple[Tuple[int, ...], List[Tuple[int, int]], List[Tuple[int, int]]]]:
+    """Pod 内の並びのうち、A戦 / B戦になるペアの組が異なるものだけ（並び, A戦ペア, B戦ペア）"""
+    seen = set()
+    result = []
+    for order in permutations(range(size)):
+        a_pairs = [tuple(sorted((order[i], order[j]))) for i, j in A_MATCH_PAIRS if j < size]
+        b_pairs = [tuple(sorted((order[i], order[j]))) for i, j in B_MATCH_PAIRS if j < size]
+        key = (frozenset(a_pairs), frozenset(b_pairs))
+        if key not in seen:
+            seen.add(key)
+            result.append((order, a_pairs, b_pairs))
+    return result
+
+
+class AnchorPodOptimizer:
+    """チームを会場の Pod に配置し、Pod 内の並びを決める"""
+
+    def __init__(
+        self,
+        teams: Sequence[PodTeam],
+        venue_ids: Sequence[int],
+        teams_per_venue: int = 4,
+        banned_a_pairs: Iterable[Tuple[int, int]] = (),
+        banned_b_pairs: Iterable[Tuple[int, int]] = (),
+        time_budget_ms: int = 300,
+        seed: Optional[int] = 0,
+    ):
+        if not venue_ids:
+            raise ValueError("会場がありません")
+        self.teams = list(teams)
+        self.venue_ids = list(venue_ids)
+        n = len(self.teams)
+
+        sizes = compute_pod_plan(n, len(self.venue_ids))
+        if sizes is None:
+            if n > teams_per_venue * len(self.venue_ids):
+                raise ValueError(
+                    f"{n}チームを{len(self.venue_ids)}会場（1会場{teams_per_venue}チーム）に配置できません"
+                )
+            sizes = [teams_per_venue] * len(self.venue_ids)
+        self.pod_sizes = sizes
+
+        # ホスト（会場インデックス → チーム。同じ会場のホストが複数いれば最初のチーム）
+        venue_index = {venue_id: v for v, venue_id in enumerate(self.venue_ids)}
+        self.hosts: Dict[int, int] = {}
+        for t, team in enumerate(self.teams):
+            v = venue_index.get(team.host_venue_id)
+            if v is not None and v not in self.hosts and self.pod_sizes[v] > 0:
+                self.hosts[v] = t
+        self.anchored = [False] * n
+        for t in self.hosts.values():
+            self.anchored[t] = True
+
+        self._build_costs(
+            {(min(a, b), max(a, b)) for a, b in banned_a_pairs},
+            {(min(a, b), max(a, b)) for a, b in banned_b_pairs},
+        )
+        self._pattern_cache = {size: _patterns(size) for size in set(self.pod_sizes)}
+        self.time_budget_ms = time_budget_ms
+        self.rng = random.Random(seed)
+        self.restarts = 0
+
+    def _build_costs(self, banned_a: Set[Tuple[int, int]], banned_b: Set[Tuple[int, int]]):
+        """チーム × チームの A戦 / B戦のコスト表と、評価の内訳用のフラグ表"""
+        n = len(self.teams)
+        self.a_cost = [[0] * n for _ in range(n)]
+        self.b_cost = [[0] * n for _ in range(n)]
+        # (同リーグ, 同地域, 地元同士)
+        self.flags = [[(0, 0, 0)] * n for _ in range(n)]
+        for i in range(n):
+            x = self.teams[i]
+            for j in range(i + 1, n):
+                y = self.teams[j]
+                pair = (min(x.id, y.id), max(x.id, y.id))
+                league = int(x.league_id is not None and x.league_id != "" and x.league_id == y.league_id)
+                region = int(bool(x.region) and x.region == y.region)
+                local = int(x.local and y.local)
+                self.flags[i][j] = self.flags[j][i] = (league, region, local)
+                self.a_cost[i][j] = self.a_cost[j][i] = (
+                    encode_lex(int(pair in banned_a), league, region, local) * B_MATCH_SCALE
+                )
+                self.b_cost[i][j] = self.b_cost[j][i] = (
+                    int(pair in banned_b) * DAY1_REPEAT_WEIGHT * B_MATCH_SCALE
+                    + league * B_SAME_LEAGUE_WEIGHT
+                    + region * B_SAME_REGION_WEIGHT
+                    + local * B_LOCAL_VS_LOCAL_WEIGHT
+                )
+        self.banned_a = banned_a
+        self.banned_b = banned_b
+
+    # ------------------------------------------------------------------
+    # 評価
+    # ------------------------------------------------------------------
+
+    def _best_order(self, pod: List[int]) -> Tuple[int, List[int]]:
+        """Pod 内の並びのうちスコア最小のもの（会場内スロット最適化。spec 4.2.5）"""
+        patterns = self._pattern_cache.get(len(pod))
+        if patterns is None:
+            patterns = self._pattern_cache[len(pod)] = _patterns(len(pod))
+        a_cost, b_cost = self.a_cost, self.b_cost
+        best_score, best_order = None, pod
+        for order, a_pairs, b_pairs in patterns:
+            score = 0
+            for i, j in a_pairs:
+                score += a_cost[pod[i]][pod[j]]
+            for i, j in b_pairs:
+                score += b_cost[pod[i]][pod[j]]
+            if best_score is None or score < best_score:
+                best_score, best_order = score, order
+        return best_score, [pod[i] for i in best_order]
+
+    def score(self, pods: List[List[int]]) -> PodScore:
+        """並び済みの Pod 全体の評価の内訳"""
+        total = PodScore()
+        for pod in pods:
+            for pairs, is_a in ((A_MATCH_PAIRS, True), (B_MATCH_PAIRS, False)):
+                for i, j in pairs:
+                    if j >= len(pod):
+                        continue
+                    x, y = pod[i], pod[j]
+                    a, b = self.teams[x].id, self.teams[y].id
+                    league, region, local = self.flags[x][y]
+                    if (min(a, b), max(a, b)) in (self.banned_a if is_a else self.banned_b):
+                        total.day1_repeat += 1
+                    if is_a:
+                        total.same_league += league
+                        total.same_region += region
+                        total.local_vs_local += local
+                    else:
+                        total.b_same_league += league
+                        total.b_same_region += region
+                        total.b_local_vs_local += local
+        return total
+
+    # ------------------------------------------------------------------
+    # 初期解
+    # ------------------------------------------------------------------
+
+    def _with_hosts(self) -> List[List[int]]:
+        return [[self.hosts[v]] if v in self.hosts else [] for v in range(len(self.venue_ids))]
+
+    def _greedy(self) -> List[List[int]]:
+        """ホストを自会場に置き、会場ごとに既に置いたチームとのA戦コストの合計が最小のチームを足していく（spec 4.2.4）"""
+        pods = self._with_hosts()
+        remaining = [t for t in range(len(self.teams)) if not self.anchored[t]]
+        for v, size in enumerate(self.pod_sizes):
+            pod = pods[v]
+            while len(pod) < size and remaining:
+                best_k = min(
+                    range(len(remaining)),
+                    key=lambda k: sum(self.a_cost[remaining[k]][t] for t in pod),
+                )
+                pod.append(remaining.pop(best_k))
+        return pods
+
+    def _random(self) -> List[List[int]]:
+        """ホストを自会場に置き、残りをシャッフルして順に詰める"""
+        pods = self._with_hosts()
+        remaining = [t for t in range(len(self.teams)) if not self.anchored[t]]
+        self.rng.shuffle(remaining)
+        for v, size in enumerate(self.pod_sizes):
+            while len(pods[v]) < size and remaining:
+                pods[v].append(remaining.pop())
+        return pods
+
+    # ------------------------------------------------------------------
+    # 探索
+    # ------------------------------------------------------------------
+
+    def _optimize(self, pods: List[List[int]], deadline: float) -> int:
+        """会場間スワップ最適化（spec 4.2.6）。pods をその場で並べ替え、合計スコアを返す
+
+        入れ替える2会場だけ並びを最適化し直し、2会場のスコアの合計が下がれば採用する。
+        """
+        scores = [0] * len(pods)
+        for v in range(len(pods)):
+            scores[v], pods[v] = self._best_order(pods[v])
+
+        for _ in range(MAX_SWAP_PASSES if self.time_budget_ms > 0 else 0):
+            improved = False
+            for v1 in range(len(pods)):
+                for v2 in range(v1 + 1, len(pods)):
+                    for t1 in range(len(pods[v1])):
+                        if self.anchored[pods[v1][t1]]:
+                            continue
+                        for t2 in range(len(pods[v2])):
+                            pod1, pod2 = pods[v1], pods[v2]
+                            if self.anchored[pod2[t2]]:
+                                continue
+                            new1, new2 = list(pod1), list(pod2)
+                            new1[t1], new2[t2] = pod2[t2], pod1[t1]
+                            score1, order1 = self._best_order(new1)
+                            score2, order2 = self._best_order(new2)
+                            if score1 + score2 < scores[v1] + scores[v2]:
+                                pods[v1], pods[v2] = order1, order2
+                                scores[v1], scores[v2] = score1, score2
+                                improved = True
+                if time.perf_counter() > deadline:
+                    return sum(scores)
+            if not improved:
+                break
+        return sum(scores)
+
+    def solve(self) -> Tuple[List[List[int]], PodScore]:
+        """会場ごとのチームインデックス（スロット順）と評価を返す（spec 4.2.2）"""
+        deadline = time.perf_counter() + self.time_budget_ms / 1000
+        restarts = max(int(self.time_budget_ms * RESTARTS_PER_MS), 1)
+        best, best_pods = None, None
+        for restart in range(restarts):
+            if restart and time.perf_counter() > deadline:
+                break
+            pods = self._greedy() if restart == 0 else self._random()
+            total = self._optimize(pods, deadline)
+            self.restarts += 1
+            if best is None or total < best:
+                best, best_pods = total, pods
+            # A戦の違反がなければ打ち切る（B戦は参考）
+            if best < B_MATCH_SCALE:
+                break
+        return best_pods, self.score(best_pods)
+
+
+def build_optimizer(
+    teams: Sequence[Any],
+    venue_ids: Sequence[int],
+    teams_per_venue: int = 4,
+    day1_assignments: Optional[Mapping[Any, Sequence[int]]] = None,
+    banned_pairs: Iterable[Sequence[int]] = (),
+    time_budget_ms: int = 300,
+    seed: Optional[int] = 0,
+) -> AnchorPodOptimizer:
+    """API のリクエストの値から AnchorPodOptimizer を作る（会場配置の各エンドポイントで共通）
+
+    teams は id, league_id, region, prefecture, team_type, is_host, host_venue_id を持つもの。
+    地域は region（なければ prefecture）、地元校は team_type == "local"、ホスト会場は is_host のときの host_venue_id。
+    Day1 の 会場 → チームID（スロット順）と banned_pairs（A戦で当てない2チーム）が対戦禁止になる。
+    banned_pairs に2チームでない要素がある・チームが会場に収まらないなどは ValueError。
+    """
+    banned_a, banned_b = day1_banned_pairs((day1_assignments or {}).values())
+    for pair in banned_pairs:
+        if len(pair) != 2:
+            raise ValueError(f"bannedPairs の要素は2チームのIDにしてください: {list(pair)}")
+        banned_a.add((min(pair), max(pair)))
+    pod_teams = [
+        PodTeam(
+            id=team.id,
+            league_id=team.league_id,
+            region=team.region or team.prefecture,
+            local=team.team_type == "local",
+            host_venue_id=team.host_venue_id if team.is_host else None,
+        )
+        for team in teams
+    ]
+    return AnchorPodOptimizer(
+        pod_teams,
+        venue_ids,
+        teams_per_venue=teams_per_venue,
+        banned_a_pairs=banned_a,
+        banned_b_pairs=banned_b,
+        time_budget_ms=time_budget_ms,
+        seed=seed,
+    )
@@ -1,8 +1,17 @@
-from fastapi import APIRouter, Query, Body
+from fastapi import APIRouter, HTTPException, Query, Body, Request
 from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
+import sys
+import os
 
-router = APIRouter()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+import fast_decode
+from match_store import MatchRowError, match_store, compile_filter
+from match_listing import (
+    MAX_LIMIT, ListingFormat, listing_response, paginate, parse_fields, project, sort_matches
+)
+
+router = APIRouter(route_class=fast_decode.FastDecodeRoute)
 
 @router.get("/api/matches", summary="試合一覧取得")
 async def get_matches(
@@ -12,10 +21,14 @@ async def get_matches(
     group_id: Optional[str] = Query(None, alias="groupId"),
     stage: Optional[str] = Query(None),
     venue_id: Optional[int] = Query(None, alias="venueId"),
-    exclude_b_matches: bool = Query(False, alias="excludeBMatches")
+    exclude_b_matches: bool = Query(False, alias="excludeBMatches"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT, description="1ページの件数（省略時は全件）"),
+    cursor: Optional[str] = Query(None, description="前のページの next_cursor"),
+    fields: Optional[str] = Query(None, description="返す項目（カンマ区切り。例: id,match_time,venue_id）"),
+    format: ListingFormat = Query(ListingFormat.JSON),
 ):
     """
-    試合一覧を取得
+    試合一覧を取得（サーバーのインメモリストアから）
 
     フィルタリングオプション:
     - match_day: 試合日でフィルタ（1, 2, ...）
@@ -25,11 +38,36 @@ async def get_matches(
     - venue_id: 会場IDでフィルタ
     - exclude_b_matches: B戦を除外（デフォルト: false）
 
-    このエンドポイントはSupabaseから直接取得することを想定しています。
-    フロントエンドではSupabaseクライアントを使用してフィルタリングしてください。
+    ページ分割・出力（match_listing）:
+    - 並びは (試合日, キックオフ時刻, 会場, 試合順)
+    - limit: 1ページの件数。続きはレスポンスの next_cursor を cursor に渡す
+      （カーソルは並び順のキーなので、途中で結果が入力されてもページがずれない）
+    - fields: 返す項目を絞る
+    - format=ndjson: 1行1試合で返す（最後の行に total・next_cursor）
+
+    試合は POST /api/matches/load か、起動時の MATCH_STORE_FILES で読み込んでおく（match_store）。
+    条件ごとの索引を積集合して答えるので、試合リストを毎回送る必要はない。
     """
-    # サンプルレスポンス
-    return {
+    table = match_store.get(tournament_id)
+    if table is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"大会 {tournament_id} の試合が読み込まれていません。先に POST /api/matches/load を呼んでください"
+        )
+
+    if exclude_b_matches:
+        # B戦のみ（is_b_match=true）と同時に指定された場合は該当なし
+        positions = [] if is_b_match else table.positions(
+            match_day=match_day, group_id=group_id, stage=stage, venue_id=venue_id, is_b_match=False
+        )
+    else:
+        positions = table.positions(
+            match_day=match_day, group_id=group_id, stage=stage, venue_id=venue_id, is_b_match=is_b_match
+        )
+    page, next_cursor = paginate(positions, [table.keys[pos] for pos in positions], cursor, limit)
+    matches = project((table.matches[pos] for pos in page), parse_fields(fields))
+
+    body = {
         "success": True,
         "tournament_id": tournament_id,
         "filters": {
@@ -40,8 +78,36 @@ async def get_matches(
             "venue_id": venue_id,
             "exclude_b_matches": exclude_b_matches
         },
-        "matches": [],
-        "message": "試合データはSupabaseから直接取得してください。このエンドポイントはフィルタリング仕様の参照用です。"
+    }
+    paginated = limit is not None or cursor is not None
+    return listing_response(body, "matches", matches, len(positions), next_cursor, paginated, format)
+
+
+class LoadMatchesRequest(BaseModel):
+    """試合の読み込みリクエスト（Supabase の matches の行をそのまま渡せる）"""
+    tournament_id: int = Field(..., alias="tournamentId")
+    matches: List[Dict[str, Any]]
+
+    class Config:
+        populate_by_name = True
+
+
+@router.post("/api/matches/load", summary="試合をサーバーに読み込み")
+async def load_matches(request: LoadMatchesRequest):
+    """
+    大会の試合をインメモリストアに読み込む（その大会の既存の試合は置き換え）
+
+    キーは snake_case / camelCase のどちらでもよい（読み込み時に snake_case にそろえる）。
+    ID・試合日などの整数の項目が整数にできなければ400（どの試合のどの項目かを返す）。
+    """
+    try:
+        table = match_store.load(request.tournament_id, request.matches)
+    except MatchRowError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "success": True,
+        "tournament_id": request.tournament_id,
+        "total": len(table)
     }
 
 
@@ -59,47 +125,74 @@ class MatchFilter(BaseModel):
         populate_by_name = True
 
 
+def _fast_filter_body(payload: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """FAST_DECODE=1: 試合の dict を1件ずつ検証・複製しない（dict のリストでなければ None で通常どおり検証）"""
+    matches = payload.get("matches")
+    if not fast_decode.dict_rows(matches):
+        return None
+    if not fast_decode.valid(MatchFilter, payload.get("filter_params")):
+        return None
+    return {**payload, "matches": []}, matches
+
+
 @router.post("/api/matches/filter", summary="試合フィルタリング")
+@fast_decode.fast_body(_fast_filter_body)
 async def filter_matches(
     filter_params: MatchFilter,
-    matches: List[Dict[str, Any]] = Body(...)
+    raw: Request,
+    matches: List[Dict[str, Any]] = Body(...),
+    indices_only: bool = Query(False, alias="indicesOnly"),
+    fields: Optional[str] = Query(None, description="返す項目（カンマ区切り。例: id,matchDay,venueId）"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT, description="1ページの件数（省略時は全件）"),
+    cursor: Optional[str] = Query(None, description="前のページの next_cursor"),
+    format: ListingFormat = Query(ListingFormat.JSON),
 ):
     """
     試合リストをフィルタリング
 
     フロントエンドで取得した試合データをサーバーサイドでフィルタリングする場合に使用。
     通常はSupabaseクエリで直接フィルタリングすることを推奨。
-    """
-    filtered = matches
-
-    if filter_params.match_day is not None:
-        filtered = [m for m in filtered if m.get("match_day") == filter_params.match_day or m.get("matchDay") == filter_params.match_day]
 
-    if filter_params.is_b_match is not None:
-        filtered = [m for m in filtered if m.get("is_b_match") == filter_params.is_b_match or m.get("isBMatch") == filter_params.is_b_match]
+    本文: {"filter_params": {...}, "matches": [...]}
 
-    if filter_params.exclude_b_matches:
-        filtered = [m for m in filtered if not (m.get("is_b_match") or m.get("isBMatch"))]
-
-    if filter_params.group_id is not None:
-        filtered = [m for m in filtered if m.get("group_id") == filter_params.group_id or m.get("groupId") == filter_params.group_id]
-
-    if filter_params.stage is not None:
-        filtered = [m for m in filtered if m.get("stage") == filter_params.stage]
-
-    if filter_params.venue_id is not None:
-        filtered = [m for m in filtered if m.get("venue_id") == filter_params.venue_id or m.get("venueId") == filter_params.venue_id]
-
-    return {
-        "success": True,
-        "matches": filtered,
-        "total": len(filtered),
-        "filters_applied": {
-            "match_day": filter_params.match_day,
-            "is_b_match": filter_params.is_b_match,
-            "exclude_b_matches": filter_params.exclude_b_matches,
-            "group_id": filter_params.group_id,
-            "stage": filter_params.stage,
-            "venue_id": filter_params.venue_id
-        }
+    - 条件は1つの関数にまとめ（match_store.compile_filter）、試合リストを1回だけ走査する。各試合のキーは
+      条件の項目ごとに1回だけ解決する（snake_case がなければ camelCase）
+    - indicesOnly=true: 該当した試合の本文での位置（0始まり）だけを返す（matches の代わりに indices）
+    - fields=id,matchDay: 該当した試合の指定した項目だけを返す（キーは送られたとおり）
+    - limit / cursor: ページ分割（GET /api/matches と同じ）。ページ分割するときは本文の順ではなく
+      (試合日, キックオフ時刻, 会場, 試合順) の順に並べる
+    - format=ndjson: 1行1件で返す（最後の行に total・next_cursor）
+    """
+    fast_matches = fast_decode.decoded(raw)
+    if fast_matches is not None:
+        matches = fast_matches
+    select = compile_filter(
+        match_day=filter_params.match_day,
+        is_b_match=filter_params.is_b_match,
+        group_id=filter_params.group_id,
+        stage=filter_params.stage,
+        venue_id=filter_params.venue_id,
+        exclude_b_matches=filter_params.exclude_b_matches,
+        camel_case=True,
+    )
+    hits = select(matches)
+
+    paginated = limit is not None or cursor is not None
+    next_cursor = None
+    page = hits
+    if paginated:
+        hits, keys = sort_matches(matches, hits)
+        page, next_cursor = paginate(hits, keys, cursor, limit)
+
+    items_key = "indices" if indices_only else "matches"
+    items = list(page) if indices_only else project((matches[i] for i in page), parse_fields(fields))
+    body: Dict[str, Any] = {"success": True, items_key: None, "total": None}
+    body["filters_applied"] = {
+        "match_day": filter_params.match_day,
+        "is_b_match": filter_params.is_b_match,
+        "exclude_b_matches": filter_params.exclude_b_matches,
+        "group_id": filter_params.group_id,
+        "stage": filter_params.stage,
+        "venue_id": filter_params.venue_id
     }
+    return listing_response(body, items_key, items, len(hits), next_cursor, paginated, format)
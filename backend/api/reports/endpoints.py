@@ -1,17 +1,21 @@
-from fastapi import APIRouter, HTTPException, Body, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Body, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from enum import Enum
+import asyncio
 import sys
 import os
-import uuid
 
-# Import the generator classes
+# Import the generator sample data, the rendering pool and the result cache
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
-from generate_daily_report_pdf import DailyReportGenerator, create_sample_data as create_daily_sample
-from generate_final_result_pdf import FinalResultPDFGenerator, create_sample_data as create_final_sample
-from generate_standings_pdf import StandingsPDFGenerator
-from generate_star_table_pdf import StarTablePDFGenerator
+from generate_daily_report_pdf import create_sample_data as create_daily_sample, split_by_venue
+from generate_final_result_pdf import create_sample_data as create_final_sample
+from report_executor import GENERATORS, report_executor, RenderedReport, ReportPoolSaturated, ReportTimeout
+from pdf_cache import pdf_cache, make_key, etag_matches
+from pdf_utils import font_registry, merge_pdfs, zip_pdfs
 
 router = APIRouter()
 
@@ -26,6 +30,11 @@ class DailyReportRequest(BaseModel):
     reportConfig: Optional[ReportConfig] = None
     matchData: Dict[str, Any]
 
+class BatchFormat(str, Enum):
+    """一括生成の出力形式"""
+    PDF = "pdf"  # 1つのPDFに結合
+    ZIP = "zip"  # 会場ごとのPDFをZIPにまとめる
+
 class FinalResultRequest(BaseModel):
     date: str
     reportConfig: Optional[ReportConfig] = None
@@ -34,114 +43,229 @@ class FinalResultRequest(BaseModel):
     players: list
     training: list
 
+
+# レンダリング中のキャッシュキー（同時に来た同一リクエストは1回だけ生成する）
+_pending: Dict[str, asyncio.Future] = {}
+
+
+async def _render(kind: str, data: Dict[str, Any]) -> RenderedReport:
+    """帳票生成をプロセスプールで実行し、混雑・タイムアウトをHTTPエラーに変換"""
+    try:
+        return await report_executor.run(kind, data)
+    except ReportPoolSaturated as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except ReportTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+
+def _pdf_response(
+    report: RenderedReport, filename: str, etag: str, media_type: str = 'application/pdf'
+) -> StreamingResponse:
+    """生成済みPDFをストリーミングで返す（一時ファイルは送信後に削除）"""
+    return StreamingResponse(
+        report.iter_chunks(),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Length": str(report.size),
+            "ETag": etag,
+            "Cache-Control": "no-cache",
+        },
+        background=BackgroundTask(report.cleanup),
+    )
+
+
+def _cache_key(kind: str, data: Any, version: str) -> str:
+    return make_key(kind, data, version, font_registry.expected_name())
+
+
+async def _render_cached(kind: str, data: Dict[str, Any], key: str, pin: bool = False) -> RenderedReport:
+    """キャッシュにあればそれを、なければプロセスプールで生成して返す"""
+    content = await pdf_cache.aget(key)
+    if content is None and key in _pending:
+        content = await asyncio.shield(_pending[key])
+    if content is not None:
+        return RenderedReport(size=len(content), content=content)
+
+    waiter = asyncio.get_running_loop().create_future()
+    _pending[key] = waiter
+    report = None
+    try:
+        report = await _render(kind, data)
+    finally:
+        _pending.pop(key, None)
+        # 待機中のリクエストに結果を共有（失敗時・巨大PDFの場合は各自で生成）
+        waiter.set_result(report.content if report is not None else None)
+
+    # 一時ファイルに退避された巨大なPDFはキャッシュしない
+    if report.content is not None:
+        await pdf_cache.aput(key, report.content, pin=pin)
+    return report
+
+
+def _not_modified(request: Request, etag: str) -> Optional[Response]:
+    # 入力が同じならPDFも同じなので、ETagが一致すれば生成せずに304
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    return None
+
+
+async def _cached_pdf(
+    request: Request, kind: str, data: Dict[str, Any], filename: str, pin: bool = False
+):
+    """キャッシュとETagを考慮して帳票PDFを返す"""
+    key = _cache_key(kind, data, GENERATORS[kind].version)
+    etag = f'W/"{key}"'
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    report = await _render_cached(kind, data, key, pin=pin)
+    return _pdf_response(report, filename, etag)
+
+
+@router.get("/reports/stats", summary="帳票キャッシュ・生成プールの状況")
+async def get_report_stats():
+    return {
+        "success": True,
+        "cache": pdf_cache.stats(),
+        "executor": report_executor.stats(),
+    }
+
 @router.post("/daily-report", summary="日次報告書PDF生成")
 async def generate_daily_report(
+    request: Request,
     data: Dict[str, Any] = Body(..., example=create_daily_sample())
 ):
     try:
-        generator = DailyReportGenerator()
-        filename = f"daily_report_{uuid.uuid4()}.pdf"
-        output_path = os.path.join(os.getcwd(), filename)
-        
-        generator.generate(data, output_path)
-        
-        return FileResponse(
-            path=output_path, 
-            filename="daily_report.pdf", 
-            media_type='application/pdf'
-        )
+        return await _cached_pdf(request, 'daily', data, "daily_report.pdf")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/daily-report/sample", summary="日次報告書サンプルPDF生成")
-async def generate_daily_report_sample():
+async def generate_daily_report_sample(request: Request):
     try:
         data = create_daily_sample()
-        generator = DailyReportGenerator()
-        filename = f"sample_daily_report_{uuid.uuid4()}.pdf"
-        output_path = os.path.join(os.getcwd(), filename)
-        
-        generator.generate(data, output_path)
-        
-        return FileResponse(
-            path=output_path, 
-            filename="sample_daily_report.pdf", 
-            media_type='application/pdf'
-        )
+        # サンプルは入力が固定なので、初回生成後は常駐キャッシュから返す
+        return await _cached_pdf(request, 'daily', data, "sample_daily_report.pdf", pin=True)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/final-results", summary="最終結果報告書PDF生成")
 async def generate_final_results(
+    request: Request,
     data: Dict[str, Any] = Body(..., example=create_final_sample())
 ):
     try:
-        generator = FinalResultPDFGenerator()
-        filename = f"final_results_{uuid.uuid4()}.pdf"
-        output_path = os.path.join(os.getcwd(), filename)
-        
-        generator.generate(data, output_path)
-        
-        return FileResponse(
-            path=output_path, 
-            filename="final_results.pdf", 
-            media_type='application/pdf'
-        )
+        return await _cached_pdf(request, 'final', data, "final_results.pdf")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/final-results/sample", summary="最終結果報告書サンプルPDF生成")
-async def generate_final_results_sample():
+@router.post("/daily-report/batch", summary="日次報告書PDF一括生成（会場ごとに並列生成）")
+async def generate_daily_report_batch(
+    request: Request,
+    data: Dict[str, Any] = Body(..., example=create_daily_sample()),
+    format: BatchFormat = Query(BatchFormat.PDF),
+):
+    """
+    会場ごと（daysを指定した場合は試合日×会場ごと）に別ジョブとして並列生成し、
+    1つのPDFに結合するか、会場ごとのPDFをZIPで返す
+
+    - 入力: /daily-report と同じ形式、または {"days": [日次報告書データ, ...]}
+    - format=pdf: 結合した1つのPDF（デフォルト）
+    - format=zip: 会場ごとのPDFをまとめたZIP
+    """
     try:
-        data = create_final_sample()
-        generator = FinalResultPDFGenerator()
-        filename = f"sample_final_results_{uuid.uuid4()}.pdf"
-        output_path = os.path.join(os.getcwd(), filename)
+        version = GENERATORS['daily'].version
+        key = _cache_key(f'daily_batch_{format.value}', data, version)
+        etag = f'W/"{key}"'
+        not_modified = _not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        media_type = 'application/zip' if format == BatchFormat.ZIP else 'application/pdf'
+        filename = f"daily_report.{format.value}"
+        # ZIP はディスク層でも .zip として置く（PDF と区別する）
+        suffix = f'.{format.value}'
+        content = await pdf_cache.aget(key, suffix=suffix)
+        if content is None:
+            days = data.get('days') or [data]
+            parts: List[Tuple[str, Dict[str, Any]]] = []
+            for day_data in days:
+                day = day_data.get('day', 1)
+                for venue, venue_data in split_by_venue(day_data):
+                    safe_venue = venue.replace('/', '_').replace('\\', '_')
+                    parts.append((f"day{day}_{safe_venue}.pdf", venue_data))
+            if not parts:
+                raise HTTPException(status_code=400, detail="試合データがありません")
 
-        generator.generate(data, output_path)
+            # 1つの一括生成がプールを占有しないよう、同時投入数はワーカー数まで
+            limit = asyncio.Semaphore(report_executor.max_workers)
 
-        return FileResponse(
-            path=output_path,
-            filename="sample_final_results.pdf",
-            media_type='application/pdf'
+            async def render_part(venue_data: Dict[str, Any]) -> bytes:
+                async with limit:
+                    report = await _render_cached(
+                        'daily', venue_data, _cache_key('daily', venue_data, version)
+                    )
+                return await run_in_threadpool(report.read)
+
+            contents = await asyncio.gather(*(render_part(d) for _, d in parts))
+            if format == BatchFormat.ZIP:
+                content = await run_in_threadpool(
+                    zip_pdfs, [(name, c) for (name, _), c in zip(parts, contents)]
+                )
+            else:
+                content = await run_in_threadpool(merge_pdfs, list(contents))
+            await pdf_cache.aput(key, content, suffix=suffix)
+
+        return _pdf_response(
+            RenderedReport(size=len(content), content=content), filename, etag, media_type
         )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/final-results/sample", summary="最終結果報告書サンプルPDF生成")
+async def generate_final_results_sample(request: Request):
+    try:
+        data = create_final_sample()
+        return await _cached_pdf(request, 'final', data, "sample_final_results.pdf", pin=True)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/standings-pdf", summary="順位表PDF生成（日本語対応）")
 async def generate_standings_pdf(
+    request: Request,
     data: Dict[str, Any] = Body(...)
 ):
     try:
-        generator = StandingsPDFGenerator()
-        filename = f"standings_{uuid.uuid4()}.pdf"
-        output_path = os.path.join(os.getcwd(), filename)
-
-        generator.generate(data, output_path)
-
-        return FileResponse(
-            path=output_path,
-            filename="standings.pdf",
-            media_type='application/pdf'
-        )
+        return await _cached_pdf(request, 'standings', data, "standings.pdf")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/star-table-pdf", summary="星取表PDF生成（A4横向き・日本語対応）")
 async def gen_star_table_pdf(
+    request: Request,
     data: Dict[str, Any] = Body(...)
 ):
     try:
-        generator = StarTablePDFGenerator()
-        filename = f"star_table_{uuid.uuid4()}.pdf"
-        output_path = os.path.join(os.getcwd(), filename)
-
-        generator.generate(data, output_path)
-
-        return FileResponse(
-            path=output_path,
-            filename="star_table.pdf",
-            media_type='application/pdf'
-        )
+        return await _cached_pdf(request, 'star_table', data, "star_table.pdf")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,12 +1,17 @@
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, HTTPException, Body, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, Union
 import sys
 import os
 
 # Import the generator classes
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
 from final_day_generator_v2 import FinalDayGenerator, Team, TournamentConfig
+from preliminary_scheduler import PreliminaryScheduler, ScheduleScore
+from anchor_pod import build_optimizer
+from time_slots import TimeSlots, format_time
+from match_listing import MAX_LIMIT, ListingFormat, listing_response, paginate, parse_fields, project, sort_matches
 
 router = APIRouter()
 
@@ -27,6 +32,8 @@ class ScheduleGenerationRequest(BaseModel):
     standings: Dict[str, List[TeamInput]]
     playedPairs: List[List[int]] = []  # [[1,2], [3,4], ...]
     config: Optional[Dict[str, Any]] = None
+    timeBudgetMs: int = Field(0, ge=0, le=10000, description="研修試合の多スタート探索に使う時間（ミリ秒。0なら探索しない）")
+    seed: Optional[int] = Field(0, description="探索の乱数シード（null なら毎回変わる）")
 
 @router.post("/generate-schedule", summary="最終日組み合わせ生成")
 async def generate_schedule(request: ScheduleGenerationRequest):
@@ -35,6 +42,10 @@ async def generate_schedule(request: ScheduleGenerationRequest):
 
     - 決勝トーナメント: A1 vs C1, B1 vs D1
     - 研修試合: 2〜6位チームによる交流戦（各チーム2試合）
+    - timeBudgetMs > 0 なら研修試合の組み合わせと会場・時間を作り直しながら探索し、
+      同時刻重複 → 再戦 → 不足試合 → 会場ごとの試合数の差 → 連戦 の順に少ないものを返す
+      （search に実際の試行回数 restarts・予定の回数 planned・時間切れで打ち切ったか timed_out・
+      最良の試行番号・評価。打ち切らなければ同じ seed なら同じ結果）
     """
     try:
         # TeamInputをTeamオブジェクトに変換
@@ -69,20 +80,29 @@ async def generate_schedule(request: ScheduleGenerationRequest):
                 config.training_venues = request.config["trainingVenues"]
             if "kickoffTimes" in request.config:
                 config.kickoff_times = request.config["kickoffTimes"]
+            if "matchDuration" in request.config:
+                config.match_duration = request.config["matchDuration"]
             if "bracketMethod" in request.config:
                 config.bracket_method = request.config["bracketMethod"]
+            if "wildcardRunnersUp" in request.config:
+                config.wildcard_runners_up = request.config["wildcardRunnersUp"]
+            if "tournamentKickoffs" in request.config:
+                config.tournament_kickoffs = request.config["tournamentKickoffs"]
 
         # 日程生成
         generator = FinalDayGenerator(standings, played_pairs, config)
-        result = generator.generate()
+        result = await run_in_threadpool(generator.generate, request.timeBudgetMs, request.seed)
 
-        return {
+        response = {
             "success": True,
             "tournament": result["tournament"],
             "training": result["training"],
             "warnings": result["warnings"],
             "config": result["config"],
         }
+        if "search" in result:
+            response["search"] = result["search"]
+        return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -95,94 +115,195 @@ class PreliminaryScheduleRequest(BaseModel):
     startTime: str = "09:30"
     matchDuration: int = 15
     breakTime: int = 5
+    lunchStart: Optional[str] = None  # 昼休み（この時間帯にかかる試合は組まない）
+    lunchEnd: Optional[str] = None
+    timeBudgetMs: int = Field(0, ge=0, le=10000, description="会場・時間枠の探索に使う時間（ミリ秒。0（既定）なら貪欲法の初期解のまま）")
+    seed: Optional[int] = Field(0, description="探索の乱数シード（null なら毎回変わる）")
+
+
+def _generate_preliminary(
+    request: PreliminaryScheduleRequest, slots: TimeSlots
+) -> Tuple[List[Dict[str, Any]], ScheduleScore]:
+    """総当たりの組み合わせを作り、会場・時間枠を割り当てて (会場順→時刻順の試合, 評価) を返す"""
+    # グループごとにチームを分類
+    group_teams: Dict[str, List[TeamInput]] = {}
+    for team in request.teams:
+        group_teams.setdefault(team.group, []).append(team)
+
+    # 総当たりペアを生成
+    matches = []
+    for group, teams in group_teams.items():
+        for i in range(len(teams)):
+            for j in range(i + 1, len(teams)):
+                matches.append({
+                    "homeTeamId": teams[i].id,
+                    "homeTeamName": teams[i].name,
+                    "awayTeamId": teams[j].id,
+                    "awayTeamName": teams[j].name,
+                    "groupId": group,
+                    "matchNumber": len(matches) + 1,
+                })
+
+    # 会場と時間枠を割り当て（同時刻重複なし・連戦と会場移動が少なくなるように探索）
+    venues = request.venues
+    scheduler = PreliminaryScheduler(
+        [(m["homeTeamId"], m["awayTeamId"]) for m in matches],
+        len(venues),
+        time_budget_ms=request.timeBudgetMs,
+        seed=request.seed,
+    )
+    cells, score = scheduler.solve()
+    if score.slots and not slots.fits(score.slots - 1):
+        raise HTTPException(
+            status_code=400,
+            detail=f"{len(matches)}試合が1日に収まりません（{score.slots}枠必要 / "
+                   f"{slots.time(0)}開始で{slots.capacity()}枠まで）。会場を増やすか試合時間・休憩を短くしてください",
+        )
+
+    # 会場ID → 並び順（同じIDの会場が複数あれば最初のもの）
+    venue_rank: Dict[Any, int] = {}
+    for i, venue in enumerate(venues):
+        venue_rank.setdefault(venue["id"], i)
+
+    keyed = []
+    for match, (venue_idx, slot_idx) in zip(matches, cells):
+        venue = venues[venue_idx]
+        minutes = slots[slot_idx]
+        keyed.append(((venue_rank[venue["id"]], minutes), {
+            **match,
+            "matchDate": request.matchDate,
+            "matchTime": format_time(minutes),
+            "venueId": venue["id"],
+            "venueName": venue["name"],
+            "stage": "preliminary",
+            "status": "scheduled",
+        }))
+
+    # 会場→時間順にソート（キーは整数なので "9:30" と "10:35" のような時刻でも正しく並ぶ）
+    keyed.sort(key=lambda item: item[0])
+    return [match for _, match in keyed], score
+
 
 @router.post("/generate-preliminary", summary="予選リーグ日程生成")
-async def generate_preliminary_schedule(request: PreliminaryScheduleRequest):
+async def generate_preliminary_schedule(
+    request: PreliminaryScheduleRequest,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT, description="1ページの件数（省略時は全件）"),
+    cursor: Optional[str] = Query(None, description="前のページの next_cursor"),
+    fields: Optional[str] = Query(None, description="返す項目（カンマ区切り。例: matchNumber,matchTime,venueId）"),
+    format: ListingFormat = Query(ListingFormat.JSON),
+):
     """
     予選リーグの総当たり日程を生成
 
     - 各グループ内で総当たり戦を生成
-    - 会場と時間を自動割り当て
+    - 会場と時間を自動割り当て（preliminary_scheduler）
+      - キックオフは startTime から matchDuration + breakTime ごと（lunchStart〜lunchEnd にかかる枠は昼休みの後へ）
+      - 1日に収まらない場合・会場がない場合は400
+      - 同じチームが同じ時間枠に入らない（ハード制約）
+      - そのうえで 連戦 → 会場移動 の順に少なくなるよう、timeBudgetMs の間だけ焼きなましで探索する
+        （既定の 0 では探索せず貪欲法の初期解を返す。編集のたびに呼んでも軽いように、探索は指定したときだけ）
+      - score に最良解の内訳（conflicts, consecutive, venueChanges, slots, score）を返す
+    - limit / cursor / fields / format は GET /api/matches と同じ（match_listing）。
+      ページ分割するときは会場順ではなく (試合日, キックオフ時刻, 会場, 試合番号) の順に並べる
     """
     try:
-        # グループごとにチームを分類
-        group_teams: Dict[str, List[Dict]] = {}
-        for team in request.teams:
-            group = team.group
-            if group not in group_teams:
-                group_teams[group] = []
-            group_teams[group].append({
-                "id": team.id,
-                "name": team.name,
-                "group": group,
-            })
+        slots = TimeSlots.from_request(
+            request.startTime, request.matchDuration, request.breakTime, request.lunchStart, request.lunchEnd
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        # 総当たりペアを生成
-        matches = []
-        match_number = 1
-
-        for group, teams in group_teams.items():
-            for i in range(len(teams)):
-                for j in range(i + 1, len(teams)):
-                    matches.append({
-                        "homeTeamId": teams[i]["id"],
-                        "homeTeamName": teams[i]["name"],
-                        "awayTeamId": teams[j]["id"],
-                        "awayTeamName": teams[j]["name"],
-                        "groupId": group,
-                        "matchNumber": match_number,
-                    })
-                    match_number += 1
-
-        # 会場と時間を割り当て
-        venues = request.venues
-        # 1日あたり最大8試合分のキックオフ時刻（試合時間15分 + 休憩5分 = 20分間隔）
-        kickoff_times = [
-            "09:00", "09:25", "09:50", "10:15", "10:40", "11:05", "11:30", "11:55",
-            "12:20", "12:45", "13:10", "13:35", "14:00", "14:25", "14:50", "15:15"
-        ]
-        venue_slot_count = {v["id"]: 0 for v in venues}
-
-        scheduled_matches = []
-        for idx, match in enumerate(matches):
-            venue_idx = idx % len(venues)
-            venue = venues[venue_idx]
-            slot_idx = venue_slot_count[venue["id"]]
-
-            # 時刻が配列を超えた場合は最後の時刻+25分を繰り返す（ただし23:59まで）
-            if slot_idx < len(kickoff_times):
-                kickoff = kickoff_times[slot_idx]
-            else:
-                extra_slots = slot_idx - len(kickoff_times) + 1
-                hour = 15 + (extra_slots * 25) // 60
-                minute = 40 + (extra_slots * 25) % 60
-                if minute >= 60:
-                    hour += 1
-                    minute -= 60
-                hour = min(hour, 23)  # 23時を超えないように
-                kickoff = f"{hour:02d}:{minute:02d}"
-            venue_slot_count[venue["id"]] += 1
-
-            scheduled_matches.append({
-                **match,
-                "matchDate": request.matchDate,
-                "matchTime": kickoff,
-                "venueId": venue["id"],
-                "venueName": venue["name"],
-                "stage": "preliminary",
-                "status": "scheduled",
-            })
-
-        # 会場→時間順にソート
-        scheduled_matches.sort(key=lambda m: (
-            next((i for i, v in enumerate(venues) if v["id"] == m["venueId"]), 0),
-            m["matchTime"]
-        ))
-
-        return {
-            "success": True,
-            "matches": scheduled_matches,
-            "total": len(scheduled_matches),
-        }
+    try:
+        scheduled_matches, score = await run_in_threadpool(_generate_preliminary, request, slots)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        # 入力の不備（会場がないなど）は preliminary_scheduler が ValueError で知らせる
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+    paginated = limit is not None or cursor is not None
+    page, next_cursor = scheduled_matches, None
+    if paginated:
+        order, keys = sort_matches(scheduled_matches)
+        page, next_cursor = paginate([scheduled_matches[i] for i in order], keys, cursor, limit)
+    body = {"success": True, "matches": None, "total": None, "score": score.to_dict()}
+    return listing_response(
+        body, "matches", project(page, parse_fields(fields)), len(scheduled_matches),
+        next_cursor, paginated, format,
+    )
+
+
+class VenueAssignmentTeamInput(BaseModel):
+    id: int
+    name: str
+    region: Optional[str] = None
+    prefecture: Optional[str] = None
+    league_id: Optional[Union[int, str]] = Field(None, alias="leagueId")
+    team_type: Optional[str] = Field(None, alias="teamType")  # 'local' | 'invited'
+    is_host: bool = Field(False, alias="isHost")
+    host_venue_id: Optional[int] = Field(None, alias="hostVenueId")
+
+    class Config:
+        populate_by_name = True
+
+
+class VenueAssignmentVenueInput(BaseModel):
+    id: int
+    name: str
+
+
+class VenueAssignmentRequest(BaseModel):
+    """会場配置（Anchor-Pod）生成リクエスト"""
+    teams: List[VenueAssignmentTeamInput]
+    venues: List[VenueAssignmentVenueInput]
+    teamsPerVenue: int = Field(4, ge=1)
+    day1Assignments: Optional[Dict[int, List[int]]] = None  # Day1の 会場ID → チームID（スロット順）
+    bannedPairs: List[List[int]] = []  # A戦で当てないペア [[1,2], ...]
+    timeBudgetMs: int = Field(300, ge=0, le=10000, description="multi-start + 会場間スワップの探索に使う時間（ミリ秒。0なら探索しない）")
+    seed: Optional[int] = Field(0, description="探索の乱数シード（null なら毎回変わる）")
+
+
+@router.post("/generate-venue-assignment", summary="会場配置生成（Anchor-Pod）")
+async def generate_venue_assignment(request: VenueAssignmentRequest):
+    """
+    チームを会場に配置（anchor_pod.AnchorPodOptimizer）
+
+    - ホスト（isHost かつ hostVenueId）は自会場に固定、各会場 3〜5 チーム（合わなければ teamsPerVenue）
+    - Day1再戦（day1Assignments / bannedPairs）→ 同リーグ → 同地域（region、なければ prefecture）→ 地元同士 の順に避ける
+      （bannedPairs の要素が2チームでなければ400。anchor_pod.build_optimizer）
+    - timeBudgetMs の間 multi-start + 会場間スワップで探索し、score に内訳を返す
+    - 保存はしない（フロントエンドが Supabase の venue_assignments に書き込む）
+    """
+    if not request.teams:
+        raise HTTPException(status_code=400, detail="チームが指定されていません")
+    if not request.venues:
+        raise HTTPException(status_code=400, detail="会場が指定されていません")
+
+    try:
+        optimizer = build_optimizer(
+            request.teams,
+            [venue.id for venue in request.venues],
+            teams_per_venue=request.teamsPerVenue,
+            day1_assignments=request.day1Assignments,
+            banned_pairs=request.bannedPairs,
+            time_budget_ms=request.timeBudgetMs,
+            seed=request.seed,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    pods, score = await run_in_threadpool(optimizer.solve)
+
+    assignments = []
+    for venue, pod in zip(request.venues, pods):
+        for slot_order, team_idx in enumerate(pod, 1):
+            team = request.teams[team_idx]
+            assignments.append({
+                "venueId": venue.id,
+                "venueName": venue.name,
+                "teamId": team.id,
+                "teamName": team.name,
+                "slotOrder": slot_order,
+            })
+    return {"success": True, "assignments": assignments, "score": score.to_dict()}
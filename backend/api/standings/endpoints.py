@@ -1,10 +1,21 @@
-from fastapi import APIRouter, HTTPException, Body, Query
+from fastapi import APIRouter, HTTPException, Body, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from enum import Enum
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import json
+import sys
+import os
 
-router = APIRouter()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+import fast_decode
+import standings_engine
+from standings_service import standings_service, StandingsNotLoaded
+
+router = APIRouter(route_class=fast_decode.FastDecodeRoute)
 
 # =============================================================================
 # 順位表API (standings)
@@ -59,11 +70,25 @@ class CalculateStandingsRequest(BaseModel):
     matches: List[MatchResult]
     use_group_system: bool = Field(True, alias="useGroupSystem")
     exclude_b_matches: bool = Field(True, alias="excludeBMatches")
+    head_to_head: bool = Field(True, alias="headToHead")
 
     class Config:
         populate_by_name = True
 
 
+class BulkStandingsRequest(BaseModel):
+    """複数大会の順位計算リクエスト"""
+    tournaments: List[CalculateStandingsRequest]
+
+
+# 一括計算でこの大会数以上ならスレッドプールで並列に計算する
+BULK_PARALLEL_MIN = int(os.environ.get('STANDINGS_BULK_PARALLEL_MIN', 4))
+_bulk_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('STANDINGS_BULK_WORKERS', 4)),
+    thread_name_prefix='standings-bulk',
+)
+
+
 @router.get("/api/standings", summary="順位表取得")
 async def get_standings(
     tournament_id: int = Query(..., alias="tournamentId"),
@@ -93,8 +118,19 @@ async def get_standings(
     }
 
 
+def _fast_calculate_body(payload: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], Any]]:
+    """FAST_DECODE=1: 試合リストを MatchArrays に直接デコード（通らなければ None で通常どおり検証）"""
+    arrays = fast_decode.match_arrays(payload.get("matches"))
+    if arrays is None:
+        return None
+    # 試合以外の項目（チーム・オプション）は FastAPI がモデルで検証する
+    slim = {**payload, "matches": []}
+    return (slim, arrays) if fast_decode.valid(CalculateStandingsRequest, slim) else None
+
+
 @router.post("/api/standings/calculate", summary="順位計算")
-async def calculate_standings(request: CalculateStandingsRequest):
+@fast_decode.fast_body(_fast_calculate_body)
+async def calculate_standings(request: CalculateStandingsRequest, raw: Request):
     """
     試合結果から順位表を計算
 
@@ -106,118 +142,28 @@ async def calculate_standings(request: CalculateStandingsRequest):
     1. 勝ち点
     2. 得失点差
     3. 総得点
-    4. 直接対決（該当する場合）
+    4. 直接対決（該当する場合。並んだチーム同士のミニリーグで1〜3を比較し、
+       まだ並ぶチームはその中だけで繰り返す。head_to_head=false で無効）
+    5. チーム名
+
+    FAST_DECODE=1 なら試合リストを Pydantic モデルにせず列配列へ直接デコードする（fast_decode）
     """
-    teams = request.teams
-    matches = request.matches
+    return _calculate(request, fast_decode.decoded(raw))
+
+
+def _calculate(request: CalculateStandingsRequest, matches: Any = None) -> Dict[str, Any]:
+    """1大会分の順位計算（calculate / bulk 共通）。matches を省略すると request.matches"""
     use_group_system = request.use_group_system
     exclude_b_matches = request.exclude_b_matches
 
-    # チームの成績を初期化
-    team_stats: Dict[int, Dict[str, Any]] = {}
-    for team in teams:
-        team_id = team["id"]
-        team_stats[team_id] = {
-            "team_id": team_id,
-            "team_name": team.get("name", f"Team {team_id}"),
-            "group_id": team.get("groupId") or team.get("group_id"),
-            "played": 0,
-            "won": 0,
-            "drawn": 0,
-            "lost": 0,
-            "goals_for": 0,
-            "goals_against": 0,
-            "goal_difference": 0,
-            "points": 0,
-        }
-
-    # 試合結果を集計
-    for match in matches:
-        # B戦除外チェック
-        if exclude_b_matches and match.is_b_match:
-            continue
-
-        # 試合が完了していない場合はスキップ
-        if match.status != "completed":
-            continue
-
-        home_id = match.home_team_id
-        away_id = match.away_team_id
-        home_score = match.home_score
-        away_score = match.away_score
-
-        if home_id not in team_stats or away_id not in team_stats:
-            continue
-
-        # ホームチーム
-        team_stats[home_id]["played"] += 1
-        team_stats[home_id]["goals_for"] += home_score
-        team_stats[home_id]["goals_against"] += away_score
-
-        # アウェイチーム
-        team_stats[away_id]["played"] += 1
-        team_stats[away_id]["goals_for"] += away_score
-        team_stats[away_id]["goals_against"] += home_score
-
-        # 勝敗判定
-        if home_score > away_score:
-            team_stats[home_id]["won"] += 1
-            team_stats[home_id]["points"] += 3
-            team_stats[away_id]["lost"] += 1
-        elif home_score < away_score:
-            team_stats[away_id]["won"] += 1
-            team_stats[away_id]["points"] += 3
-            team_stats[home_id]["lost"] += 1
-        else:
-            team_stats[home_id]["drawn"] += 1
-            team_stats[home_id]["points"] += 1
-            team_stats[away_id]["drawn"] += 1
-            team_stats[away_id]["points"] += 1
-
-    # 得失点差を計算
-    for team_id in team_stats:
-        team_stats[team_id]["goal_difference"] = (
-            team_stats[team_id]["goals_for"] - team_stats[team_id]["goals_against"]
-        )
-
-    # 順位をソート
-    def sort_key(stat):
-        return (
-            -stat["points"],
-            -stat["goal_difference"],
-            -stat["goals_for"],
-            stat["team_name"]  # 同点の場合は名前順
-        )
-
-    if use_group_system:
-        # グループ別に順位付け
-        group_standings: Dict[str, List[Dict]] = defaultdict(list)
-
-        for stat in team_stats.values():
-            group_id = stat["group_id"] or "unknown"
-            group_standings[group_id].append(stat)
-
-        result_standings = []
-        for group_id, group_stats in group_standings.items():
-            sorted_stats = sorted(group_stats, key=sort_key)
-            for rank, stat in enumerate(sorted_stats, 1):
-                stat["rank"] = rank
-                stat["group_id"] = group_id
-                result_standings.append(stat)
-
-        # 全体順位も計算（オプション）
-        all_sorted = sorted(team_stats.values(), key=sort_key)
-        for overall_rank, stat in enumerate(all_sorted, 1):
-            stat["overall_rank"] = overall_rank
-
-    else:
-        # 全体で順位付け（新フォーマット）
-        all_sorted = sorted(team_stats.values(), key=sort_key)
-        result_standings = []
-        for rank, stat in enumerate(all_sorted, 1):
-            stat["rank"] = rank
-            stat["overall_rank"] = rank
-            result_standings.append(stat)
+    # 試合結果を列配列にまとめてNumPyで集計・順位付け
+    result_standings = standings_engine.calculate(
+        request.teams,
+        request.matches if matches is None else matches,
+        use_group_system=use_group_system,
+        exclude_b_matches=exclude_b_matches,
+        head_to_head=request.head_to_head,
+    )
 
     return {
         "success": True,
@@ -227,3 +173,170 @@ async def calculate_standings(request: CalculateStandingsRequest):
         "standings": result_standings,
         "total": len(result_standings)
     }
+
+
+def _ndjson(item: Dict[str, Any]) -> bytes:
+    return (json.dumps(item, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+async def _bulk_results(tournaments: List[Tuple[CalculateStandingsRequest, Any]]):
+    """大会ごとの結果を計算が終わった順に1行ずつ返す（最後に件数の行）"""
+    async def run(index: int, request: CalculateStandingsRequest, matches: Any) -> Dict[str, Any]:
+        try:
+            if len(tournaments) >= BULK_PARALLEL_MIN:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(_bulk_executor, _calculate, request, matches)
+            else:
+                result = await run_in_threadpool(_calculate, request, matches)
+        except Exception as e:
+            # 1大会の失敗で残りの大会を止めない
+            result = {"success": False, "tournament_id": request.tournament_id, "error": str(e)}
+        return {"index": index, **result}
+
+    if len(tournaments) >= BULK_PARALLEL_MIN:
+        for finished in asyncio.as_completed([run(i, *t) for i, t in enumerate(tournaments)]):
+            yield _ndjson(await finished)
+    else:
+        for i, t in enumerate(tournaments):
+            yield _ndjson(await run(i, *t))
+    yield _ndjson({"done": True, "count": len(tournaments)})
+
+
+def _fast_bulk_body(payload: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], Any]]:
+    """FAST_DECODE=1: 大会ごとの試合リストを MatchArrays に。1大会でも通らなければ None で全体を通常どおり検証"""
+    tournaments = payload.get("tournaments")
+    if type(tournaments) is not list:
+        return None
+    slim_tournaments, arrays = [], []
+    for item in tournaments:
+        if not isinstance(item, dict):
+            return None
+        matches = fast_decode.match_arrays(item.get("matches"))
+        if matches is None:
+            return None
+        slim_tournaments.append({**item, "matches": []})
+        arrays.append(matches)
+    slim = {**payload, "tournaments": slim_tournaments}
+    return (slim, arrays) if fast_decode.valid(BulkStandingsRequest, slim) else None
+
+
+@router.post("/api/standings/bulk", summary="複数大会の順位計算（NDJSON）")
+@fast_decode.fast_body(_fast_bulk_body)
+async def calculate_bulk_standings(request: BulkStandingsRequest, raw: Request):
+    """
+    複数大会の順位表をまとめて計算し、大会ごとに1行のNDJSONで返す
+
+    本文: {"tournaments": [<POST /api/standings/calculate と同じ形式>, ...]}
+
+    - 本文の検証は calculate と同じ（FAST_DECODE=1 なら試合リストを列配列へ直接デコード）
+    - STANDINGS_BULK_PARALLEL_MIN（既定4）大会以上ならスレッドプールで並列に計算する
+    - 各行は calculate のレスポンスに index（本文での位置）を加えたもの。
+      計算が終わった大会から順に返すので、行の順は本文の順と一致しないことがある
+    - 1大会の計算に失敗した場合はその行だけ success=false と error を返す
+    - 最後の行は {"done": true, "count": 大会数}
+    """
+    arrays = fast_decode.decoded(raw)
+    tournaments = [
+        (t, t.matches if arrays is None else arrays[i]) for i, t in enumerate(request.tournaments)
+    ]
+    return StreamingResponse(
+        _bulk_results(tournaments),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+# =============================================================================
+# 差分更新の順位表 (live standings)
+# =============================================================================
+
+def _not_loaded(tournament_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=404,
+        detail=f"大会 {tournament_id} の順位表が読み込まれていません。先に POST /api/standings/live を呼んでください"
+    )
+
+
+@router.post("/api/standings/live", summary="差分更新用の順位表を読み込み")
+async def load_live_standings(request: CalculateStandingsRequest):
+    """
+    全チーム・全試合から順位表を作り、以後は1試合ずつの差分で更新できるようにする
+
+    - 計算方法・レスポンスの各行は POST /api/standings/calculate と同じ
+    - 同じ大会を読み込み直すと、全行が新しい version で置き換わる
+    """
+    standings = standings_service.load(
+        request.tournament_id,
+        request.teams,
+        request.matches,
+        use_group_system=request.use_group_system,
+        exclude_b_matches=request.exclude_b_matches,
+        head_to_head=request.head_to_head,
+    )
+    rows = standings.standings()
+    return {
+        "success": True,
+        "tournament_id": request.tournament_id,
+        "version": standings.version,
+        "standings": rows,
+        "total": len(rows)
+    }
+
+
+@router.get("/api/standings/live/{tournament_id}", summary="差分更新の順位表を取得")
+async def get_live_standings(
+    tournament_id: int,
+    since: Optional[int] = Query(None, description="この version より後に変わった行だけを返す")
+):
+    try:
+        standings = standings_service.get(tournament_id)
+    except StandingsNotLoaded:
+        raise _not_loaded(tournament_id)
+
+    rows = standings.standings() if since is None else standings.changes_since(since)
+    return {
+        "success": True,
+        "tournament_id": tournament_id,
+        "version": standings.version,
+        "since": since,
+        "standings": rows,
+        "total": len(rows)
+    }
+
+
+@router.put("/api/standings/live/{tournament_id}/matches/{match_id}", summary="試合結果を反映（差し替え）")
+async def apply_live_match(tournament_id: int, match_id: int, match: MatchResult):
+    """
+    1試合分の結果を反映する（同じ試合IDが反映済みなら差し替え）
+
+    status の変更（completed 以外にすると順位から外れる）や B戦の切り替えも同じように反映される。
+    レスポンスの changed は、成績または順位が変わった行だけ。
+    """
+    if match.id != match_id:
+        raise HTTPException(status_code=400, detail="パスの試合IDと本文の id が一致しません")
+    try:
+        changed = standings_service.apply(tournament_id, match)
+    except StandingsNotLoaded:
+        raise _not_loaded(tournament_id)
+
+    return {
+        "success": True,
+        "tournament_id": tournament_id,
+        "version": standings_service.get(tournament_id).version,
+        "changed": changed
+    }
+
+
+@router.delete("/api/standings/live/{tournament_id}/matches/{match_id}", summary="試合結果を取り消し")
+async def reverse_live_match(tournament_id: int, match_id: int):
+    try:
+        changed = standings_service.reverse(tournament_id, match_id)
+    except StandingsNotLoaded:
+        raise _not_loaded(tournament_id)
+
+    return {
+        "success": True,
+        "tournament_id": tournament_id,
+        "version": standings_service.get(tournament_id).version,
+        "changed": changed
+    }
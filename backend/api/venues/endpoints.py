@@ -1,14 +1,22 @@
 # DEPRECATED: このエンドポイントは使用されていません。
 # フロントエンドは Supabase 直接アクセスで完全代替済み。
 # server.py からのルーターマウントは削除済み (2026-03-01)。
+# anchor_pod の会場配置は POST /generate-venue-assignment（api/scheduling、保存なし）で提供している。
 
 from fastapi import APIRouter, HTTPException, Body, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Union
 from enum import Enum
+import heapq
 import random
+import sys
+import os
 from collections import defaultdict
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from anchor_pod import build_optimizer
+
 router = APIRouter()
 
 # =============================================================================
@@ -74,6 +82,7 @@ class AutoGenerateStrategy(str, Enum):
     REGION_DISPERSED = "region_dispersed"  # 地域分散（同じ地域のチームが同じ会場に集中しない）
     BALANCED = "balanced"  # バランス配置
     RANDOM = "random"  # ランダム配置
+    ANCHOR_POD = "anchor_pod"  # Anchor-Pod CP（ホスト固定 + 辞書式スコアの最適化。spec 4.2）
 
 
 class AutoGenerateRequest(BaseModel):
@@ -238,6 +247,13 @@ class TeamForAssignment(BaseModel):
     name: str
     region: Optional[str] = None
     prefecture: Optional[str] = None
+    league_id: Optional[Union[int, str]] = Field(None, alias="leagueId")
+    team_type: Optional[str] = Field(None, alias="teamType")  # 'local' | 'invited'
+    is_host: bool = Field(False, alias="isHost")
+    host_venue_id: Optional[int] = Field(None, alias="hostVenueId")
+
+    class Config:
+        populate_by_name = True
 
 
 class VenueForAssignment(BaseModel):
@@ -258,11 +274,79 @@ class AutoGenerateWithDataRequest(BaseModel):
     match_day: int = Field(1, alias="matchDay")
     strategy: AutoGenerateStrategy = AutoGenerateStrategy.REGION_DISPERSED
     teams_per_venue: int = Field(4, alias="teamsPerVenue")
+    # anchor_pod のみ
+    day1_assignments: Optional[Dict[int, List[int]]] = Field(None, alias="day1Assignments")  # Day1の 会場ID → チームID（スロット順）
+    banned_pairs: List[List[int]] = Field([], alias="bannedPairs")  # A戦で当てないペア [[1,2], ...]
+    time_budget_ms: int = Field(300, ge=0, le=10000, alias="timeBudgetMs")
+    seed: Optional[int] = Field(0)
 
     class Config:
         populate_by_name = True
 
 
+def _disperse_by_region(
+    teams: List[TeamForAssignment], venue_count: int, teams_per_venue: int
+) -> List[List[TeamForAssignment]]:
+    """
+    地域分散配置: 会場ごとのチーム（スロット順）を返す
+
+    1. チームを地域（region → prefecture → "unknown"）ごとに分け、地域の順番と地域内の順番をシャッフル
+    2. 各地域から1チームずつ順に取り出し、同じ地域のチームがいない会場のうち空きが最も多い会場に置く
+       （空きのある全会場に同じ地域のチームがいれば、空きが最も多い会場）
+
+    会場ごとの 地域 → チーム数 と、空きのある会場を (-空き, 会場) で並べたヒープを持つ。
+    「空きのある全会場に同じ地域がいる」かは、地域ごとの「その地域がいる空きのある会場の数」と
+    ヒープの大きさの比較で O(1)。全会場が埋まったら残りのチームは配置しない。
+    """
+    region_teams: Dict[str, List[TeamForAssignment]] = defaultdict(list)
+    for team in teams:
+        region_teams[team.region or team.prefecture or "unknown"].append(team)
+    regions = list(region_teams.keys())
+    random.shuffle(regions)  # 地域の順番をシャッフル
+    for region in regions:
+        random.shuffle(region_teams[region])
+
+    venue_assignments_list: List[List[TeamForAssignment]] = [[] for _ in range(venue_count)]
+    if teams_per_venue <= 0:
+        return venue_assignments_list
+    venue_regions: List[Dict[str, int]] = [defaultdict(int) for _ in range(venue_count)]
+    # 地域 → その地域のチームがいる、空きのある会場の数
+    open_with_region: Dict[str, int] = defaultdict(int)
+    # 空きのある会場（各会場1つ）
+    heap = [(-teams_per_venue, v) for v in range(venue_count)]
+
+    # 各地域からラウンドロビン方式で取り出す
+    for round_idx in range(max((len(t) for t in region_teams.values()), default=0)):
+        for region in regions:
+            if round_idx >= len(region_teams[region]) or not heap:
+                continue
+            team = region_teams[region][round_idx]
+            if open_with_region[region] == len(heap):
+                neg_free, v = heapq.heappop(heap)
+            else:
+                # 同じ地域がいる会場は飛ばして戻す
+                skipped = []
+                neg_free, v = heapq.heappop(heap)
+                while venue_regions[v][region]:
+                    skipped.append((neg_free, v))
+                    neg_free, v = heapq.heappop(heap)
+                for entry in skipped:
+                    heapq.heappush(heap, entry)
+
+            venue_assignments_list[v].append(team)
+            counts = venue_regions[v]
+            if not counts[region]:
+                open_with_region[region] += 1
+            counts[region] += 1
+            if neg_free + 1 < 0:
+                heapq.heappush(heap, (neg_free + 1, v))
+            else:
+                # 満員になった会場の地域は数えない
+                for r in counts:
+                    open_with_region[r] -= 1
+    return venue_assignments_list
+
+
 @router.post("/api/venue-assignments/auto-generate-with-data", summary="会場配置自動生成（データ込み）")
 async def auto_generate_venue_assignments_with_data(request: AutoGenerateWithDataRequest):
     """
@@ -271,6 +355,12 @@ async def auto_generate_venue_assignments_with_data(request: AutoGenerateWithDat
     地域分散ロジック:
     - 同じ地域のチームが同じ会場に集中しないように配置
     - 各会場にteams_per_venue数のチームを配置
+
+    anchor_pod（anchor_pod.AnchorPodOptimizer）:
+    - ホスト（isHost かつ hostVenueId）は自会場に固定、各会場 3〜5 チーム（合わなければ teams_per_venue）
+    - Day1再戦（day1Assignments / bannedPairs）→ 同リーグ → 同地域（region、なければ prefecture）→ 地元同士 の順に避ける
+      （bannedPairs の要素が2チームでなければ400。anchor_pod.build_optimizer）
+    - timeBudgetMs の間 multi-start + 会場間スワップで探索し、score に内訳を返す（同じ seed なら同じ結果）
     """
     global venue_assignment_counter
 
@@ -293,73 +383,50 @@ async def auto_generate_venue_assignments_with_data(request: AutoGenerateWithDat
         del venue_assignments_db[aid]
 
     assignments = []
+    score = None
+
+    if strategy == AutoGenerateStrategy.ANCHOR_POD:
+        try:
+            optimizer = build_optimizer(
+                teams,
+                [venue.id for venue in venues],
+                teams_per_venue=teams_per_venue,
+                day1_assignments=request.day1_assignments,
+                banned_pairs=request.banned_pairs,
+                time_budget_ms=request.time_budget_ms,
+                seed=request.seed,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        pods, score = await run_in_threadpool(optimizer.solve)
+
+        # 配置結果をDBに登録
+        for venue_idx, venue in enumerate(venues):
+            for slot_order, team_idx in enumerate(pods[venue_idx], 1):
+                team = teams[team_idx]
+                venue_assignment_counter += 1
+                new_id = venue_assignment_counter
+                venue_assignments_db[new_id] = {
+                    "tournament_id": request.tournament_id,
+                    "venue_id": venue.id,
+                    "team_id": team.id,
+                    "match_day": request.match_day,
+                    "slot_order": slot_order
+                }
+                assignments.append({
+                    "id": new_id,
+                    "tournament_id": request.tournament_id,
+                    "venue_id": venue.id,
+                    "venue_name": venue.name,
+                    "team_id": team.id,
+                    "team_name": team.name,
+                    "match_day": request.match_day,
+                    "slot_order": slot_order
+                })
 
-    if strategy == AutoGenerateStrategy.REGION_DISPERSED:
+    elif strategy == AutoGenerateStrategy.REGION_DISPERSED:
         # 地域分散ロジック
-        # 1. チームを地域ごとにグループ化
-        region_teams: Dict[str, List[TeamForAssignment]] = defaultdict(list)
-        for team in teams:
-            region = team.region or team.prefecture or "unknown"
-            region_teams[region].append(team)
-
-        # 2. 各地域からラウンドロビン方式でチームを取り出し、会場に配置
-        venue_assignments_list: List[List[TeamForAssignment]] = [[] for _ in venues]
-        regions = list(region_teams.keys())
-        random.shuffle(regions)  # 地域の順番をシャッフル
-
-        # 各地域のチームリストをシャッフル
-        for region in regions:
-            random.shuffle(region_teams[region])
-
-        # 地域インデックスとチームインデックスを追跡
-        region_indices = {region: 0 for region in regions}
-        venue_idx = 0
-        teams_placed = 0
-        total_teams = len(teams)
-
-        while teams_placed < total_teams:
-            placed_this_round = False
-
-            for region in regions:
-                if region_indices[region] < len(region_teams[region]):
-                    # この地域からチームを取り出す
-                    team = region_teams[region][region_indices[region]]
-                    region_indices[region] += 1
-
-                    # 会場に空きがあれば配置
-                    attempts = 0
-                    while attempts < len(venues):
-                        if len(venue_assignments_list[venue_idx]) < teams_per_venue:
-                            # この会場に同じ地域のチームがいないかチェック
-                            same_region_exists = any(
-                                (t.region or t.prefecture or "unknown") == (team.region or team.prefecture or "unknown")
-                                for t in venue_assignments_list[venue_idx]
-                            )
-                            if not same_region_exists or all(
-                                len(va) >= teams_per_venue or
-                                any((t.region or t.prefecture or "unknown") == (team.region or team.prefecture or "unknown")
-                                    for t in va)
-                                for va in venue_assignments_list
-                            ):
-                                venue_assignments_list[venue_idx].append(team)
-                                teams_placed += 1
-                                placed_this_round = True
-                                break
-                        venue_idx = (venue_idx + 1) % len(venues)
-                        attempts += 1
-                    else:
-                        # 全会場を試しても配置できなかった場合は強制配置
-                        for vi, va in enumerate(venue_assignments_list):
-                            if len(va) < teams_per_venue:
-                                va.append(team)
-                                teams_placed += 1
-                                placed_this_round = True
-                                break
-
-                    venue_idx = (venue_idx + 1) % len(venues)
-
-            if not placed_this_round:
-                break
+        venue_assignments_list = _disperse_by_region(teams, len(venues), teams_per_venue)
 
         # 配置結果をDBに登録
         for venue_idx, venue in enumerate(venues):
@@ -444,9 +511,12 @@ async def auto_generate_venue_assignments_with_data(request: AutoGenerateWithDat
                 "slot_order": slot_order
             })
 
-    return {
+    response = {
         "success": True,
         "created": len(assignments),
         "assignments": assignments,
         "strategy": strategy.value
     }
+    if score is not None:
+        response["score"] = score.to_dict()
+    return response
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""順位計算リクエストの本文デコードのベンチマーク（合成データ: 1大会・5千試合）
+
+使い方:
+    python bench_decode.py [試合数]
+
+POST /api/standings/calculate の本文（JSONのバイト列）から計算に渡す形にするまでを比較する。
+- 通常: json.loads → CalculateStandingsRequest（試合ごとに MatchResult を組み立てる）
+- 高速: orjson → 試合リストを列ごとに型確認して MatchArrays に直接詰める（fast_decode）。
+  試合を空にした本文を FastAPI が解析し直してモデルで検証する分も含める
+あわせて順位計算そのもの（standings_engine.calculate）の時間も表示する。
+結果が一致することは test_fast_decode.py で確認する。
+"""
+
+import json
+import random
+import sys
+import time
+
+sys.path.insert(0, '.')
+import fast_decode
+import standings_engine
+from api.standings.endpoints import CalculateStandingsRequest, _fast_calculate_body
+
+
+def make_body(rng: random.Random, n_matches: int) -> bytes:
+    teams = [{"id": i, "name": f"チーム{i:02d}", "groupId": "ABCDEF"[i % 6]} for i in range(24)]
+    matches = []
+    for k in range(n_matches):
+        home, away = rng.sample(range(24), 2)
+        matches.append({
+            "id": k,
+            "homeTeamId": home,
+            "awayTeamId": away,
+            "homeScore": rng.randint(0, 4),
+            "awayScore": rng.randint(0, 4),
+            "isBMatch": rng.random() < 0.15,
+            "matchDay": rng.randint(1, 3),
+            "groupId": "ABCDEF"[home % 6],
+            "status": "completed" if rng.random() < 0.95 else "scheduled",
+        })
+    return json.dumps({"tournamentId": 1, "teams": teams, "matches": matches}).encode("utf-8")
+
+
+def best_ms(fn, repeat: int = 7) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    n_matches = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    body = make_body(random.Random(42), n_matches)
+    print(f"1大会 × {n_matches}試合（本文 {len(body) / 1024:.0f} KiB）")
+
+    def decode_strict():
+        return CalculateStandingsRequest.model_validate(json.loads(body))
+
+    def decode_fast():
+        slim, arrays = _fast_calculate_body(fast_decode.loads(body))
+        return CalculateStandingsRequest.model_validate(fast_decode.loads(fast_decode.dumps(slim))), arrays
+
+    request, arrays = decode_fast()
+    normal = best_ms(decode_strict)
+    fast = best_ms(decode_fast)
+    compute = best_ms(lambda: standings_engine.calculate(request.teams, arrays))
+    print(f"  通常デコード: {normal:.1f} ms")
+    print(f"  高速デコード: {fast:.1f} ms（{normal / fast:.1f}倍）"
+          f"{'' if fast_decode.orjson else '  ※orjson なし（標準の json）'}")
+    print(f"  順位計算:     {compute:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
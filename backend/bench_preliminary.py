@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""予選リーグ日程生成（/generate-preliminary）のベンチマーク（合成データ）
+
+使い方:
+    python bench_preliminary.py [探索時間ms]
+
+チーム数 × 会場数（48×12 から 192×48 まで）ごとに次を表示する。
+- 最後の並べ替え: 以前のキー（試合ごとに会場リストを先頭から探す + 時刻の文字列）と
+  会場の並び順の表 + 整数の分のキーの比較
+- 生成全体: 探索なし（timeBudgetMs=0。貪欲法の初期解）と探索あり
+
+並べ替えの結果が以前のキーと一致することと探索の評価は test_preliminary_scheduler.py で確認する。
+"""
+
+import sys
+import time
+
+sys.path.insert(0, '.')
+from api.scheduling.endpoints import PreliminaryScheduleRequest, _generate_preliminary
+from time_slots import TimeSlots
+
+SIZES = [(48, 12), (96, 24), (192, 48)]
+TEAMS_PER_GROUP = 4
+
+
+def make_request(n_teams: int, n_venues: int, budget_ms: int) -> PreliminaryScheduleRequest:
+    teams = [
+        {"id": i + 1, "name": f"チーム{i + 1:03d}", "group": f"G{i // TEAMS_PER_GROUP + 1:02d}", "rank": 0}
+        for i in range(n_teams)
+    ]
+    venues = [{"id": 100 + v, "name": f"会場{v + 1}"} for v in range(n_venues)]
+    return PreliminaryScheduleRequest(
+        teams=teams, venues=venues, matchDate="2025-03-29", timeBudgetMs=budget_ms,
+    )
+
+
+def generate(request: PreliminaryScheduleRequest):
+    slots = TimeSlots.from_request(request.startTime, request.matchDuration, request.breakTime)
+    return _generate_preliminary(request, slots)
+
+
+def best_ms(fn, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    budget_ms = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    for n_teams, n_venues in SIZES:
+        greedy = make_request(n_teams, n_venues, 0)
+        matches, _ = generate(greedy)
+        venues = greedy.venues
+        print(f"{n_teams}チーム × {n_venues}会場（{len(matches)}試合）")
+
+        def legacy_sort():
+            sorted(matches, key=lambda m: (
+                next((i for i, v in enumerate(venues) if v["id"] == m["venueId"]), 0),
+                m["matchTime"]
+            ))
+
+        def ranked_sort():
+            venue_rank = {}
+            for i, venue in enumerate(venues):
+                venue_rank.setdefault(venue["id"], i)
+            minutes = [int(m["matchTime"][:2]) * 60 + int(m["matchTime"][3:]) for m in matches]
+            sorted(range(len(matches)), key=lambda k: (venue_rank[matches[k]["venueId"]], minutes[k]))
+
+        legacy = best_ms(legacy_sort)
+        ranked = best_ms(ranked_sort)
+        print(f"  並べ替え 以前:     {legacy:.2f} ms")
+        print(f"  並べ替え 会場の表: {ranked:.2f} ms（{legacy / ranked:.1f}倍）")
+
+        print(f"  生成（探索なし）:  {best_ms(lambda: generate(greedy)):.1f} ms")
+        searched = make_request(n_teams, n_venues, budget_ms)
+        started = time.perf_counter()
+        _, score = generate(searched)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"  生成（探索 {budget_ms}ms）: {elapsed:.1f} ms  {score.to_dict()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""順位計算のベンチマーク（合成データ: 複数大会・合計1万試合）
+
+使い方:
+    python bench_standings.py [試合数] [大会数]
+
+従来の dict を1試合ずつ更新する実装と standings_engine（NumPy）を比較する
+（結果が一致することは test_standings_engine.py で確認する）。
+NumPy 版は MatchResult から列配列に詰める時間を含む場合と、
+列配列（MatchArrays）を渡して集計・順位付けだけを行う場合を分けて計測する。
+従来の実装に直接対決はないので、比較は head_to_head=False で行い、
+直接対決ありの時間は別に表示する。
+"""
+
+import random
+import sys
+import time
+from collections import defaultdict
+from functools import partial
+
+sys.path.insert(0, '.')
+import standings_engine
+from standings_engine import MatchArrays
+from api.standings.endpoints import MatchResult
+
+
+def legacy_calculate(teams, matches, use_group_system, exclude_b_matches):
+    """従来の実装（比較用）"""
+    team_stats = {}
+    for team in teams:
+        team_id = team["id"]
+        team_stats[team_id] = {
+            "team_id": team_id,
+            "team_name": team.get("name", f"Team {team_id}"),
+            "group_id": team.get("groupId") or team.get("group_id"),
+            "played": 0, "won": 0, "drawn": 0, "lost": 0,
+            "goals_for": 0, "goals_against": 0, "goal_difference": 0, "points": 0,
+        }
+    for match in matches:
+        if exclude_b_matches and match.is_b_match:
+            continue
+        if match.status != "completed":
+            continue
+        home_id, away_id = match.home_team_id, match.away_team_id
+        hs, as_ = match.home_score, match.away_score
+        if home_id not in team_stats or away_id not in team_stats:
+            continue
+        home, away = team_stats[home_id], team_stats[away_id]
+        home["played"] += 1
+        home["goals_for"] += hs
+        home["goals_against"] += as_
+        away["played"] += 1
+        away["goals_for"] += as_
+        away["goals_against"] += hs
+        if hs > as_:
+            home["won"] += 1
+            home["points"] += 3
+            away["lost"] += 1
+        elif hs < as_:
+            away["won"] += 1
+            away["points"] += 3
+            home["lost"] += 1
+        else:
+            home["drawn"] += 1
+            home["points"] += 1
+            away["drawn"] += 1
+            away["points"] += 1
+    for stat in team_stats.values():
+        stat["goal_difference"] = stat["goals_for"] - stat["goals_against"]
+
+    def sort_key(stat):
+        return (-stat["points"], -stat["goal_difference"], -stat["goals_for"], stat["team_name"])
+
+    if not use_group_system:
+        result = []
+        for rank, stat in enumerate(sorted(team_stats.values(), key=sort_key), 1):
+            stat["rank"] = rank
+            stat["overall_rank"] = rank
+            result.append(stat)
+        return result
+
+    group_standings = defaultdict(list)
+    for stat in team_stats.values():
+        group_standings[stat["group_id"] or "unknown"].append(stat)
+    result = []
+    for group_id, group_stats in group_standings.items():
+        for rank, stat in enumerate(sorted(group_stats, key=sort_key), 1):
+            stat["rank"] = rank
+            stat["group_id"] = group_id
+            result.append(stat)
+    for overall_rank, stat in enumerate(sorted(team_stats.values(), key=sort_key), 1):
+        stat["overall_rank"] = overall_rank
+    return result
+
+
+def make_tournament(rng: random.Random, n_matches: int, base_id: int):
+    """24チーム・6グループの大会（B戦・未完了の試合を含む）"""
+    teams = [
+        {"id": base_id + i, "name": f"チーム{i:02d}", "groupId": "ABCDEF"[i % 6]}
+        for i in range(24)
+    ]
+    matches = []
+    for k in range(n_matches):
+        home, away = rng.sample(teams, 2)
+        matches.append(MatchResult(
+            id=base_id + k,
+            homeTeamId=home["id"],
+            awayTeamId=away["id"],
+            homeScore=rng.randint(0, 4),
+            awayScore=rng.randint(0, 4),
+            isBMatch=rng.random() < 0.15,
+            status="completed" if rng.random() < 0.95 else "scheduled",
+        ))
+    return teams, matches
+
+
+def best_ms(fn, tournaments, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for teams, matches in tournaments:
+            fn(teams, matches, True, True)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    rng = random.Random(42)
+    tournaments = [make_tournament(rng, total // count, t * 1000) for t in range(count)]
+
+    print(f"{count}大会 × {total // count}試合")
+    report(tournaments)
+
+    # 1大会に1万試合を詰めた場合
+    print(f"1大会 × {total}試合")
+    report([make_tournament(rng, total, 0)])
+
+
+def report(tournaments):
+    arrays = [(teams, MatchArrays.from_models(matches)) for teams, matches in tournaments]
+    plain = partial(standings_engine.calculate, head_to_head=False)
+    legacy = best_ms(legacy_calculate, tournaments)
+    engine = best_ms(plain, tournaments)
+    core = best_ms(plain, arrays)
+    h2h = best_ms(standings_engine.calculate, arrays)
+    print(f"  従来:                  {legacy:.1f} ms")
+    print(f"  NumPy（詰め替え込み）: {engine:.1f} ms（{legacy / engine:.1f}倍）")
+    print(f"  NumPy（集計・順位のみ）: {core:.1f} ms（{legacy / core:.1f}倍）")
+    print(f"  NumPy（直接対決あり）: {h2h:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
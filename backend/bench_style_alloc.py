@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""試合行1件あたりのメモリ確保数のマイクロベンチマーク（test_heavy_data.py のデータ）
+
+使い方:
+    python bench_style_alloc.py [回数]
+
+DailyReportGenerator._create_match_row で試合行を作り wrap するまでに、
+- 生成した表が保持し続けるブロック数・バイト数
+- 一時的な確保も含めたピークのバイト数
+を tracemalloc で数える。
+スタイルを試合ごとに組み立てた場合（以前の動作相当）と、
+StyleTemplates で共有した場合を比較する（共有しても同じPDFになることは test_pdf_styles.py で確認する）。
+"""
+
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, '.')
+from generate_daily_report_pdf import DailyReportGenerator, STYLES
+from reportlab.lib.units import mm
+from test_heavy_data import test_data
+
+MATCHES = [m for ms in test_data['matchData'].values() for m in ms]
+WIDTH = 190 * mm
+
+
+def build_rows(gen: DailyReportGenerator, runs: int, fresh: bool) -> list:
+    rows = []
+    for _ in range(runs):
+        for i, match in enumerate(MATCHES):
+            if fresh:
+                STYLES.clear()
+                gen.styles = STYLES.get(gen.font)
+            row = gen._create_match_row(match, i + 1)
+            row.wrap(WIDTH, 0xfffffff)
+            rows.append(row)
+    return rows
+
+
+def measure(runs: int, fresh: bool):
+    gen = DailyReportGenerator()
+    build_rows(gen, 1, fresh)  # ウォームアップ
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    rows = build_rows(gen, runs, fresh)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    count = len(rows)
+    blocks = sum(s.count_diff for s in stats) / count
+    kib = sum(s.size_diff for s in stats) / count / 1024
+    del rows
+
+    tracemalloc.start()
+    peak = 0
+    for i, match in enumerate(MATCHES):
+        if fresh:
+            STYLES.clear()
+            gen.styles = STYLES.get(gen.font)
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        gen._create_match_row(match, i + 1).wrap(WIDTH, 0xfffffff)
+        peak += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+    peak_kib = peak / len(MATCHES) / 1024
+
+    started = time.perf_counter()
+    build_rows(gen, runs, fresh)
+    ms = (time.perf_counter() - started) * 1000 / count
+    return blocks, kib, peak_kib, ms
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"{runs}回 × {len(MATCHES)}試合")
+    for label, fresh in (('試合ごとに組み立て', True), ('テンプレート共有', False)):
+        blocks, kib, peak_kib, ms = measure(runs, fresh)
+        print(f"{label}: 保持 {blocks:.0f} ブロック・{kib:.1f} KiB/試合, "
+              f"ピーク {peak_kib:.1f} KiB/試合, {ms:.3f} ms/試合")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""会場配置自動生成（/api/venue-assignments/auto-generate-with-data）のベンチマーク（合成データ）
+
+使い方:
+    python bench_venue_assignment.py [探索時間ms]
+
+チーム数 × 会場数（24×6 から 200×50 まで）ごとに次を表示する。
+- anchor_pod の会場間スワップ1回の評価: フロントエンド版と同じ手順（入れ替えた2会場の 4! 通りの並び +
+  配置全体の評価）と、ペアのコスト表 + 並びのパターン + 2会場分の差分
+- anchor_pod の生成全体: 探索なし（timeBudgetMs=0）と探索あり
+- region_dispersed の配置: 以前の手順（会場のチームを毎回 any / all で調べる）と
+  会場ごとの地域別のチーム数 + 空きの多い順のヒープ（_disperse_by_region）。地域の分布を変えて、
+  同じ地域のペア数（会場内）も比較する
+
+anchor_pod の差分評価が全ての並びの評価と一致することは test_anchor_pod.py、
+region_dispersed の配置（定員・重複・同じ地域のペア数）は test_venue_assignment.py で確認する。
+"""
+
+import random
+import sys
+import time
+from collections import defaultdict
+from itertools import permutations
+
+sys.path.insert(0, '.')
+from anchor_pod import AnchorPodOptimizer, PodTeam, compute_pod_plan, day1_banned_pairs
+from api.venues.endpoints import TeamForAssignment, _disperse_by_region
+
+SIZES = [(24, 6), (48, 12), (200, 50)]
+SWAPS = 2000
+
+
+def make_teams(n_teams: int, n_venues: int, seed: int = 1):
+    rng = random.Random(seed)
+    venue_ids = [100 + v for v in range(n_venues)]
+    teams = [
+        PodTeam(
+            id=i + 1,
+            league_id=rng.randrange(max(n_teams // 4, 1)),
+            region=f"地域{rng.randrange(8)}",
+            local=rng.random() < 0.3,
+            host_venue_id=venue_ids[i] if i < n_venues else None,
+        )
+        for i in range(n_teams)
+    ]
+    # Day1 はシャッフルして Pod の大きさに切ったもの
+    ids = [t.id for t in teams]
+    rng.shuffle(ids)
+    day1, start = [], 0
+    for size in compute_pod_plan(n_teams, n_venues):
+        day1.append(ids[start:start + size])
+        start += size
+    return teams, venue_ids, day1_banned_pairs(day1)
+
+
+# region_dispersed の地域の分布
+REGION_MIXES = ["混在", "3県だけ", "地域なし"]
+
+
+def make_region_teams(n_teams: int, mix: str, seed: int = 1):
+    rng = random.Random(seed)
+    if mix == "地域なし":
+        return [TeamForAssignment(id=i + 1, name=f"チーム{i + 1:03d}") for i in range(n_teams)]
+    if mix == "3県だけ":
+        return [
+            TeamForAssignment(id=i + 1, name=f"チーム{i + 1:03d}", prefecture=rng.choice(["埼玉", "東京", "千葉"]))
+            for i in range(n_teams)
+        ]
+    prefectures = ["埼玉", "東京", "千葉", "神奈川", "群馬", "栃木", "茨城", "静岡", "新潟", "長野"]
+    return [
+        TeamForAssignment(
+            id=i + 1, name=f"チーム{i + 1:03d}",
+            # 埼玉は地元なので多め。region がないチームは prefecture で分ける
+            prefecture=prefectures[0] if rng.random() < 0.3 else rng.choice(prefectures),
+            region=None if rng.random() < 0.5 else f"地区{rng.randrange(4)}",
+        )
+        for i in range(n_teams)
+    ]
+
+
+def legacy_disperse(teams, venue_count: int, teams_per_venue: int):
+    """以前の region_dispersed の配置（比較用にそのまま残したもの）"""
+    region_teams = defaultdict(list)
+    for team in teams:
+        region = team.region or team.prefecture or "unknown"
+        region_teams[region].append(team)
+
+    venue_assignments_list = [[] for _ in range(venue_count)]
+    regions = list(region_teams.keys())
+    random.shuffle(regions)
+    for region in regions:
+        random.shuffle(region_teams[region])
+
+    region_indices = {region: 0 for region in regions}
+    venue_idx = 0
+    teams_placed = 0
+    total_teams = len(teams)
+
+    while teams_placed < total_teams:
+        placed_this_round = False
+        for region in regions:
+            if region_indices[region] < len(region_teams[region]):
+                team = region_teams[region][region_indices[region]]
+                region_indices[region] += 1
+                attempts = 0
+                while attempts < venue_count:
+                    if len(venue_assignments_list[venue_idx]) < teams_per_venue:
+                        same_region_exists = any(
+                            (t.region or t.prefecture or "unknown") == (team.region or team.prefecture or "unknown")
+                            for t in venue_assignments_list[venue_idx]
+                        )
+                        if not same_region_exists or all(
+                            len(va) >= teams_per_venue or
+                            any((t.region or t.prefecture or "unknown") == (team.region or team.prefecture or "unknown")
+                                for t in va)
+                            for va in venue_assignments_list
+                        ):
+                            venue_assignments_list[venue_idx].append(team)
+                            teams_placed += 1
+                            placed_this_round = True
+                            break
+                    venue_idx = (venue_idx + 1) % venue_count
+                    attempts += 1
+                else:
+                    for va in venue_assignments_list:
+                        if len(va) < teams_per_venue:
+                            va.append(team)
+                            teams_placed += 1
+                            placed_this_round = True
+                            break
+                venue_idx = (venue_idx + 1) % venue_count
+        if not placed_this_round:
+            break
+    return venue_assignments_list
+
+
+def same_region_pairs(venue_assignments_list) -> int:
+    """会場内の同じ地域のペア数（少ないほど分散している）"""
+    total = 0
+    for va in venue_assignments_list:
+        counts = defaultdict(int)
+        for t in va:
+            counts[t.region or t.prefecture or "unknown"] += 1
+        total += sum(c * (c - 1) // 2 for c in counts.values())
+    return total
+
+
+def best_ms(fn, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def bench_region_dispersed():
+    for n_teams, n_venues in SIZES:
+        print(f"region_dispersed {n_teams}チーム × {n_venues}会場")
+        for mix in REGION_MIXES:
+            teams = make_region_teams(n_teams, mix)
+            results = {}
+            for label, fn in (("以前", legacy_disperse), ("ヒープ", _disperse_by_region)):
+                random.seed(0)
+                elapsed = best_ms(lambda: fn(teams, n_venues, 4), repeat=5)
+                pairs = []
+                for seed in range(20):
+                    random.seed(seed)
+                    pairs.append(same_region_pairs(fn(teams, n_venues, 4)))
+                results[label] = elapsed
+                print(f"  {mix:5} {label:3}: {elapsed:6.2f} ms  同じ地域のペア 平均{sum(pairs) / len(pairs):.1f} 最大{max(pairs)}")
+            print(f"  {mix:5} → {results['以前'] / results['ヒープ']:.1f}倍")
+
+
+def main():
+    budget_ms = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    bench_region_dispersed()
+    for n_teams, n_venues in SIZES:
+        teams, venue_ids, (banned_a, banned_b) = make_teams(n_teams, n_venues)
+        optimizer = AnchorPodOptimizer(
+            teams, venue_ids, banned_a_pairs=banned_a, banned_b_pairs=banned_b, time_budget_ms=0,
+        )
+        pods = optimizer._greedy()
+        rng = random.Random(0)
+        swaps = []
+        for _ in range(SWAPS):
+            v1, v2 = rng.sample(range(n_venues), 2)
+            swaps.append((v1, v2, rng.randrange(len(pods[v1])), rng.randrange(len(pods[v2]))))
+        print(f"{n_teams}チーム × {n_venues}会場")
+
+        def naive_order(pod):
+            # フロントエンド版: 全ての並びを評価
+            return min(
+                (list(order) for order in permutations(pod)),
+                key=lambda order: optimizer.score([order]).encode(),
+            )
+
+        def naive():
+            for v1, v2, t1, t2 in swaps:
+                trial = [list(p) for p in pods]
+                trial[v1][t1], trial[v2][t2] = trial[v2][t2], trial[v1][t1]
+                trial[v1], trial[v2] = naive_order(trial[v1]), naive_order(trial[v2])
+                optimizer.score(trial).encode()
+
+        def delta():
+            for v1, v2, t1, t2 in swaps:
+                new1, new2 = list(pods[v1]), list(pods[v2])
+                new1[t1], new2[t2] = pods[v2][t2], pods[v1][t1]
+                optimizer._best_order(new1)
+                optimizer._best_order(new2)
+
+        naive_ms = best_ms(naive, repeat=1)
+        delta_ms = best_ms(delta)
+        print(f"  スワップ{SWAPS}回 全体評価: {naive_ms:.1f} ms")
+        print(f"  スワップ{SWAPS}回 差分評価: {delta_ms:.1f} ms（{naive_ms / delta_ms:.0f}倍）")
+
+        for budget in (0, budget_ms):
+            started = time.perf_counter()
+            searched = AnchorPodOptimizer(
+                teams, venue_ids, banned_a_pairs=banned_a, banned_b_pairs=banned_b, time_budget_ms=budget,
+            )
+            _, score = searched.solve()
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"  生成（探索 {budget}ms）: {elapsed:.1f} ms  試行{searched.restarts}回  {score.to_dict()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+大きな試合リストを含むリクエスト本文の高速デコード（FAST_DECODE=1 で有効）
+
+通常の経路では FastAPI/Pydantic が試合1件ごとにモデル（MatchResult）や dict を組み立て、
+フィールドごとに別名を解決する。数千試合の本文ではこの検証が計算そのものより重くなるため、
+FAST_DECODE=1 のときは FastDecodeRoute が FastAPI より先に本文を見て
+- 本文を orjson（インストールされていなければ標準の json）で1回だけ解析し
+- エンドポイントに付けた前処理（fast_body）で試合リストを取り出す
+  （列ごとに値の型をまとめて確認して MatchArrays に直接詰める、など）
+- FastAPI には試合リストを空にした本文を渡し、残りの項目はエンドポイントの型どおりに検証させる
+- 型が想定どおりでない列がある（数値の文字列・キーの欠け・snake_case のキーなど）場合は
+  何もせず、通常の経路と同じく FastAPI が本文全体を検証する（422 のエラー内容も同じ）
+
+FAST_DECODE=0（既定）ではルートは FastAPI の通常のものそのまま。
+"""
+
+import email.message
+import json
+import os
+from itertools import repeat
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Type
+
+import numpy as np
+from fastapi import Request
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, ValidationError
+
+from standings_engine import MatchArrays
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson がなければ標準の json で解析する
+    orjson = None
+
+ENABLED = os.environ.get('FAST_DECODE', '0') == '1'
+
+# 試合の列: (キー, 許す型, 省略時の値)。省略時の値が _REQUIRED のキーは必須
+_REQUIRED = object()
+_INT_COLUMNS = ("homeTeamId", "awayTeamId", "homeScore", "awayScore")
+_OTHER_COLUMNS = (
+    ("id", {int}, _REQUIRED),
+    ("isBMatch", {bool}, False),
+    ("matchDay", {int, type(None)}, None),
+    ("groupId", {str, type(None)}, None),
+    ("status", {str}, "completed"),
+)
+
+# 前処理: 本文の dict → (FastAPI に渡す本文, エンドポイントに渡す値)。None なら通常の経路
+FastBody = Callable[[Dict[str, Any]], Optional[Tuple[Dict[str, Any], Any]]]
+
+
+def is_json(content_type: Optional[str]) -> bool:
+    """FastAPI と同じ判定: Content-Type がない、または application/json・application/*+json"""
+    if not content_type:
+        return True
+    message = email.message.Message()
+    message["content-type"] = content_type
+    if message.get_content_maintype() != "application":
+        return False
+    subtype = message.get_content_subtype()
+    return subtype == "json" or subtype.endswith("+json")
+
+
+def loads(body: bytes) -> Any:
+    """本文のJSONを解析（不正なJSONは ValueError）"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def valid(model: Type[BaseModel], payload: Any) -> bool:
+    """payload がモデルの検証を通るか（通らなければ前処理をやめて FastAPI にエラーを作らせる）"""
+    try:
+        model.model_validate(payload)
+    except ValidationError:
+        return False
+    return True
+
+
+def fast_body(prepare: FastBody):
+    """FAST_DECODE=1 のときの本文の前処理をエンドポイントに付ける（FastDecodeRoute が使う）"""
+    def attach(endpoint):
+        endpoint.fast_body = prepare
+        return endpoint
+    return attach
+
+
+def decoded(request: Request) -> Any:
+    """前処理で取り出した値（前処理をしなかったリクエストでは None）"""
+    return getattr(request.state, "fast_decoded", None)
+
+
+class _PreparedRequest(Request):
+    """前処理後の本文を返す Request（受信済みの本文は読み直さない）"""
+
+    def __init__(self, request: Request, body: bytes):
+        super().__init__(request.scope, request.receive)
+        self._prepared_body = body
+
+    async def body(self) -> bytes:
+        return self._prepared_body
+
+
+class FastDecodeRoute(APIRoute):
+    """fast_body を付けたエンドポイントだけ、FAST_DECODE=1 なら本文を先に前処理するルート
+
+    エンドポイントの引数は通常どおり型付きの本文モデルのまま（検証・422・OpenAPI は FastAPI のもの）。
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        prepare = getattr(self.endpoint, "fast_body", None)
+        if not ENABLED or prepare is None:
+            return handler
+
+        async def fast_handler(request: Request):
+            if is_json(request.headers.get("content-type")):
+                body = await request.body()
+                try:
+                    payload = loads(body) if body else None
+                except ValueError:
+                    payload = None  # エラーは FastAPI に作らせる
+                prepared = prepare(payload) if isinstance(payload, dict) else None
+                if prepared is not None:
+                    slim, value = prepared
+                    request.state.fast_decoded = value
+                    request = _PreparedRequest(request, dumps(slim))
+            return await handler(request)
+
+        return fast_handler
+
+
+def _column_types(values: Iterable[Any]) -> set:
+    return set(map(type, values))
+
+
+def dict_rows(rows: Any) -> bool:
+    """rows が dict だけのリストか（List[Dict[str, Any]] の検証を省けるか）"""
+    return type(rows) is list and _column_types(rows) <= {dict}
+
+
+def match_arrays(rows: Any) -> Optional[MatchArrays]:
+    """試合の dict のリストを列ごとに確認して MatchArrays に詰める
+
+    すべての値が MatchResult でそのまま通る型（変換なし）なら MatchArrays を返し、
+    そうでなければ None（呼び出し側で通常の検証をやり直す）。
+    """
+    if not dict_rows(rows):
+        return None
+    count = len(rows)
+    try:
+        ints = {}
+        for key in _INT_COLUMNS:
+            column = [row[key] for row in rows]
+            if not _column_types(column) <= {int}:
+                return None
+            ints[key] = np.array(column, dtype=np.int64) if count else np.zeros(0, dtype=np.int64)
+        others = {}
+        for key, types, default in _OTHER_COLUMNS:
+            if default is _REQUIRED:
+                column = [row[key] for row in rows]
+            else:
+                column = list(map(dict.get, rows, repeat(key), repeat(default)))
+            if not _column_types(column) <= types:
+                return None
+            others[key] = column
+    except (KeyError, OverflowError):
+        return None
+
+    return MatchArrays(
+        home_team_id=ints["homeTeamId"],
+        away_team_id=ints["awayTeamId"],
+        home_score=ints["homeScore"],
+        away_score=ints["awayScore"],
+        is_b_match=np.fromiter(others["isBMatch"], dtype=bool, count=count),
+        completed=np.fromiter((s == "completed" for s in others["status"]), dtype=bool, count=count),
+    )
@@ -5,16 +5,38 @@
 - 各チーム2試合
 - リーグ数を設定可能（4リーグ基本）
 - ダミーデータ生成機能
+- generate(time_budget_ms=...) で研修試合の多スタート探索（組み合わせと会場・時間の割り当てを
+  ランダムに変えて作り直し、TrainingScore が最良のものを返す。試行はプロセスプールで並列に実行）
+
+環境変数:
+  FINAL_DAY_SEARCH_WORKERS  多スタート探索のワーカープロセス数（デフォルト: CPU数と4の小さい方。1ならプロセス内で実行）
 """
 
+import os
 import random
-from dataclasses import dataclass
-from typing import List, Dict, Tuple, Optional
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from typing import List, Dict, Tuple, Optional, Set, Union
 from enum import Enum
 import json
 
+from preliminary_scheduler import PreliminaryScheduler
+from time_slots import TimeSlots, parse_time
+from training_pairing import pair_training_teams
+
+# 多スタート探索の1ミリ秒あたりの試行回数。試行回数を時間から決めるので、同じ seed なら同じ結果になる
+# （マシンが遅くて時間を超えたときはそこで打ち切る。打ち切った場合は同じ seed でも結果が変わりうる）
+RESTARTS_PER_MS = 0.25
+# 1試行で研修試合の会場・時間枠の割り当てを探索する時間（ミリ秒。preliminary_scheduler）
+ASSIGN_BUDGET_MS = 2
+
 
 class MatchType(Enum):
+    KNOCKOUT = "knockout"          # 準々決勝より前のラウンド（7グループ以上）
+    QUARTERFINAL = "quarterfinal"
     SEMIFINAL1 = "semifinal1"
     SEMIFINAL2 = "semifinal2"
     THIRD_PLACE = "third_place"
@@ -67,6 +89,19 @@ class Match:
         }
 
 
+@dataclass(frozen=True, order=True)
+class TrainingScore:
+    """研修試合の評価（辞書式。上の項目ほど優先し、すべて小さいほど良い）"""
+    conflicts: int = 0        # 同時刻重複（同じチームが同じ時刻に2試合）
+    rematches: int = 0        # 対戦済みペアの再戦
+    missing: int = 0          # matches_per_team に足りない試合数（全チームの合計）
+    venue_imbalance: int = 0  # 会場ごとの試合数の差（最多 - 最少）
+    consecutive: int = 0      # 連戦（同じチームが続く時間枠で試合）
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
 @dataclass
 class TournamentConfig:
     """大会設定"""
@@ -75,14 +110,19 @@ class TournamentConfig:
     training_venues: List[str] = None      # 研修試合会場
     tournament_venue: str = "駒場スタジアム"  # 決勝T会場
     kickoff_times: List[str] = None        # キックオフ時刻一覧
+    match_duration: int = 40               # 研修試合の試合時間（分。一覧を超えた枠の時刻と終了時刻の確認に使う）
     matches_per_team: int = 2              # 各チームの研修試合数
     bracket_method: str = "seed_order"     # 組み合わせ方式: 'diagonal' or 'seed_order'
+    wildcard_runners_up: int = 0           # 7グループ以上: 決勝Tに加える2位チーム数（成績上位から）
+    tournament_kickoffs: List[str] = None  # 7グループ以上: 決勝Tのラウンドごとのキックオフ（最後の2つは3位決定戦・決勝）
     
     def __post_init__(self):
         if self.training_venues is None:
             self.training_venues = []  # 呼び出し元からDB設定値を渡す（空の場合は研修試合を生成しない）
         if self.kickoff_times is None:
             self.kickoff_times = ["9:30", "10:35", "11:40", "12:45", "13:50"]
+        if self.tournament_kickoffs is None:
+            self.tournament_kickoffs = ["9:30", "11:00", "12:30", "14:00"]
     
     @property
     def group_names(self) -> List[str]:
@@ -103,16 +143,30 @@ class FinalDayGenerator:
         self.played_pairs = set((min(a, b), max(a, b)) for a, b in played_pairs)
         self.config = config or TournamentConfig()
         self.warnings: List[str] = []
+        # 決勝T進出チーム（研修試合から外す）
+        self.qualifier_ids: Set[int] = set()
     
     def is_played(self, team1_id: int, team2_id: int) -> bool:
         pair = (min(team1_id, team2_id), max(team1_id, team2_id))
         return pair in self.played_pairs
     
-    def generate(self) -> Dict:
+    def generate(self, time_budget_ms: int = 0, seed: Optional[int] = 0, workers: Optional[int] = None) -> Dict:
+        """
+        最終日の組み合わせを生成
+
+        time_budget_ms が 0 なら研修試合は決まった手順で1通りだけ作る。
+        正なら研修試合を time_budget_ms の間 多スタート探索し、結果に search（試行回数・最良の試行番号・評価）を加える。
+        時間切れで打ち切らなければ同じ seed なら同じ結果（None なら毎回変わる）。
+        workers は並列に試行するプロセス数（省略時は環境変数）。
+        """
         tournament_matches = self._generate_tournament()
-        training_matches = self._generate_training()
+        search = None
+        if time_budget_ms > 0:
+            training_matches, search = self._search_training(time_budget_ms, seed, workers)
+        else:
+            training_matches = self._generate_training()
         
-        return {
+        result = {
             "tournament": [m.to_dict() for m in tournament_matches],
             "training": [m.to_dict() for m in training_matches],
             "warnings": self.warnings,
@@ -122,6 +176,9 @@ class FinalDayGenerator:
                 "matches_per_team": self.config.matches_per_team,
             }
         }
+        if search is not None:
+            result["search"] = search
+        return result
     
     def _generate_tournament(self) -> List[Match]:
         """決勝トーナメント生成"""
@@ -323,10 +380,120 @@ class FinalDayGenerator:
             self.warnings.append(f"ℹ️ {num_groups}グループのため、1位の上位4チームで決勝Tを実施")
 
         else:
-            # 7グループ以上は未対応
-            self.warnings.append(f"⚠️ {num_groups}グループの決勝T生成は未実装（1-6グループに対応）")
+            # 7グループ以上: 1位（と2位の上位）を2の累乗の山に入れる
+            matches = self._generate_bracket()
+
+        return matches
 
+    def _generate_bracket(self) -> List[Match]:
+        """
+        7グループ以上の決勝トーナメント
+
+        - 進出: 各グループ1位 + 2位のうち成績上位 wildcard_runners_up チーム
+        - シード: 1位 → 2位 の順に、それぞれ勝点→得失点差→得点の順
+        - 山の大きさは進出チーム数以上の最小の2の累乗。足りない分はシード上位が1回戦不戦勝
+        - 1回戦はシード1 vs 最下位シード、2 vs 2番目に下… が決勝まで当たらない配置（標準的なシード配置）
+        - 2位チームが1回戦で同じグループの1位と当たる場合は、他の1回戦の相手と入れ替える
+        - キックオフはラウンドごとに tournament_kickoffs（足りなければ同じ間隔で続ける）
+        """
+        groups = [g for g in self.config.group_names if self.standings.get(g)]
+        strength = lambda t: (-t.points, -t.goal_diff, -t.goals_for)
+        winners = sorted((self.standings[g][0] for g in groups), key=strength)
+        runners_up = sorted(
+            (self.standings[g][1] for g in groups if len(self.standings[g]) > 1), key=strength
+        )[:max(self.config.wildcard_runners_up, 0)]
+        seeds = winners + runners_up
+        if len(seeds) < 2:
+            self.warnings.append("⚠️ 決勝T進出チームが2チーム未満のため決勝Tを生成できません")
+            return []
+        self.qualifier_ids = {t.team_id for t in seeds}
+
+        size = 1 << (len(seeds) - 1).bit_length()
+        order = [1]
+        while len(order) < size:
+            order = [x for s in order for x in (s, 2 * len(order) + 1 - s)]
+        # 山の位置ごとのチーム（None は不戦勝）
+        entries: List[Union[Team, str, None]] = [seeds[s - 1] if s <= len(seeds) else None for s in order]
+        self._separate_groups(entries)
+
+        kickoffs = TimeSlots.from_kickoffs(self.config.tournament_kickoffs, self.config.match_duration)
+        rounds = size.bit_length() - 1
+        matches = []
+        for r in range(rounds):
+            remaining = rounds - r
+            if remaining == 1:
+                label, prefix, match_type = "", "final-final", MatchType.FINAL
+            elif remaining == 2:
+                label, prefix, match_type = "SF", "final-sf", None
+            elif remaining == 3:
+                label, prefix, match_type = "QF", "final-qf", MatchType.QUARTERFINAL
+            else:
+                label, prefix, match_type = f"R{2 ** remaining}-", f"final-r{2 ** remaining}-", MatchType.KNOCKOUT
+            # 3位決定戦の前に準決勝、決勝は3位決定戦のあと
+            kickoff = kickoffs.time(r + 1 if remaining == 1 and rounds >= 2 else r, pad=False)
+
+            winners_next: List[Union[Team, str, None]] = []
+            number = 0
+            for i in range(0, len(entries), 2):
+                home, away = entries[i], entries[i + 1]
+                if home is None or away is None:
+                    # 不戦勝
+                    winners_next.append(away if home is None else home)
+                    continue
+                number += 1
+                if remaining == 2:
+                    match_type = MatchType.SEMIFINAL1 if number == 1 else MatchType.SEMIFINAL2
+                matches.append(Match(
+                    match_id=prefix if remaining == 1 else f"{prefix}{number}",
+                    match_type=match_type,
+                    venue=self.config.tournament_venue,
+                    kickoff=kickoff,
+                    home_team=home if isinstance(home, Team) else None,
+                    away_team=away if isinstance(away, Team) else None,
+                    home_seed=home if isinstance(home, str) else "",
+                    away_seed=away if isinstance(away, str) else "",
+                    referee="派遣",
+                ))
+                winners_next.append(f"{label}{number}勝者")
+            entries = winners_next
+
+        if rounds >= 2:
+            matches.append(Match(
+                match_id="final-3rd",
+                match_type=MatchType.THIRD_PLACE,
+                venue=self.config.tournament_venue,
+                kickoff=kickoffs.time(rounds - 1, pad=False),
+                home_seed="SF1敗者",
+                away_seed="SF2敗者",
+                referee="派遣",
+            ))
+            # 決勝を最後に
+            matches.append(matches.pop(-2))
+
+        byes = size - len(seeds)
+        self.warnings.append(
+            f"ℹ️ {self.config.num_groups}グループのため、{len(seeds)}チームで決勝Tを実施"
+            + (f"（シード上位{byes}チームは1回戦不戦勝）" if byes else "")
+        )
         return matches
+
+    @staticmethod
+    def _separate_groups(entries: List[Union[Team, str, None]]):
+        """1回戦で同じグループのチームが当たらないように、アウェイ側を他の1回戦のアウェイ側と入れ替える"""
+        def clash(i: int) -> bool:
+            home, away = entries[i], entries[i + 1]
+            return isinstance(home, Team) and isinstance(away, Team) and home.group == away.group
+
+        for i in range(0, len(entries), 2):
+            if not clash(i):
+                continue
+            for j in range(len(entries) - 2, -1, -2):
+                if j == i or not isinstance(entries[j + 1], Team):
+                    continue
+                entries[i + 1], entries[j + 1] = entries[j + 1], entries[i + 1]
+                if not clash(i) and not clash(j):
+                    break
+                entries[i + 1], entries[j + 1] = entries[j + 1], entries[i + 1]
     
     def _generate_training(self) -> List[Match]:
         """
@@ -340,7 +507,23 @@ class FinalDayGenerator:
             self.warnings.append("⚠️ 研修試合会場が設定されていません。会場を設定してから再生成してください。")
             return []
 
-        # 決勝T非参加チームを取得
+        training_teams = self._training_teams()
+        if not training_teams:
+            return []
+
+        # 対戦済み → 同グループ → 順位の差 の順に避けて、各チーム matches_per_team 試合ずつ組む
+        all_pairs, short = pair_training_teams(
+            training_teams, self.played_pairs, self.config.matches_per_team
+        )
+        self._warn_short(short)
+
+        # 会場・時間割り当て
+        matches = self._assign_venues(all_pairs)
+
+        return matches
+
+    def _training_teams(self) -> List[Team]:
+        """決勝T非参加チーム（研修試合に出るチーム）"""
         training_teams = []
         if self.config.num_groups == 1:
             # 1リーグ制: 5位以下が研修試合
@@ -348,207 +531,151 @@ class FinalDayGenerator:
                 if team.rank >= 5:
                     training_teams.append(team)
         else:
-            # 複数グループ: 2位以下が研修試合
+            # 複数グループ: 2位以下が研修試合（決勝Tに進んだ2位は除く）
             for group in self.config.group_names:
                 for team in self.standings[group]:
-                    if team.rank >= 2:
+                    if team.rank >= 2 and team.team_id not in self.qualifier_ids:
                         training_teams.append(team)
+        return training_teams
 
-        if not training_teams:
-            return []
-
-        # 各チームの試合カウント
-        match_count = {t.team_id: 0 for t in training_teams}
-
-        # 全ペアを生成
-        all_pairs = []
-
-        if self.config.num_groups == 1:
-            # 1リーグ制: 順位が近いチーム同士でペアリング
-            all_pairs.extend(self._create_single_league_pairs(training_teams, match_count))
-        else:
-            # 第1ラウンド: 同順位同士（A vs C, B vs D）
-            all_pairs.extend(self._create_round1_pairs(training_teams, match_count))
-
-            # 第2ラウンド: 同順位同士（A vs D, B vs C）クロス
-            all_pairs.extend(self._create_round2_pairs(training_teams, match_count))
-
-        # 会場・時間割り当て
-        matches = self._assign_venues(all_pairs)
+    def _warn_short(self, short: List[Team]):
+        for team in short:
+            self.warnings.append(
+                f"⚠️ {team.team_name}の研修試合が{self.config.matches_per_team}試合に届きません"
+            )
 
-        return matches
-    
-    def _create_single_league_pairs(
-        self,
-        teams: List[Team],
-        match_count: Dict[int, int]
-    ) -> List[Tuple[Team, Team]]:
-        """1リーグ制: 順位が近いチーム同士でペアリング（各チーム2試合）
+    # ------------------------------------------------------------------
+    # 多スタート探索（spec 4.2.2 と同じ考え方）
+    # ------------------------------------------------------------------
 
-        第1ラウンド: 5vs6, 7vs8, 9vs10, ...
-        第2ラウンド: 5vs7, 6vs8, 9vs11, ... (隣接ペアをクロス)
+    def _search_training(
+        self, time_budget_ms: int, seed: Optional[int], workers: Optional[int]
+    ) -> Tuple[List[Match], Optional[Dict]]:
         """
-        pairs = []
-        sorted_teams = sorted(teams, key=lambda t: t.rank)
-        n = len(sorted_teams)
-
-        # 第1ラウンド: 隣接ペア (5vs6, 7vs8, ...)
-        for i in range(0, n - 1, 2):
-            pair = self._try_pair(sorted_teams[i], sorted_teams[i + 1], match_count)
-            if pair:
-                pairs.append(pair)
-
-        # 第2ラウンド: 1つ飛ばしペア (5vs7, 6vs8, ...)
-        for i in range(0, n - 2, 2):
-            pair = self._try_pair(sorted_teams[i], sorted_teams[i + 2], match_count)
-            if pair:
-                pairs.append(pair)
-
-        # まだ2試合に達していないチームがいれば補完
-        remaining = [t for t in sorted_teams if match_count[t.team_id] < self.config.matches_per_team]
-        for i in range(len(remaining)):
-            for j in range(i + 1, len(remaining)):
-                if match_count[remaining[i].team_id] >= self.config.matches_per_team:
-                    break
-                pair = self._try_pair(remaining[i], remaining[j], match_count)
-                if pair:
-                    pairs.append(pair)
-
-        return pairs
-
-    def _create_round1_pairs(
-        self,
-        teams: List[Team],
-        match_count: Dict[int, int]
-    ) -> List[Tuple[Team, Team]]:
-        """第1ラウンド: 同順位で異グループのペア（クロス方式）"""
-        pairs = []
-        groups = self.config.group_names
-        num_groups = self.config.num_groups
-
-        for rank in range(2, self.config.teams_per_group + 1):
-            rank_teams = [t for t in teams if t.rank == rank]
-            teams_by_group = {t.group: t for t in rank_teams}
-
-            if num_groups == 2:
-                # 2グループ: A vs B
-                pair = self._try_pair(teams_by_group.get("A"), teams_by_group.get("B"), match_count)
-                if pair: pairs.append(pair)
-            elif num_groups == 3:
-                # 3グループ: A vs B, B vs C (ラウンドロビン前半)
-                pair1 = self._try_pair(teams_by_group.get("A"), teams_by_group.get("B"), match_count)
-                pair2 = self._try_pair(teams_by_group.get("B"), teams_by_group.get("C"), match_count)
-                if pair1: pairs.append(pair1)
-                if pair2: pairs.append(pair2)
-            elif num_groups == 4:
-                # 4グループ: A vs C, B vs D
-                pair1 = self._try_pair(teams_by_group.get("A"), teams_by_group.get("C"), match_count)
-                pair2 = self._try_pair(teams_by_group.get("B"), teams_by_group.get("D"), match_count)
-                if pair1: pairs.append(pair1)
-                if pair2: pairs.append(pair2)
-            elif num_groups == 5:
-                # 5グループ: A vs C, B vs D, E vs A（循環）
-                pair1 = self._try_pair(teams_by_group.get("A"), teams_by_group.get("C"), match_count)
-                pair2 = self._try_pair(teams_by_group.get("B"), teams_by_group.get("D"), match_count)
-                pair3 = self._try_pair(teams_by_group.get("E"), teams_by_group.get("A"), match_count)
-                if pair1: pairs.append(pair1)
-                if pair2: pairs.append(pair2)
-                if pair3: pairs.append(pair3)
-            elif num_groups == 6:
-                # 6グループ: A vs D, B vs E, C vs F
-                pair1 = self._try_pair(teams_by_group.get("A"), teams_by_group.get("D"), match_count)
-                pair2 = self._try_pair(teams_by_group.get("B"), teams_by_group.get("E"), match_count)
-                pair3 = self._try_pair(teams_by_group.get("C"), teams_by_group.get("F"), match_count)
-                if pair1: pairs.append(pair1)
-                if pair2: pairs.append(pair2)
-                if pair3: pairs.append(pair3)
-
-        return pairs
-
-    def _create_round2_pairs(
-        self,
-        teams: List[Team],
-        match_count: Dict[int, int]
-    ) -> List[Tuple[Team, Team]]:
-        """第2ラウンド: 同順位で異グループのペア（第1ラウンドとクロス）"""
-        pairs = []
-        groups = self.config.group_names
-        num_groups = self.config.num_groups
+        研修試合を何度も作り直して TrainingScore が最良のものを返す
+
+        - 予定の試行回数は time_budget_ms × RESTARTS_PER_MS。各試行の seed は seed から順に作るので、
+          ワーカー数によらず同じ seed なら同じ結果（同点なら試行番号の小さい方）
+        - ただし time_budget_ms を過ぎたら残りの試行はやめる（安全のための上限）。打ち切った場合は
+          どこまで試せたかがマシンの速さと負荷で変わるので、同じ seed でも結果が変わりうる
+        - search の restarts は実際に試した回数、planned は予定の回数、timed_out は打ち切ったかどうか
+        - 試行 0 は探索なしの generate() と同じ手順なので、結果がそれより悪くなることはない
+        - 試行 1 以降は組み合わせ（training_pairing に乱数を渡す）と会場・時間枠の割り当て
+          （preliminary_scheduler の焼きなまし）をランダムに変える
+        - 試行はワーカーに順番に配り、ワーカーは評価がすべて 0 の解が見つかったらそこでやめる
+        """
+        if not self.config.training_venues:
+            self.warnings.append("⚠️ 研修試合会場が設定されていません。会場を設定してから再生成してください。")
+            return [], None
+        teams = self._training_teams()
+        if not teams:
+            return [], None
+
+        rng = random.Random(seed)
+        count = max(int(time_budget_ms * RESTARTS_PER_MS), 1)
+        restarts = [(i, rng.getrandbits(32)) for i in range(count)]
+        deadline = time.time() + time_budget_ms / 1000
+        workers = min(search_workers() if workers is None else workers, count)
+
+        results = None
+        if workers > 1:
+            pool = _get_search_pool()
+            try:
+                futures = [
+                    pool.submit(_run_restarts, self, teams, restarts[w::workers], deadline)
+                    for w in range(workers)
+                ]
+                results = [f.result() for f in futures]
+            except BrokenProcessPool:
+                # ワーカーが異常終了した場合はプロセス内で試行する（プールは次回作り直す）
+                _reset_search_pool(pool)
+        if results is None:
+            results = [_run_restarts(self, teams, restarts, deadline)]
+
+        score, index, pairs, cells, short = min((best for best, _, _ in results), key=lambda r: r[:2])
+        self._warn_short(short)
+        return self._assign_venues(pairs, cells), {
+            "restarts": sum(tried for _, tried, _ in results),
+            "planned": count,
+            "timed_out": any(timed_out for _, _, timed_out in results),
+            "best_restart": index,
+            "score": score.to_dict(),
+        }
 
-        for rank in range(2, self.config.teams_per_group + 1):
-            rank_teams = [t for t in teams if t.rank == rank]
-            teams_by_group = {t.group: t for t in rank_teams}
-
-            if num_groups == 2:
-                # 2グループ: 第2ラウンドなし（1試合のみ）
-                pass
-            elif num_groups == 3:
-                # 3グループ: A vs C (ラウンドロビン後半)
-                pair = self._try_pair(teams_by_group.get("A"), teams_by_group.get("C"), match_count)
-                if pair: pairs.append(pair)
-            elif num_groups == 4:
-                # 4グループ: A vs D, B vs C（第1ラウンドとクロス）
-                pair1 = self._try_pair(teams_by_group.get("A"), teams_by_group.get("D"), match_count)
-                pair2 = self._try_pair(teams_by_group.get("B"), teams_by_group.get("C"), match_count)
-                if pair1: pairs.append(pair1)
-                if pair2: pairs.append(pair2)
-            elif num_groups == 5:
-                # 5グループ: B vs E, C vs A, D vs E（クロス）
-                pair1 = self._try_pair(teams_by_group.get("B"), teams_by_group.get("E"), match_count)
-                pair2 = self._try_pair(teams_by_group.get("C"), teams_by_group.get("E"), match_count)
-                pair3 = self._try_pair(teams_by_group.get("D"), teams_by_group.get("A"), match_count)
-                if pair1: pairs.append(pair1)
-                if pair2: pairs.append(pair2)
-                if pair3: pairs.append(pair3)
-            elif num_groups == 6:
-                # 6グループ: A vs E, B vs F, C vs D（クロス）
-                pair1 = self._try_pair(teams_by_group.get("A"), teams_by_group.get("E"), match_count)
-                pair2 = self._try_pair(teams_by_group.get("B"), teams_by_group.get("F"), match_count)
-                pair3 = self._try_pair(teams_by_group.get("C"), teams_by_group.get("D"), match_count)
-                if pair1: pairs.append(pair1)
-                if pair2: pairs.append(pair2)
-                if pair3: pairs.append(pair3)
-
-        return pairs
-    
-    def _try_pair(
-        self, 
-        home: Optional[Team], 
-        away: Optional[Team], 
-        match_count: Dict[int, int]
-    ) -> Optional[Tuple[Team, Team]]:
-        """ペアを作成（対戦済みチェック付き）"""
-        if not home or not away:
-            return None
-        
-        # 試合数上限チェック
-        if match_count[home.team_id] >= self.config.matches_per_team:
-            return None
-        if match_count[away.team_id] >= self.config.matches_per_team:
-            return None
-        
-        match_count[home.team_id] += 1
-        match_count[away.team_id] += 1
-        
-        return (home, away)
-    
-    def _assign_venues(self, pairs: List[Tuple[Team, Team]]) -> List[Match]:
-        """会場と時間を均等に割り当て"""
+    def _restart(self, teams: List[Team], index: int, seed: int):
+        """1回分の試行。(評価, 試行番号, ペア, [(会場インデックス, 時間枠)], 試合数が足りないチーム) を返す"""
+        k = self.config.matches_per_team
+        if index == 0:
+            pairs, short = pair_training_teams(teams, self.played_pairs, k)
+            cells = self._round_robin_cells(pairs)
+        else:
+            rng = random.Random(seed)
+            pairs, short = pair_training_teams(teams, self.played_pairs, k, rng)
+            scheduler = PreliminaryScheduler(
+                [(home.team_id, away.team_id) for home, away in pairs],
+                len(self.config.training_venues),
+                time_budget_ms=ASSIGN_BUDGET_MS,
+                seed=rng.getrandbits(32),
+            )
+            cells, _ = scheduler.solve()
+        return self._score_training(teams, pairs, cells), index, pairs, cells, short
+
+    def _score_training(
+        self, teams: List[Team], pairs: List[Tuple[Team, Team]], cells: List[Tuple[int, int]]
+    ) -> TrainingScore:
+        team_slots: Dict[int, List[int]] = {t.team_id: [] for t in teams}
+        venue_matches = [0] * len(self.config.training_venues)
+        for (home, away), (venue_idx, slot) in zip(pairs, cells):
+            team_slots[home.team_id].append(slot)
+            team_slots[away.team_id].append(slot)
+            venue_matches[venue_idx] += 1
+
+        conflicts = consecutive = 0
+        for slots in team_slots.values():
+            slots.sort()
+            for a, b in zip(slots, slots[1:]):
+                conflicts += a == b
+                consecutive += b - a == 1
+        return TrainingScore(
+            conflicts=conflicts,
+            rematches=sum(self.is_played(home.team_id, away.team_id) for home, away in pairs),
+            missing=sum(max(self.config.matches_per_team - len(s), 0) for s in team_slots.values()),
+            venue_imbalance=max(venue_matches) - min(venue_matches),
+            consecutive=consecutive,
+        )
+
+    def _round_robin_cells(self, pairs: List[Tuple[Team, Team]]) -> List[Tuple[int, int]]:
+        """会場を順番に回し、その会場の何試合目かを時間枠にする"""
+        num_venues = len(self.config.training_venues)
+        venue_count = [0] * num_venues
+        cells = []
+        for i in range(len(pairs)):
+            venue_idx = i % num_venues
+            cells.append((venue_idx, venue_count[venue_idx]))
+            venue_count[venue_idx] += 1
+        return cells
+    
+    def _assign_venues(
+        self, pairs: List[Tuple[Team, Team]], cells: Optional[List[Tuple[int, int]]] = None
+    ) -> List[Match]:
+        """会場と時間を割り当て（cells を省略すると会場を順番に回して均等に）"""
         matches = []
         venues = self.config.training_venues
-        num_venues = len(venues)
+        if cells is None:
+            cells = self._round_robin_cells(pairs)
         
-        venue_count = {v: 0 for v in venues}
+        # 一覧を超えた枠は最後の時刻から同じ間隔で続ける
+        slots = TimeSlots.from_kickoffs(self.config.kickoff_times, self.config.match_duration)
+        last_slot = -1
         
-        for i, (home, away) in enumerate(pairs):
-            venue_idx = i % num_venues
+        for i, ((home, away), (venue_idx, time_idx)) in enumerate(zip(pairs, cells)):
             venue = venues[venue_idx]
-            time_idx = venue_count[venue]
             
             if time_idx < len(self.config.kickoff_times):
                 kickoff = self.config.kickoff_times[time_idx]
             else:
-                kickoff = f"{14 + (time_idx - 4)}:00"  # 延長時間
+                kickoff = slots.time(time_idx, pad=False)  # 延長時間
+            last_slot = max(last_slot, time_idx)
             
             warning = ""
             if self.is_played(home.team_id, away.team_id):
@@ -565,22 +692,80 @@ class FinalDayGenerator:
                 warning=warning,
             )
             
-            venue_count[venue] += 1
             matches.append(match)
         
-        # 会場→時間順にソート（時間は文字列比較でOK: "9:30" < "10:35"にならないので変換）
+        if last_slot >= 0 and not slots.fits(last_slot):
+            self.warnings.append(
+                f"⚠️ 研修試合が1日に収まりません（最後のキックオフ {slots.time(last_slot, pad=False)}）"
+            )
+        
+        # 会場→時間順にソート（時間は文字列比較だと "9:30" < "10:35" にならないので分に変換）
         def sort_key(match):
-            venue_idx = venues.index(match.venue)
-            # 時間を分に変換
-            h, mins = match.kickoff.split(":")
-            total_minutes = int(h) * 60 + int(mins)
-            return (venue_idx, total_minutes)
+            return (venues.index(match.venue), parse_time(match.kickoff))
         
         matches.sort(key=sort_key)
         
         return matches
 
 
+# =============================================================================
+# 多スタート探索のプロセスプール
+# =============================================================================
+
+_search_pool: Optional[ProcessPoolExecutor] = None
+_search_pool_lock = threading.Lock()
+
+
+def search_workers() -> int:
+    return max(1, int(os.environ.get('FINAL_DAY_SEARCH_WORKERS', min(4, os.cpu_count() or 1))))
+
+
+def _get_search_pool() -> ProcessPoolExecutor:
+    # 初回利用時に起動（サーバー起動を遅くしない）
+    global _search_pool
+    with _search_pool_lock:
+        if _search_pool is None:
+            _search_pool = ProcessPoolExecutor(max_workers=search_workers())
+        return _search_pool
+
+
+def _reset_search_pool(broken: ProcessPoolExecutor):
+    global _search_pool
+    with _search_pool_lock:
+        if _search_pool is broken:
+            _search_pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_search_pool():
+    global _search_pool
+    with _search_pool_lock:
+        pool, _search_pool = _search_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_restarts(generator: FinalDayGenerator, teams: List[Team], restarts: List[Tuple[int, int]], deadline: float):
+    """restarts（(試行番号, seed) の昇順）を順に試し、(最良の試行, 試した回数, 時間切れで打ち切ったか) を返す
+    （picklable なトップレベル関数）
+
+    評価がすべて 0 になったらやめる。試行番号の昇順に試すので、そこでやめても最良の試行は変わらない。
+    deadline を過ぎたら残りはやめる（最低1回は試す）。こちらは最良の試行が変わりうる。
+    """
+    best = None
+    tried = 0
+    for index, seed in restarts:
+        if best is not None and time.time() > deadline:
+            return best, tried, True
+        candidate = generator._restart(teams, index, seed)
+        tried += 1
+        if best is None or candidate[:2] < best[:2]:
+            best = candidate
+        if best[0] == TrainingScore():
+            break
+    return best, tried, False
+
+
 # =============================================================================
 # ダミーデータ生成
 # =============================================================================
@@ -11,6 +11,9 @@
 
 import json
 import sys
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, Callable, Union
 from pathlib import Path
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
@@ -20,52 +23,185 @@ from reportlab.platypus import (
     SimpleDocTemplate, Table, TableStyle, Paragraph, 
     Spacer, PageBreak, KeepTogether, KeepInFrame
 )
-from pdf_utils import register_japanese_font
+from reportlab.platypus.flowables import _listWrapOn, _FUZZ
+from pdf_utils import get_font, StyleTemplates
 
-FONT = register_japanese_font()
+
+class PlannedKeepInFrame(KeepInFrame):
+    """事前に見積もった縮小率で1回だけレイアウトする KeepInFrame(mode='shrink')
+
+    KeepInFrame の shrink は、収まる縮小率を探すために内容全体を何度も wrap し直す。
+    内容の高さを事前に見積もれる場合は、その縮小率で1回だけ wrap して描画する
+    （描画は KeepInFrame と同じ等倍縮小なので見た目は変わらない）。
+    見積もりが外れて収まらなかった場合は通常の探索にフォールバックする。
+
+    estimate: 実際の枠の幅を受け取り、縮小前の内容の高さを返す関数
+    """
+
+    def __init__(self, maxWidth, maxHeight, content, estimate):
+        super().__init__(maxWidth, maxHeight, content, mode='shrink')
+        self.estimate = estimate
+
+    def wrap(self, availWidth, availHeight):
+        maxWidth = float(min(self.maxWidth or availWidth, availWidth))
+        maxHeight = float(min(self.maxHeight or availHeight, availHeight))
+        scale = max(1.0, self.estimate(maxWidth) / maxHeight)
+        W, H = _listWrapOn(self._content, scale * maxWidth, self.canv, fakeWidth=self.fakeWidth)
+        W /= scale
+        H /= scale
+        if W <= maxWidth + _FUZZ and H <= maxHeight + _FUZZ:
+            self.width = W - _FUZZ
+            self.height = H - _FUZZ
+            if scale != 1.0:
+                self._scale = scale
+            else:
+                self.__dict__.pop('_scale', None)
+            return self.width, self.height
+        self.__dict__.pop('_scale', None)
+        return super().wrap(availWidth, availHeight)
+
+
+def _build_styles(font: str) -> dict:
+    """フォントごとに1回だけ組み立てるスタイル（全試合・全リクエストで共有）"""
+    return {
+        'title': ParagraphStyle(
+            name='Title', fontName=font, fontSize=14,
+            alignment=1, spaceAfter=6
+        ),
+        'subtitle': ParagraphStyle(
+            name='SubTitle', fontName=font, fontSize=11,
+            alignment=1, spaceAfter=4
+        ),
+        'header': ParagraphStyle(
+            name='Header', fontName=font, fontSize=10,
+            alignment=0
+        ),
+        'venue': ParagraphStyle(
+            name='Venue', fontName=font, fontSize=11,
+            spaceBefore=6, spaceAfter=4
+        ),
+        'match_title': ParagraphStyle(
+            name='MatchTitle', fontName=font, fontSize=10,
+            alignment=1, spaceBefore=8, spaceAfter=4
+        ),
+        'normal': ParagraphStyle(
+            name='Normal', fontName=font, fontSize=9
+        ),
+        'small': ParagraphStyle(
+            name='Small', fontName=font, fontSize=8
+        ),
+        # 発信情報
+        'header_table': TableStyle([
+            ('FONT', (0, 0), (-1, -1), font, 9),
+            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+            ('ALIGN', (3, 0), (3, -1), 'RIGHT'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('TOPPADDING', (0, 0), (-1, -1), 0),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+        ]),
+        # 会場名の下の区切り線
+        'venue_rule': TableStyle([
+            ('LINEBELOW', (0, 0), (-1, -1), 1, colors.black)
+        ]),
+        # 試合間の仕切り線
+        'divider': TableStyle([
+            ('LINEBELOW', (0, 0), (-1, -1), 0.5, colors.Color(0.7, 0.7, 0.7))
+        ]),
+        # 試合結果
+        'result': TableStyle([
+            ('FONT', (0, 0), (-1, -1), font, 10),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            # 第N試合行
+            ('SPAN', (0, 0), (1, 0)),
+            ('SPAN', (2, 0), (4, 0)),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.Color(0.93, 0.93, 0.93)),
+            ('FONT', (0, 0), (1, 0), font, 10),
+            ('FONT', (2, 0), (4, 0), font, 9),
+            ('ALIGN', (2, 0), (4, 0), 'RIGHT'),
+            # チーム名行
+            ('SPAN', (0, 1), (1, 1)),
+            ('SPAN', (3, 1), (4, 1)),
+            ('FONT', (0, 1), (-1, 1), font, 11),
+            # スコア行
+            ('FONT', (0, 3), (0, 4), font, 18),
+            ('FONT', (4, 3), (4, 4), font, 18),
+            ('SPAN', (0, 3), (0, 4)),
+            ('SPAN', (4, 3), (4, 4)),
+            ('SPAN', (1, 3), (3, 3)),
+            ('SPAN', (1, 4), (3, 4)),
+            ('BOX', (0, 3), (0, 4), 1, colors.black),
+            ('BOX', (4, 3), (4, 4), 1, colors.black),
+        ]),
+        # 得点経過（2列）
+        'goals': TableStyle([
+            ('FONT', (0, 0), (-1, -1), font, 7),
+            ('ALIGN', (0, 0), (0, -1), 'CENTER'),
+            ('ALIGN', (3, 0), (3, -1), 'CENTER'),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.Color(0.9, 0.9, 0.9)),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.Color(0.8, 0.8, 0.8)),
+            ('TOPPADDING', (0, 0), (-1, -1), 1),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+            ('LEFTPADDING', (0, 0), (-1, -1), 1),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 1),
+            # 左右列の区切り
+            ('LINEAFTER', (2, 0), (2, -1), 1, colors.Color(0.5, 0.5, 0.5)),
+        ]),
+        # 得点なし
+        'no_goals': TableStyle([
+            ('FONT', (0, 0), (-1, -1), font, 9),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('TEXTCOLOR', (0, 1), (-1, -1), colors.Color(0.5, 0.5, 0.5)),
+        ]),
+        # 試合結果 + 得点経過の横並び
+        'match_row': TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (1, 0), (1, 0), 4),
+        ]),
+    }
+
+
+STYLES = StyleTemplates(_build_styles)
+
+
+# レイアウト計画用の高さキャッシュ（件数上限付きLRU）
+# キーは (フォント, 'match', 得点者行数)・(フォント, 'divider')・(フォント, 'header', 会場名, 幅)。
+# 試合行と仕切り線はフォントと行数だけで決まるが、ヘッダーは会場名ごとに増えるので件数で制限する
+_PLAN_HEIGHTS_MAX = 1024
+_PLAN_HEIGHTS: "OrderedDict[tuple, float]" = OrderedDict()
+_PLAN_HEIGHTS_LOCK = threading.Lock()
+
+
+def _plan_height(key: tuple, measure: Callable[[], float]) -> float:
+    """キャッシュした高さを返す（なければ measure() で計測して登録）"""
+    with _PLAN_HEIGHTS_LOCK:
+        height = _PLAN_HEIGHTS.get(key)
+        if height is not None:
+            _PLAN_HEIGHTS.move_to_end(key)
+            return height
+    height = measure()
+    with _PLAN_HEIGHTS_LOCK:
+        _PLAN_HEIGHTS[key] = height
+        if len(_PLAN_HEIGHTS) > _PLAN_HEIGHTS_MAX:
+            _PLAN_HEIGHTS.popitem(last=False)
+    return height
 
 
 class DailyReportGenerator:
     """日次報告書PDF生成"""
+
+    # レイアウトを変更したら上げる（PDFキャッシュのキーに含まれる）
+    version = '1'
     
     def __init__(self, config: dict = None):
         self.config = config or {}
-        self.styles = self._create_styles()
-    
-    def _create_styles(self):
-        return {
-            'title': ParagraphStyle(
-                name='Title', fontName=FONT, fontSize=14, 
-                alignment=1, spaceAfter=6
-            ),
-            'subtitle': ParagraphStyle(
-                name='SubTitle', fontName=FONT, fontSize=11, 
-                alignment=1, spaceAfter=4
-            ),
-            'header': ParagraphStyle(
-                name='Header', fontName=FONT, fontSize=10, 
-                alignment=0
-            ),
-            'venue': ParagraphStyle(
-                name='Venue', fontName=FONT, fontSize=11, 
-                spaceBefore=6, spaceAfter=4
-            ),
-            'match_title': ParagraphStyle(
-                name='MatchTitle', fontName=FONT, fontSize=10,
-                alignment=1, spaceBefore=8, spaceAfter=4
-            ),
-            'normal': ParagraphStyle(
-                name='Normal', fontName=FONT, fontSize=9
-            ),
-            'small': ParagraphStyle(
-                name='Small', fontName=FONT, fontSize=8
-            ),
-        }
+        self.font = get_font()
+        self.styles = STYLES.get(self.font)
     
-    def generate(self, data: dict, output_path: str):
-        """PDF生成"""
+    def generate(self, data: dict, output: Union[str, BinaryIO]):
+        """PDF生成（output: ファイルパスまたはバイナリのファイルライクオブジェクト）"""
         doc = SimpleDocTemplate(
-            output_path,
+            output,
             pagesize=A4,
             topMargin=8*mm,
             bottomMargin=8*mm,
@@ -106,7 +242,9 @@ class DailyReportGenerator:
                 story.append(PageBreak())
         
         doc.build(story)
-        print(f"[OK] PDF生成完了: {output_path}")
+        if isinstance(output, str):
+            print(f"[OK] PDF生成完了: {output}")
+        return output
     
     def _create_venue_page(
         self, venue: str, matches: list,
@@ -116,7 +254,7 @@ class DailyReportGenerator:
     ) -> list:
         """会場ごとのページ内容を生成"""
         content = []
-        
+
         # ヘッダー
         content.append(Paragraph(
             "第45回 浦和カップ高校サッカーフェスティバル",
@@ -135,26 +273,18 @@ class DailyReportGenerator:
             ['', '', '', '', f'{date_str}　第{day}日'],
         ]
         header_table = Table(header_data, colWidths=[18*mm, 50*mm, 10*mm, 18*mm, 90*mm])
-        header_table.setStyle(TableStyle([
-            ('FONT', (0, 0), (-1, -1), FONT, 9),
-            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-            ('ALIGN', (3, 0), (3, -1), 'RIGHT'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('TOPPADDING', (0, 0), (-1, -1), 0),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-        ]))
+        header_table.setStyle(self.styles['header_table'])
         content.append(header_table)
         content.append(Spacer(1, 2*mm))
 
         # 会場名 + 区切り線
         content.append(Paragraph(f"大会会場：　{venue}", self.styles['venue']))
         line = Table([['']], colWidths=[190*mm])
-        line.setStyle(TableStyle([
-            ('LINEBELOW', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        line.setStyle(self.styles['venue_rule'])
         content.append(line)
         content.append(Spacer(1, 3*mm))
-        
+        header = list(content)
+
         # 各試合
         for idx, match in enumerate(matches):
             match_content = self._create_match_row(match, idx + 1)
@@ -164,14 +294,39 @@ class DailyReportGenerator:
             # 試合間の仕切り線
             if idx < len(matches) - 1:
                 divider = Table([['']], colWidths=[190*mm])
-                divider.setStyle(TableStyle([
-                    ('LINEBELOW', (0, 0), (-1, -1), 0.5, colors.Color(0.7, 0.7, 0.7))
-                ]))
+                divider.setStyle(self.styles['divider'])
                 content.append(divider)
                 content.append(Spacer(1, 1*mm))
         
         # Shrink the entire venue section to fit a single page if needed.
-        return [KeepInFrame(max_width, max_height, content, mode='shrink')]
+        # 縮小率はレイアウト前に見積もり、KeepInFrame の再レイアウト探索を避ける
+        def estimate(width: float) -> float:
+            return self._header_height(venue, header, width) + self._matches_height(matches, width)
+
+        return [PlannedKeepInFrame(max_width, max_height, content, estimate)]
+
+    def _header_height(self, venue: str, header: list, width: float) -> float:
+        """ヘッダー部分（タイトル〜会場名の区切り線）の高さ"""
+        return _plan_height(
+            (self.font, 'header', venue, width), lambda: _listWrapOn(header, width, None)[1]
+        )
+
+    def _matches_height(self, matches: list, width: float) -> float:
+        """試合行（得点者の行数で高さが決まる）と仕切り線の高さの合計"""
+        total = 0.0
+        for idx, match in enumerate(matches):
+            scorer_rows = (len(match.get('scorers', [])) + 1) // 2
+            proto = {'scorers': [{'time': '0', 'team': '-', 'name': '-'}] * (scorer_rows * 2)}
+            total += _plan_height(
+                (self.font, 'match', scorer_rows),
+                lambda: self._create_match_row(proto, 1).wrap(width, 0xfffffff)[1],
+            ) + 1*mm
+            if idx < len(matches) - 1:
+                total += _plan_height(
+                    (self.font, 'divider'),
+                    lambda: Table([['']], colWidths=[190*mm]).wrap(width, 0xfffffff)[1],
+                ) + 1*mm
+        return total
     
     def _create_match_row(self, match: dict, match_num: int) -> Table:
         """試合結果 + 得点経過を横並びで生成"""
@@ -206,31 +361,7 @@ class DailyReportGenerator:
         ]
         
         result_table = Table(result_data, colWidths=[22*mm, 30*mm, 12*mm, 5*mm, 22*mm])
-        result_table.setStyle(TableStyle([
-            ('FONT', (0, 0), (-1, -1), FONT, 10),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            # 第N試合行
-            ('SPAN', (0, 0), (1, 0)),
-            ('SPAN', (2, 0), (4, 0)),
-            ('BACKGROUND', (0, 0), (-1, 0), colors.Color(0.93, 0.93, 0.93)),
-            ('FONT', (0, 0), (1, 0), FONT, 10),
-            ('FONT', (2, 0), (4, 0), FONT, 9),
-            ('ALIGN', (2, 0), (4, 0), 'RIGHT'),
-            # チーム名行
-            ('SPAN', (0, 1), (1, 1)),
-            ('SPAN', (3, 1), (4, 1)),
-            ('FONT', (0, 1), (-1, 1), FONT, 11),
-            # スコア行
-            ('FONT', (0, 3), (0, 4), FONT, 18),
-            ('FONT', (4, 3), (4, 4), FONT, 18),
-            ('SPAN', (0, 3), (0, 4)),
-            ('SPAN', (4, 3), (4, 4)),
-            ('SPAN', (1, 3), (3, 3)),
-            ('SPAN', (1, 4), (3, 4)),
-            ('BOX', (0, 3), (0, 4), 1, colors.black),
-            ('BOX', (4, 3), (4, 4), 1, colors.black),
-        ]))
+        result_table.setStyle(self.styles['result'])
         
         # 右側：得点経過（2列表示で全員表示）
         if scorers:
@@ -266,42 +397,38 @@ class DailyReportGenerator:
                 goal_data.append(row)
 
             goal_table = Table(goal_data, colWidths=[8*mm, 20*mm, 18*mm, 8*mm, 20*mm, 18*mm])
-            goal_table.setStyle(TableStyle([
-                ('FONT', (0, 0), (-1, -1), FONT, 7),
-                ('ALIGN', (0, 0), (0, -1), 'CENTER'),
-                ('ALIGN', (3, 0), (3, -1), 'CENTER'),
-                ('BACKGROUND', (0, 0), (-1, 0), colors.Color(0.9, 0.9, 0.9)),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.Color(0.8, 0.8, 0.8)),
-                ('TOPPADDING', (0, 0), (-1, -1), 1),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
-                ('LEFTPADDING', (0, 0), (-1, -1), 1),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 1),
-                # 左右列の区切り
-                ('LINEAFTER', (2, 0), (2, -1), 1, colors.Color(0.5, 0.5, 0.5)),
-            ]))
+            goal_table.setStyle(self.styles['goals'])
         else:
             # 得点なし
             goal_data = [['得点経過'], ['（得点なし）']]
             goal_table = Table(goal_data, colWidths=[92*mm])
-            goal_table.setStyle(TableStyle([
-                ('FONT', (0, 0), (-1, -1), FONT, 9),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.Color(0.5, 0.5, 0.5)),
-            ]))
+            goal_table.setStyle(self.styles['no_goals'])
 
         # 左右を結合
         combined = Table(
             [[result_table, goal_table]],
             colWidths=[95*mm, 95*mm]
         )
-        combined.setStyle(TableStyle([
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (1, 0), (1, 0), 4),
-        ]))
+        combined.setStyle(self.styles['match_row'])
         
         return combined
 
 
+def split_by_venue(data: dict) -> list:
+    """会場ごとに1ページ分の入力データへ分割（並列生成用）
+
+    各会場のページは PageBreak と KeepInFrame で独立しているため、
+    会場単位で生成して結合しても一括生成と同じ内容になる。
+    """
+    match_data = data.get('matchData', {})
+    parts = []
+    for venue, matches in match_data.items():
+        if not matches:
+            continue
+        parts.append((venue, {**data, 'matchData': {venue: matches}}))
+    return parts
+
+
 def load_json(filepath: str) -> dict:
     """JSONファイルを読み込み"""
     with open(filepath, 'r', encoding='utf-8') as f:
@@ -11,6 +11,7 @@
 
 import json
 import sys
+from typing import BinaryIO, Union
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
@@ -19,44 +20,109 @@ from reportlab.platypus import (
     SimpleDocTemplate, Table, TableStyle, Paragraph, 
     Spacer, KeepTogether
 )
-from pdf_utils import register_japanese_font
+from pdf_utils import get_font, StyleTemplates
 
-FONT = register_japanese_font()
+HEADER_BG = colors.Color(0.2, 0.3, 0.5)
+
+
+def _build_styles(font: str) -> dict:
+    """フォントごとに1回だけ組み立てるスタイル（全リクエストで共有）"""
+    return {
+        'title': ParagraphStyle(
+            name='Title', fontName=font, fontSize=16,
+            alignment=1, spaceAfter=8
+        ),
+        'subtitle': ParagraphStyle(
+            name='SubTitle', fontName=font, fontSize=12,
+            alignment=1, spaceAfter=6
+        ),
+        'section': ParagraphStyle(
+            name='Section', fontName=font, fontSize=11,
+            spaceBefore=12, spaceAfter=6
+        ),
+        'normal': ParagraphStyle(
+            name='Normal', fontName=font, fontSize=9
+        ),
+        'small': ParagraphStyle(
+            name='Small', fontName=font, fontSize=8
+        ),
+        'header_table': TableStyle([
+            ('FONT', (0, 0), (-1, -1), font, 9),
+            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+            ('TEXTCOLOR', (0, 0), (0, -1), colors.grey),
+        ]),
+        'ranking': TableStyle([
+            ('FONT', (0, 0), (-1, -1), font, 12),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('BACKGROUND', (0, 0), (-1, 0), HEADER_BG),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ]),
+        'tournament': TableStyle([
+            ('FONT', (0, 0), (-1, -1), font, 9),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('BACKGROUND', (0, 0), (-1, 0), HEADER_BG),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('TOPPADDING', (0, 0), (-1, -1), 5),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+        ]),
+        'players': TableStyle([
+            ('FONT', (0, 0), (-1, -1), font, 9),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('ALIGN', (1, 1), (1, -1), 'LEFT'),
+            ('ALIGN', (2, 1), (2, -1), 'LEFT'),
+            ('BACKGROUND', (0, 0), (-1, 0), HEADER_BG),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('TOPPADDING', (0, 0), (-1, -1), 4),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+        ]),
+        'training': TableStyle([
+            ('FONT', (0, 0), (-1, -1), font, 7),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.Color(0.6, 0.2, 0.2)),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('BACKGROUND', (0, 1), (0, -1), colors.Color(0.95, 0.95, 0.95)),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('TOPPADDING', (0, 0), (-1, -1), 3),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+            ('LEFTPADDING', (1, 1), (-1, -1), 2),
+            ('RIGHTPADDING', (1, 1), (-1, -1), 2),
+        ]),
+    }
+
+
+STYLES = StyleTemplates(_build_styles)
+
+# 行ごとの差分スタイル
+MEDAL_ROWS = [
+    TableStyle([('BACKGROUND', (0, 1), (-1, 1), colors.Color(1, 0.85, 0.4))]),  # 金
+    TableStyle([('BACKGROUND', (0, 2), (-1, 2), colors.Color(0.85, 0.85, 0.85))]),  # 銀
+    TableStyle([('BACKGROUND', (0, 3), (-1, 3), colors.Color(0.8, 0.5, 0.2))]),  # 銅
+]
+FINAL_ROW = TableStyle([('BACKGROUND', (0, -1), (-1, -1), colors.Color(1, 0.95, 0.8))])
+MVP_ROW = TableStyle([('BACKGROUND', (0, 1), (-1, 1), colors.Color(1, 0.9, 0.7))])
 
 
 class FinalResultPDFGenerator:
     """最終結果報告書PDF生成"""
+
+    # レイアウトを変更したら上げる（PDFキャッシュのキーに含まれる）
+    version = '1'
     
     def __init__(self, config: dict = None):
         self.config = config or {}
-        self.styles = self._create_styles()
-    
-    def _create_styles(self):
-        return {
-            'title': ParagraphStyle(
-                name='Title', fontName=FONT, fontSize=16, 
-                alignment=1, spaceAfter=8
-            ),
-            'subtitle': ParagraphStyle(
-                name='SubTitle', fontName=FONT, fontSize=12, 
-                alignment=1, spaceAfter=6
-            ),
-            'section': ParagraphStyle(
-                name='Section', fontName=FONT, fontSize=11, 
-                spaceBefore=12, spaceAfter=6
-            ),
-            'normal': ParagraphStyle(
-                name='Normal', fontName=FONT, fontSize=9
-            ),
-            'small': ParagraphStyle(
-                name='Small', fontName=FONT, fontSize=8
-            ),
-        }
+        self.font = get_font()
+        self.styles = STYLES.get(self.font)
     
-    def generate(self, data: dict, output_path: str):
-        """PDF生成"""
+    def generate(self, data: dict, output: Union[str, BinaryIO]):
+        """PDF生成（output: ファイルパスまたはバイナリのファイルライクオブジェクト）"""
         doc = SimpleDocTemplate(
-            output_path,
+            output,
             pagesize=A4,
             topMargin=15*mm,
             bottomMargin=15*mm,
@@ -84,11 +150,7 @@ class FinalResultPDFGenerator:
             ['発信元', config.get('sender', '（未設定）')],
         ]
         header_table = Table(header_data, colWidths=[25*mm, 80*mm])
-        header_table.setStyle(TableStyle([
-            ('FONT', (0, 0), (-1, -1), FONT, 9),
-            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.grey),
-        ]))
+        header_table.setStyle(self.styles['header_table'])
         story.append(header_table)
         story.append(Spacer(1, 8*mm))
         
@@ -112,7 +174,9 @@ class FinalResultPDFGenerator:
         story.extend(self._create_training_summary(data.get('training', [])))
         
         doc.build(story)
-        print(f"✓ PDF生成完了: {output_path}")
+        if isinstance(output, str):
+            print(f"✓ PDF生成完了: {output}")
+        return output
     
     def _create_ranking_table(self, ranking: list) -> list:
         """最終順位表"""
@@ -127,25 +191,11 @@ class FinalResultPDFGenerator:
         
         table = Table(data, colWidths=[30*mm, 70*mm])
         
-        style = [
-            ('FONT', (0, 0), (-1, -1), FONT, 12),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('BACKGROUND', (0, 0), (-1, 0), colors.Color(0.2, 0.3, 0.5)),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]
-        
+        table.setStyle(self.styles['ranking'])
+
         # 順位別の背景色
-        if len(data) > 1:
-            style.append(('BACKGROUND', (0, 1), (-1, 1), colors.Color(1, 0.85, 0.4)))  # 金
-        if len(data) > 2:
-            style.append(('BACKGROUND', (0, 2), (-1, 2), colors.Color(0.85, 0.85, 0.85)))  # 銀
-        if len(data) > 3:
-            style.append(('BACKGROUND', (0, 3), (-1, 3), colors.Color(0.8, 0.5, 0.2)))  # 銅
-        
-        table.setStyle(TableStyle(style))
+        for medal in MEDAL_ROWS[:len(data) - 1]:
+            table.setStyle(medal)
         return [table]
     
     def _create_tournament_table(self, matches: list) -> list:
@@ -162,21 +212,11 @@ class FinalResultPDFGenerator:
         
         table = Table(data, colWidths=[30*mm, 45*mm, 35*mm, 45*mm])
         
-        style = [
-            ('FONT', (0, 0), (-1, -1), FONT, 9),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('BACKGROUND', (0, 0), (-1, 0), colors.Color(0.2, 0.3, 0.5)),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('TOPPADDING', (0, 0), (-1, -1), 5),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-        ]
-        
+        table.setStyle(self.styles['tournament'])
+
         # 決勝をハイライト
         if len(data) > 4:
-            style.append(('BACKGROUND', (0, -1), (-1, -1), colors.Color(1, 0.95, 0.8)))
-        
-        table.setStyle(TableStyle(style))
+            table.setStyle(FINAL_ROW)
         return [table]
     
     def _create_players_table(self, players: list) -> list:
@@ -194,23 +234,11 @@ class FinalResultPDFGenerator:
         
         table = Table(data, colWidths=[30*mm, 50*mm, 50*mm])
         
-        style = [
-            ('FONT', (0, 0), (-1, -1), FONT, 9),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('ALIGN', (1, 1), (1, -1), 'LEFT'),
-            ('ALIGN', (2, 1), (2, -1), 'LEFT'),
-            ('BACKGROUND', (0, 0), (-1, 0), colors.Color(0.2, 0.3, 0.5)),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('TOPPADDING', (0, 0), (-1, -1), 4),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ]
-        
+        table.setStyle(self.styles['players'])
+
         # MVPをハイライト
         if len(data) > 1 and players[0].get('type') == '最優秀選手':
-            style.append(('BACKGROUND', (0, 1), (-1, 1), colors.Color(1, 0.9, 0.7)))
-        
-        table.setStyle(TableStyle(style))
+            table.setStyle(MVP_ROW)
         return [table]
     
     def _create_training_summary(self, training: list) -> list:
@@ -256,21 +284,7 @@ class FinalResultPDFGenerator:
         col_width = 42*mm
         table = Table(data, colWidths=[12*mm, col_width, col_width, col_width, col_width])
         
-        style = [
-            ('FONT', (0, 0), (-1, -1), FONT, 7),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BACKGROUND', (0, 0), (-1, 0), colors.Color(0.6, 0.2, 0.2)),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('BACKGROUND', (0, 1), (0, -1), colors.Color(0.95, 0.95, 0.95)),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('TOPPADDING', (0, 0), (-1, -1), 3),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-            ('LEFTPADDING', (1, 1), (-1, -1), 2),
-            ('RIGHTPADDING', (1, 1), (-1, -1), 2),
-        ]
-        
-        table.setStyle(TableStyle(style))
+        table.setStyle(self.styles['training'])
         content.append(table)
         
         return content
@@ -20,25 +20,67 @@
 
 import json
 import sys
+from typing import BinaryIO, Union
 from pathlib import Path
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.styles import ParagraphStyle
-from pdf_utils import register_japanese_font
-
-FONT = register_japanese_font()
+from pdf_utils import get_font, StyleTemplates
 
 HEADERS = ['順位', 'チーム', '試合', '勝', '分', '負', '得点', '失点', '得失', '勝点']
 
+# A4幅(210mm - 30mm margins = 180mm = 510pt)にぴったり合わせる
+COL_WIDTHS = [30, 190, 35, 32, 32, 32, 38, 38, 40, 43]  # 合計510
+
+# 上位4チーム（row 1-4）の薄黄ハイライト（行数ごとの差分スタイル）
+HIGHLIGHT_ROWS = 4
+HIGHLIGHTS = [
+    TableStyle([('BACKGROUND', (0, 1), (-1, rows), colors.HexColor('#FEF3C7'))])
+    for rows in range(1, HIGHLIGHT_ROWS + 1)
+]
+
+
+def _build_styles(font: str) -> dict:
+    """フォントごとに1回だけ組み立てるスタイル（全グループ・全リクエストで共有）"""
+    return {
+        'title': ParagraphStyle(
+            'Title', fontName=font, fontSize=16, spaceAfter=10, alignment=1
+        ),
+        'group': ParagraphStyle(
+            'Group', fontName=font, fontSize=12, spaceAfter=4, spaceBefore=8
+        ),
+        'table': TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), font),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('FONTSIZE', (0, 0), (-1, 0), 8),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2B6CB0')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('ALIGN', (1, 1), (1, -1), 'LEFT'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('TOPPADDING', (0, 0), (-1, -1), 3),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+        ]),
+    }
+
+
+STYLES = StyleTemplates(_build_styles)
+
 
 class StandingsPDFGenerator:
     """順位表PDF生成"""
 
-    def generate(self, data: dict, output_path: str):
+    # レイアウトを変更したら上げる（PDFキャッシュのキーに含まれる）
+    version = '1'
+
+    def generate(self, data: dict, output: Union[str, BinaryIO]):
+        styles = STYLES.get(get_font())
         doc = SimpleDocTemplate(
-            output_path,
+            output,
             pagesize=A4,
             leftMargin=15 * mm,
             rightMargin=15 * mm,
@@ -48,22 +90,15 @@ class StandingsPDFGenerator:
 
         elements = []
 
-        title_style = ParagraphStyle(
-            'Title', fontName=FONT, fontSize=16, spaceAfter=10, alignment=1
-        )
-        group_style = ParagraphStyle(
-            'Group', fontName=FONT, fontSize=12, spaceAfter=4, spaceBefore=8
-        )
-
         title = data.get('title', '成績表')
-        elements.append(Paragraph(title, title_style))
+        elements.append(Paragraph(title, styles['title']))
         elements.append(Spacer(1, 5 * mm))
 
         groups = data.get('groups', [])
         for group in groups:
             group_name = group.get('groupName', '')
             if group_name:
-                elements.append(Paragraph(group_name, group_style))
+                elements.append(Paragraph(group_name, styles['group']))
 
             standings = group.get('standings', [])
             table_data = [HEADERS]
@@ -81,36 +116,16 @@ class StandingsPDFGenerator:
                     s.get('points', 0),
                 ])
 
-            # A4幅(210mm - 30mm margins = 180mm = 510pt)にぴったり合わせる
-            col_widths = [30, 190, 35, 32, 32, 32, 38, 38, 40, 43]  # 合計510
-            table = Table(table_data, colWidths=col_widths, hAlign='CENTER')
-
-            # 上位4チームの行をハイライト
-            style_cmds = [
-                ('FONTNAME', (0, 0), (-1, -1), FONT),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('FONTSIZE', (0, 0), (-1, 0), 8),
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2B6CB0')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('ALIGN', (1, 1), (1, -1), 'LEFT'),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('TOPPADDING', (0, 0), (-1, -1), 3),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-            ]
+            table = Table(table_data, colWidths=COL_WIDTHS, hAlign='CENTER')
+            table.setStyle(styles['table'])
             # 上位4チーム（row 1-4）に薄黄ハイライト
-            for row_idx in range(1, min(5, len(table_data))):
-                style_cmds.append(('BACKGROUND', (0, row_idx), (-1, row_idx), colors.HexColor('#FEF3C7')))
-                style_cmds.append(('FONTNAME', (0, row_idx), (-1, row_idx), FONT))
-
-            table.setStyle(TableStyle(style_cmds))
+            if standings:
+                table.setStyle(HIGHLIGHTS[min(HIGHLIGHT_ROWS, len(standings)) - 1])
             elements.append(table)
             elements.append(Spacer(1, 5 * mm))
 
         doc.build(elements)
-        return output_path
+        return output
 
 
 def create_sample_data():
@@ -6,116 +6,41 @@
 {
   "title": "第45回浦和カップ 成績表",
   "teams": [{"id": 1, "shortName": "浦和南"}, ...],
-  "matches": [{"homeTeamId": 1, "awayTeamId": 2, "homeScore": 2, "awayScore": 1}, ...]
+  "matches": [{"homeTeamId": 1, "awayTeamId": 2, "homeScore": 2, "awayScore": 1}, ...],
+  "layout": "auto"   // 省略可: "single"（1枚の表）/ "tiled"（ページ分割）/ "auto"
 }
+
+チーム数が多い場合（auto では 24 チーム超）は、マトリクスをページに収まるブロックに
+分割し、各ブロックに行・列の見出しを付けて1ページずつ出力する。
 """
 
 import json
+import math
 import sys
+from typing import BinaryIO, Union
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib.units import mm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.lib.styles import ParagraphStyle
-from pdf_utils import register_japanese_font
-
-FONT = register_japanese_font()
-
-
-class StarTablePDFGenerator:
-    """星取表PDF生成（A4横向き）"""
-
-    def generate(self, data: dict, output_path: str):
-        doc = SimpleDocTemplate(
-            output_path,
-            pagesize=landscape(A4),
-            leftMargin=10 * mm,
-            rightMargin=10 * mm,
-            topMargin=10 * mm,
-            bottomMargin=10 * mm,
-        )
+from pdf_utils import get_font, StyleTemplates
 
-        elements = []
 
-        title_style = ParagraphStyle(
-            'Title', fontName=FONT, fontSize=14, spaceAfter=6, alignment=1
-        )
-        note_style = ParagraphStyle(
-            'Note', fontName=FONT, fontSize=7, spaceAfter=4, alignment=1,
+def _build_styles(font: str) -> dict:
+    """フォントごとに1回だけ組み立てるスタイル（全リクエストで共有）"""
+    return {
+        'title': ParagraphStyle(
+            'Title', fontName=font, fontSize=14, spaceAfter=6, alignment=1
+        ),
+        'note': ParagraphStyle(
+            'Note', fontName=font, fontSize=7, spaceAfter=4, alignment=1,
             textColor=colors.grey,
-        )
-
-        title = data.get('title', '成績表')
-        elements.append(Paragraph(title, title_style))
-        elements.append(Paragraph('○勝　△分　●負', note_style))
-
-        teams = data.get('teams', [])
-        matches = data.get('matches', [])
-        n = len(teams)
-
-        if n == 0:
-            elements.append(Paragraph('データがありません', note_style))
-            doc.build(elements)
-            return output_path
-
-        # チームIDからインデックスへのマップ
-        id_to_idx = {t['id']: i for i, t in enumerate(teams)}
-
-        # 対戦マトリクス構築
-        matrix = [['' for _ in range(n)] for _ in range(n)]
-        for m in matches:
-            h_id = m.get('homeTeamId')
-            a_id = m.get('awayTeamId')
-            hs = m.get('homeScore')
-            a_s = m.get('awayScore')
-            if h_id is None or a_id is None or hs is None or a_s is None:
-                continue
-            hi = id_to_idx.get(h_id)
-            ai = id_to_idx.get(a_id)
-            if hi is None or ai is None:
-                continue
-
-            # ホーム視点
-            if hs > a_s:
-                matrix[hi][ai] = f'○{hs}-{a_s}'
-            elif hs == a_s:
-                matrix[hi][ai] = f'△{hs}-{a_s}'
-            else:
-                matrix[hi][ai] = f'●{hs}-{a_s}'
-
-            # アウェイ視点
-            if a_s > hs:
-                matrix[ai][hi] = f'○{a_s}-{hs}'
-            elif a_s == hs:
-                matrix[ai][hi] = f'△{a_s}-{hs}'
-            else:
-                matrix[ai][hi] = f'●{a_s}-{hs}'
-
-        # テーブルデータ構築
-        # ヘッダー行: No., チーム, 1, 2, 3, ...
-        header = ['', 'チーム'] + [str(i + 1) for i in range(n)]
-        table_data = [header]
-
-        for i, team in enumerate(teams):
-            row = [str(i + 1), team.get('shortName', '')]
-            for j in range(n):
-                if i == j:
-                    row.append('-')
-                else:
-                    row.append(matrix[i][j])
-            table_data.append(row)
-
-        # 列幅計算（A4横: 841.89pt - 56.7pt margins ≈ 785pt）
-        available = 785
-        rank_w = 18
-        name_w = 72
-        cell_w = (available - rank_w - name_w) / n
-        col_widths = [rank_w, name_w] + [cell_w] * n
-
-        table = Table(table_data, colWidths=col_widths, hAlign='CENTER')
-
-        style_cmds = [
-            ('FONTNAME', (0, 0), (-1, -1), FONT),
+        ),
+        'legend': ParagraphStyle(
+            'Legend', fontName=font, fontSize=6, leading=8,
+        ),
+        'table': TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), font),
             ('FONTSIZE', (0, 0), (-1, -1), 7),
             ('FONTSIZE', (0, 0), (-1, 0), 6),   # ヘッダー行
             ('FONTSIZE', (0, 1), (0, -1), 6),    # No.列
@@ -135,22 +60,140 @@ class StarTablePDFGenerator:
             ('LEFTPADDING', (1, 1), (1, -1), 3),  # チーム名に少し余白
             ('ROWBACKGROUNDS', (0, 1), (-1, -1),
              [colors.white, colors.HexColor('#f8f8f8')]),
-        ]
+        ]),
+    }
+
+
+STYLES = StyleTemplates(_build_styles)
+
+DIAGONAL = colors.HexColor('#d9d9d9')
+
+# 列幅計算（A4横: 841.89pt - 56.7pt margins ≈ 785pt）
+AVAILABLE_WIDTH = 785
+RANK_WIDTH = 18
+NAME_WIDTH = 72
+
+# auto でこのチーム数を超えたらページ分割
+SINGLE_MAX_TEAMS = 24
+# 分割時の1ブロックの最大行数・列数（A4横1ページに収まる大きさ）
+TILE_ROWS = 28
+TILE_COLS = 20
+
+
+class DiagonalFill:
+    """対角線セル（自チーム）だけを塗る BACKGROUND の描画関数
+
+    セルごとに BACKGROUND コマンドを積むとチーム数に比例してスタイルが増えるため、
+    ブロック全体に1つだけ指定し、描画時に対角セルの位置を計算して塗る。
+    row_start / col_start はブロック左上のチームのインデックス。
+    """
+
+    def __init__(self, row_start: int, col_start: int, color=DIAGONAL):
+        self.row_start = row_start
+        self.col_start = col_start
+        self.color = color
+
+    def __call__(self, table, canv, x0, y0, w, h):
+        cols = table._colpositions
+        rows = table._rowpositions
+        canv.setFillColor(self.color)
+        # 表の行 r（1〜, 0はヘッダー）は チーム row_start + r - 1、列 c（2〜）は col_start + c - 2
+        for r in range(1, table._nrows):
+            c = self.row_start - self.col_start + r + 1
+            if 2 <= c < table._ncols:
+                canv.rect(cols[c], rows[r], cols[c + 1] - cols[c], rows[r + 1] - rows[r],
+                          stroke=0, fill=1)
+
+
+def _result_mark(gf, ga) -> str:
+    if gf > ga:
+        return f'○{gf}-{ga}'
+    if gf == ga:
+        return f'△{gf}-{ga}'
+    return f'●{gf}-{ga}'
+
+
+def build_result_index(teams: list, matches: list) -> dict:
+    """対戦結果の索引 {(行チーム, 列チーム): '○2-1'}（試合のあるセルだけを持つ）"""
+    id_to_idx = {t['id']: i for i, t in enumerate(teams)}
+    results = {}
+    for m in matches:
+        hs = m.get('homeScore')
+        a_s = m.get('awayScore')
+        if hs is None or a_s is None:
+            continue
+        hi = id_to_idx.get(m.get('homeTeamId'))
+        ai = id_to_idx.get(m.get('awayTeamId'))
+        if hi is None or ai is None:
+            continue
+        results[hi, ai] = _result_mark(hs, a_s)  # ホーム視点
+        results[ai, hi] = _result_mark(a_s, hs)  # アウェイ視点
+    return results
+
+
+def _blocks(n: int, size: int) -> list:
+    """0..n を最大 size ずつ、なるべく均等な区間に分ける"""
+    count = math.ceil(n / size)
+    step = math.ceil(n / count)
+    return [range(start, min(start + step, n)) for start in range(0, n, step)]
+
+
+class StarTablePDFGenerator:
+    """星取表PDF生成（A4横向き）"""
+
+    # レイアウトを変更したら上げる（PDFキャッシュのキーに含まれる）
+    version = '2'
+
+    def generate(self, data: dict, output: Union[str, BinaryIO]):
+        styles = STYLES.get(get_font())
+        doc = SimpleDocTemplate(
+            output,
+            pagesize=landscape(A4),
+            leftMargin=10 * mm,
+            rightMargin=10 * mm,
+            topMargin=10 * mm,
+            bottomMargin=10 * mm,
+        )
+
+        elements = []
 
-        # 対角線セル（自チーム）をグレーに
-        for i in range(n):
-            r = i + 1  # ヘッダー行分オフセット
-            c = i + 2  # No.+チーム名分オフセット
-            style_cmds.append(('BACKGROUND', (c, r), (c, r), colors.HexColor('#d9d9d9')))
+        title = data.get('title', '成績表')
+        elements.append(Paragraph(title, styles['title']))
+        elements.append(Paragraph('○勝　△分　●負', styles['note']))
+
+        teams = data.get('teams', [])
+        matches = data.get('matches', [])
+        n = len(teams)
 
-        table.setStyle(TableStyle(style_cmds))
-        elements.append(table)
+        if n == 0:
+            elements.append(Paragraph('データがありません', styles['note']))
+            doc.build(elements)
+            return output
+
+        results = build_result_index(teams, matches)
+
+        layout = data.get('layout', 'auto')
+        if layout == 'tiled' or (layout == 'auto' and n > SINGLE_MAX_TEAMS):
+            row_blocks = _blocks(n, TILE_ROWS)
+            col_blocks = _blocks(n, TILE_COLS)
+            tiles = [(rows, cols) for rows in row_blocks for cols in col_blocks]
+        else:
+            tiles = [(range(n), range(n))]
+
+        for k, (rows, cols) in enumerate(tiles):
+            if len(tiles) > 1:
+                if k > 0:
+                    elements.append(PageBreak())
+                    elements.append(Paragraph(title, styles['title']))
+                elements.append(Paragraph(
+                    f'{rows.start + 1}〜{rows.stop}番 × {cols.start + 1}〜{cols.stop}番'
+                    f'（{k + 1}/{len(tiles)}）',
+                    styles['note']
+                ))
+            elements.append(self._tile_table(teams, results, rows, cols, styles))
 
         # 凡例（チーム番号対応）
         elements.append(Spacer(1, 3 * mm))
-        legend_style = ParagraphStyle(
-            'Legend', fontName=FONT, fontSize=6, leading=8,
-        )
         # 4列×6行で番号対応を表示
         lines = []
         for i in range(0, n, 6):
@@ -158,10 +201,30 @@ class StarTablePDFGenerator:
             for j in range(i, min(i + 6, n)):
                 chunk.append(f'{j+1}:{teams[j].get("shortName", "")}')
             lines.append('　　'.join(chunk))
-        elements.append(Paragraph('<br/>'.join(lines), legend_style))
+        elements.append(Paragraph('<br/>'.join(lines), styles['legend']))
 
         doc.build(elements)
-        return output_path
+        return output
+
+    def _tile_table(self, teams: list, results: dict, rows: range, cols: range, styles) -> Table:
+        """マトリクスの1ブロック（行・列の見出し付き）"""
+        # ヘッダー行: No., チーム, 列チームの番号
+        table_data = [['', 'チーム'] + [str(j + 1) for j in cols]]
+        for i in rows:
+            row = [str(i + 1), teams[i].get('shortName', '')]
+            row.extend('-' if i == j else results.get((i, j), '') for j in cols)
+            table_data.append(row)
+
+        cell_w = (AVAILABLE_WIDTH - RANK_WIDTH - NAME_WIDTH) / len(cols)
+        col_widths = [RANK_WIDTH, NAME_WIDTH] + [cell_w] * len(cols)
+
+        # 想定より行が高くページをまたいだ場合も列見出しを繰り返す
+        table = Table(table_data, colWidths=col_widths, hAlign='CENTER', repeatRows=1)
+        table.setStyle(styles['table'])
+        # ブロックが対角線にかかる場合だけ、対角セルを塗るコマンドを1つ追加
+        if rows.start < cols.stop and cols.start < rows.stop:
+            table.setStyle([('BACKGROUND', (2, 1), (-1, -1), DiagonalFill(rows.start, cols.start))])
+        return table
 
 
 if __name__ == '__main__':
@@ -0,0 +1,172 @@
+"""
+試合一覧のページ分割・項目の絞り込み・NDJSON出力（/api/matches, /api/matches/filter, /generate-preliminary 共通）
+
+- 並び順は (試合日, キックオフ時刻, 会場, 試合順) で固定し、同じなら試合ID、
+  それも同じ（重複した行）なら入力で何番目に出たかで決める
+- カーソルは前のページの最後の試合の並び順のキーそのもの（位置ではない）なので、
+  結果の入力で試合の中身が変わったり試合が増減したりしても、続きのページがずれない
+- fields=id,matchTime のように返す項目を絞れる（キーは試合の dict のとおり）
+- format=ndjson なら1行1試合で返し、最後の行に {"done": true, "total", "count", "next_cursor"} を付ける
+"""
+
+import base64
+import json
+from bisect import bisect_right
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# 1ページの最大件数
+MAX_LIMIT = 1000
+
+# 並び順の項目（snake_case / camelCase の順に探す）と値の型
+_ORDER_FIELDS = (
+    (("match_date", "matchDate"), str),
+    (("match_time", "matchTime"), str),
+    (("venue_id", "venueId"), int),
+    (("venue_name", "venueName"), str),
+    (("match_order", "matchOrder", "matchNumber"), int),
+    (("id",), int),
+)
+# キーの長さ（項目ごとに (値がない, 値) の2要素 + 重複した行の中での出現順）
+KEY_LENGTH = 2 * len(_ORDER_FIELDS) + 1
+
+
+class ListingFormat(str, Enum):
+    """試合一覧の出力形式"""
+    JSON = "json"
+    NDJSON = "ndjson"
+
+
+def _field(match: Mapping[str, Any], names: Tuple[str, ...], kind: type) -> Any:
+    for name in names:
+        value = match.get(name)
+        if value is None:
+            continue
+        if kind is int:
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                return None
+        value = str(value)
+        if names[0] == "match_time" and len(value) > 1 and value[1] == ":":
+            # "9:30" と "09:30" を同じ並びにする
+            value = "0" + value
+        return value
+    return None
+
+
+def _order_fields(match: Mapping[str, Any]) -> tuple:
+    key: List[Any] = []
+    for names, kind in _ORDER_FIELDS:
+        value = _field(match, names, kind)
+        key.append(value is None)
+        key.append(("" if kind is str else 0) if value is None else value)
+    return tuple(key)
+
+
+def sort_key(match: Mapping[str, Any], seq: int) -> tuple:
+    """試合の並び順のキー（値のない項目は後ろ。seq は並び順の項目がすべて同じ行の中での出現順）"""
+    return _order_fields(match) + (seq,)
+
+
+def encode_cursor(key: tuple) -> str:
+    raw = json.dumps(list(key), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """カーソル → 並び順のキー（不正なカーソルは400）"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except ValueError:
+        key = None
+    valid = isinstance(key, list) and len(key) == KEY_LENGTH and type(key[-1]) is int
+    if valid:
+        for i, (_, kind) in enumerate(_ORDER_FIELDS):
+            if type(key[2 * i]) is not bool or type(key[2 * i + 1]) is not kind:
+                valid = False
+                break
+    if not valid:
+        raise HTTPException(status_code=400, detail="cursor が不正です")
+    return tuple(key)
+
+
+def paginate(
+    items: Sequence[Any], keys: Sequence[tuple], cursor: Optional[str], limit: Optional[int]
+) -> Tuple[Sequence[Any], Optional[str]]:
+    """並び順のキーでソート済みの items から、cursor の次の limit 件と次のカーソルを返す"""
+    start = bisect_right(keys, decode_cursor(cursor)) if cursor else 0
+    stop = len(items) if limit is None else min(start + limit, len(items))
+    next_cursor = encode_cursor(keys[stop - 1]) if stop < len(items) else None
+    return items[start:stop], next_cursor
+
+
+def sort_matches(
+    matches: Sequence[Mapping[str, Any]], positions: Optional[Iterable[int]] = None
+) -> Tuple[List[int], List[tuple]]:
+    """入力での位置（positions。省略時は全件）を並び順に並べ替えたものと、それぞれのキー"""
+    if positions is None:
+        positions = range(len(matches))
+    # 最後の決め手は入力での位置ではなく重複した行の中での出現順にする
+    # （前のページの試合が増減しても、カーソルの試合自身が後ろにずれて再び出てこないように）
+    seen: Dict[tuple, int] = {}
+    keyed = []
+    for i in positions:
+        fields = _order_fields(matches[i])
+        seq = seen.get(fields, 0)
+        seen[fields] = seq + 1
+        keyed.append((fields + (seq,), i))
+    keyed.sort()
+    return [i for _, i in keyed], [key for key, _ in keyed]
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    return [name.strip() for name in fields.split(",") if name.strip()] or None
+
+
+def project(matches: Iterable[Mapping[str, Any]], fields: Optional[List[str]]) -> List[Any]:
+    """fields の項目だけにした試合（fields が None ならそのまま）"""
+    if fields is None:
+        return list(matches)
+    return [{name: match[name] for name in fields if name in match} for match in matches]
+
+
+def _ndjson_lines(items: Iterable[Any], tail: Dict[str, Any]):
+    for item in items:
+        yield json.dumps(item, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+    yield json.dumps(tail, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def listing_response(
+    body: Dict[str, Any],
+    items_key: str,
+    items: List[Any],
+    total: int,
+    next_cursor: Optional[str],
+    paginated: bool,
+    fmt: ListingFormat,
+):
+    """一覧のレスポンス（JSON: body に items・total・next_cursor を加える / NDJSON: 1行1件）
+
+    body にあらかじめ items_key・total のキーを置いておけば、その位置に値を入れる。
+    """
+    if fmt == ListingFormat.NDJSON:
+        tail = {"done": True, "total": total, "count": len(items), "next_cursor": next_cursor}
+        return StreamingResponse(
+            _ndjson_lines(items, tail),
+            media_type="application/x-ndjson",
+            headers={"Cache-Control": "no-cache"},
+        )
+    body[items_key] = items
+    body["total"] = total
+    if paginated:
+        body["count"] = len(items)
+        body["next_cursor"] = next_cursor
+    # 中身はJSONそのままの dict / list なので jsonable_encoder の走査を省く
+    return JSONResponse(body)
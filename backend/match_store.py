@@ -0,0 +1,292 @@
+"""
+試合のインメモリストア（GET /api/matches のサーバー側フィルタリング）
+
+Supabase の matches テーブルのエクスポート（JSON / CSV）や day3_matches.csv 形式の CSV を
+読み込み、大会ごとに試合を保持する。
+
+- 読み込み時にキーを snake_case にそろえ、値の型（ID・試合日は int、B戦は bool）も正規化する
+  （問い合わせのたびに matchDay / match_day の両方を見ることはしない）
+- match_day / group_id / stage / venue_id / is_b_match ごとに
+  値 → 試合の位置の集合（ポスティングリスト）の索引を作り、
+  フィルタは該当するポスティングリストを短い順に積集合するだけで答える
+- 試合は (試合日, 時刻, 会場, 試合順) の順に並べて持つ（match_listing のカーソルと同じ並び）
+- 大会を読み込み直すときは、新しく作った表と索引に丸ごと差し替える
+
+起動時（server.py の startup）に MATCH_STORE_FILES（カンマ区切りのファイルパス）があれば読み込む。
+読み込めないファイルは警告を出して飛ばす。
+tournament_id 列のないファイル（day3_matches.csv など）は MATCH_STORE_TOURNAMENT_ID（既定1）の大会として扱う。
+"""
+
+import csv
+import json
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence
+
+from match_listing import sort_matches
+
+# 索引を持つ項目
+INDEXED_FIELDS = ("match_day", "group_id", "stage", "venue_id", "is_b_match")
+
+_INT_FIELDS = {
+    "id", "tournament_id", "venue_id", "home_team_id", "away_team_id", "match_day", "match_order",
+    "home_score_half1", "home_score_half2", "home_score_total",
+    "away_score_half1", "away_score_half2", "away_score_total", "home_pk", "away_pk",
+}
+_BOOL_FIELDS = {"is_b_match", "has_penalty_shootout", "is_locked"}
+
+# day3_matches.csv 形式（日本語の見出し）の列
+CSV_COLUMNS = {
+    "日付": "match_date",
+    "時間": "match_time",
+    "会場名": "venue_name",
+    "会場ID": "venue_id",
+    "ホーム": "home_team_name",
+    "アウェイ": "away_team_name",
+    "グループ": "group_id",
+    "B戦": "is_b_match",
+    "ステージ": "stage",
+    "試合日": "match_day",
+}
+
+# ステージの表記 → match_stage の値
+STAGE_LABELS = {
+    "予選": "preliminary",
+    "予選リーグ": "preliminary",
+    "準決勝": "semifinal",
+    "3位決": "third_place",
+    "3位決定戦": "third_place",
+    "決勝": "final",
+    "研修": "training",
+    "研修試合": "training",
+}
+
+# 文字列の真偽値（Supabase の CSV は true/false、手入力の CSV は ○ や B）
+_TRUE = {"true", "t", "1", "yes", "y", "○", "◯", "b"}
+
+# 単語の切れ目（小文字・数字の後の大文字 / isBMatch の B と M の間）
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+
+
+def snake_case(key: str) -> str:
+    """matchDay → match_day, isBMatch → is_b_match, homeScoreHalf1 → home_score_half1"""
+    return CSV_COLUMNS.get(key) or _CAMEL.sub("_", key).lower()
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in _TRUE
+    return bool(value)
+
+
+class MatchRowError(ValueError):
+    """行の値が列の型に合わない（row: 行の位置（0始まり）, field: 行でのキー）"""
+
+    def __init__(self, row: int, field: str, value: Any):
+        super().__init__(f"matches[{row}].{field} を整数にできません: {value!r}")
+        self.row = row
+        self.field = field
+        self.value = value
+
+
+def normalize_match(raw: Dict[str, Any], row: int = 0) -> Dict[str, Any]:
+    """1試合分の行のキーを snake_case に、値を列の型にそろえる（空文字は None）
+
+    整数の列に整数にできない値があれば MatchRowError（row は行の位置としてそのまま入れる）。
+    """
+    match: Dict[str, Any] = {}
+    for key, value in raw.items():
+        field = snake_case(key)
+        if isinstance(value, str):
+            value = value.strip()
+            if value == "":
+                value = None
+        if value is not None:
+            if field in _INT_FIELDS and not isinstance(value, bool):
+                try:
+                    value = int(value)
+                except (TypeError, ValueError):
+                    raise MatchRowError(row, key, value) from None
+            elif field in _BOOL_FIELDS:
+                value = _to_bool(value)
+            elif field == "stage":
+                value = STAGE_LABELS.get(value, value)
+        # 同じ項目が snake_case / camelCase の両方であれば先に出た方を使う
+        match.setdefault(field, value)
+    # DB の既定値（is_b_match DEFAULT FALSE）にそろえる
+    if match.get("is_b_match") is None:
+        match["is_b_match"] = False
+    return match
+
+
+# フィルタ条件の項目 → クライアントが送る camelCase のキー
+FILTER_KEYS = {
+    "match_day": "matchDay",
+    "is_b_match": "isBMatch",
+    "group_id": "groupId",
+    "stage": None,
+    "venue_id": "venueId",
+}
+
+
+def _getter(field: str, camel_case: bool) -> Callable[[Mapping[str, Any]], Any]:
+    """試合の dict から項目の値を取る関数（camel_case=True なら snake_case が None / ないとき camelCase を見る）"""
+    camel = FILTER_KEYS[field]
+    if not camel_case or camel is None:
+        return lambda match: match.get(field)
+
+    def get(match: Mapping[str, Any]) -> Any:
+        value = match.get(field)
+        return value if value is not None else match.get(camel)
+    return get
+
+
+def compile_filter(
+    match_day: Optional[int] = None,
+    is_b_match: Optional[bool] = None,
+    group_id: Optional[str] = None,
+    stage: Optional[str] = None,
+    venue_id: Optional[int] = None,
+    exclude_b_matches: bool = False,
+    camel_case: bool = False,
+) -> Callable[[Sequence[Mapping[str, Any]]], List[int]]:
+    """フィルタ条件を、試合リスト → 該当する試合の位置のリスト を返す関数にまとめる（None の条件は無視）
+
+    指定された条件だけを (値を取る関数, 期待値) のリストにしておき、試合リストを1回だけ走査する
+    （外れた条件でそれ以降の判定は打ち切る）。
+    camel_case=True ならクライアントが送った dict 用に、snake_case のキーが None / ないときだけ
+    camelCase のキー（FILTER_KEYS）を見る。
+    """
+    if exclude_b_matches and is_b_match:
+        return lambda matches: []
+
+    preds = []
+    for field, expected in (
+        ("match_day", match_day), ("group_id", group_id), ("venue_id", venue_id),
+        ("stage", stage), ("is_b_match", is_b_match),
+    ):
+        if expected is not None:
+            preds.append((_getter(field, camel_case), expected))
+    if exclude_b_matches and is_b_match is None:
+        # B戦除外は is_b_match の指定がなければ「B戦フラグが真でない（None も含む）」で判定
+        get_b = _getter("is_b_match", camel_case)
+        preds.append((lambda match: not get_b(match), True))
+
+    def select(matches: Sequence[Mapping[str, Any]]) -> List[int]:
+        return [i for i, match in enumerate(matches) if all(get(match) == exp for get, exp in preds)]
+    return select
+
+
+class MatchTable:
+    """1大会分の試合と索引（作ったあとは変更しない）
+
+    試合は match_listing の並び順（試合日・時刻・会場・試合順）に並べて持つので、
+    索引の位置の昇順がそのまま一覧の並び順になる。
+    """
+
+    def __init__(self, tournament_id: int, matches: Iterable[Dict[str, Any]]):
+        self.tournament_id = tournament_id
+        loaded = list(matches)
+        for seq, match in enumerate(loaded):
+            match["tournament_id"] = tournament_id
+            if match.get("id") is None:
+                match["id"] = seq + 1
+        order, self.keys = sort_matches(loaded)
+        self.matches: List[Dict[str, Any]] = [loaded[i] for i in order]
+
+        postings: Dict[str, Dict[Any, List[int]]] = {field: {} for field in INDEXED_FIELDS}
+        for pos, match in enumerate(self.matches):
+            for field in INDEXED_FIELDS:
+                postings[field].setdefault(match.get(field), []).append(pos)
+        self.index: Dict[str, Dict[Any, FrozenSet[int]]] = {
+            field: {value: frozenset(positions) for value, positions in values.items()}
+            for field, values in postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.matches)
+
+    def positions(self, **filters: Any) -> List[int]:
+        """項目 = 値 の条件（None の条件は無視）をすべて満たす試合の位置（並び順）"""
+        lists = []
+        for field, value in filters.items():
+            if value is None:
+                continue
+            posting = self.index[field].get(value)
+            if not posting:
+                return []
+            lists.append(posting)
+        if not lists:
+            return list(range(len(self.matches)))
+        lists.sort(key=len)
+        hits = lists[0].intersection(*lists[1:]) if len(lists) > 1 else lists[0]
+        return sorted(hits)
+
+    def query(self, **filters: Any) -> List[Dict[str, Any]]:
+        """条件をすべて満たす試合（並び順）"""
+        return [self.matches[pos] for pos in self.positions(**filters)]
+
+
+class MatchStore:
+    """tournament_id → MatchTable"""
+
+    def __init__(self):
+        self._tables: Dict[int, MatchTable] = {}
+        self._lock = threading.Lock()
+
+    def load(self, tournament_id: int, rows: Iterable[Dict[str, Any]]) -> MatchTable:
+        """大会の試合をまとめて読み込む（既存の試合は置き換え。MatchRowError なら何も変えない）"""
+        table = MatchTable(tournament_id, (normalize_match(row, i) for i, row in enumerate(rows)))
+        with self._lock:
+            self._tables[tournament_id] = table
+        return table
+
+    def load_rows(self, rows: Iterable[Dict[str, Any]], default_tournament_id: int = 1) -> Dict[int, int]:
+        """複数大会が混ざった行（Supabase のエクスポート）を大会ごとに読み込む。{大会ID: 試合数} を返す"""
+        by_tournament: Dict[int, List[Dict[str, Any]]] = {}
+        for i, row in enumerate(rows):
+            match = normalize_match(row, i)
+            tournament_id = match.get("tournament_id")
+            if tournament_id is None:
+                tournament_id = default_tournament_id
+            by_tournament.setdefault(tournament_id, []).append(match)
+        tables = {tournament_id: MatchTable(tournament_id, matches) for tournament_id, matches in by_tournament.items()}
+        with self._lock:
+            self._tables.update(tables)
+        return {tournament_id: len(table) for tournament_id, table in tables.items()}
+
+    def load_file(self, path: str, default_tournament_id: int = 1) -> Dict[int, int]:
+        """Supabase のエクスポート（.json: 行の配列 / .csv）または day3_matches.csv 形式の CSV を読み込む"""
+        if path.endswith(".json"):
+            with open(path, encoding="utf-8") as f:
+                rows = json.load(f)
+        else:
+            with open(path, encoding="utf-8-sig", newline="") as f:
+                rows = list(csv.DictReader(f))
+        return self.load_rows(rows, default_tournament_id)
+
+    def get(self, tournament_id: int) -> Optional[MatchTable]:
+        return self._tables.get(tournament_id)
+
+    def query(self, tournament_id: int, **filters: Any) -> List[Dict[str, Any]]:
+        table = self._tables.get(tournament_id)
+        return table.query(**filters) if table is not None else []
+
+    def tournaments(self) -> List[int]:
+        return list(self._tables)
+
+    def load_env_files(self):
+        """MATCH_STORE_FILES のファイルを読み込む（読めない・形式が不正なファイルは警告を出して飛ばす）"""
+        default_tournament_id = int(os.environ.get("MATCH_STORE_TOURNAMENT_ID", 1))
+        for path in filter(None, (p.strip() for p in os.environ.get("MATCH_STORE_FILES", "").split(","))):
+            try:
+                counts = self.load_file(path, default_tournament_id)
+            except Exception as e:
+                print(f"[WARN] 試合ファイルの読み込みに失敗: {path}: {e}")
+                continue
+            print(f"[OK] 試合ファイル読み込み完了: {path} ({sum(counts.values())}試合)")
+
+
+match_store = MatchStore()
+
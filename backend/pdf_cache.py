@@ -0,0 +1,260 @@
+"""
+帳票PDFの結果キャッシュ
+
+キーは「帳票種別 + 生成クラスのバージョン + フォント名 + 正規化した入力JSON」の SHA-256。
+同じ入力からは（作成日時などのメタデータを除き）同じPDFが生成されるため、
+キーはそのまま弱いETagとしても使える。
+
+- メモリ: バイト数上限付きLRU
+- ディスク: 任意（PDF_CACHE_DIR を指定した場合のみ）。ファイル名は キー + 形式の拡張子
+  （.pdf / 一括生成の .zip）。バイト数上限付きで、
+  超えたら更新日時（書き込み・ディスクからの読み込みで更新）の古いファイルから削除する
+
+環境変数:
+  PDF_CACHE_BYTES       メモリキャッシュの上限バイト数（デフォルト: 64MB、0で無効）
+  PDF_CACHE_DIR         ディスクキャッシュのディレクトリ（未指定なら無効）
+  PDF_CACHE_DISK_BYTES  ディスクキャッシュの上限バイト数（デフォルト: 512MB、0で上限なし = 外部で掃除する）
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+# ディスクの上限を超えたら、上限のこの割合まで減らす（毎回ディレクトリを走査しないように余裕を残す）
+DISK_EVICT_RATIO = 0.9
+# ディスクに置くファイルの拡張子（これ以外のファイルは数えない・消さない）
+SUFFIXES = ('.pdf', '.zip')
+
+
+def make_key(kind: str, data: Any, version: str, font: str) -> str:
+    """正規化した入力からキャッシュキーを生成"""
+    canonical = json.dumps(
+        data, ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=str
+    )
+    h = hashlib.sha256()
+    h.update(f'{kind}\0{version}\0{font}\0'.encode('utf-8'))
+    h.update(canonical.encode('utf-8'))
+    return h.hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match ヘッダーが ETag に一致するか（弱いETag・複数指定に対応）"""
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class PDFCache:
+    """メモリLRU + 任意のディスク層"""
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+    ):
+        self.max_bytes = max(0, max_bytes)
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max(0, max_disk_bytes)
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._pinned: Dict[str, bytes] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        # ディスクの使用量の見積もり（前回の走査 + このプロセスが書いた分）
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._evict_disk()
+
+    @classmethod
+    def from_env(cls) -> "PDFCache":
+        return cls(
+            max_bytes=int(os.environ.get('PDF_CACHE_BYTES', 64 * 1024 * 1024)),
+            disk_dir=os.environ.get('PDF_CACHE_DIR') or None,
+            max_disk_bytes=int(os.environ.get('PDF_CACHE_DISK_BYTES', 512 * 1024 * 1024)),
+        )
+
+    def _disk_path(self, key: str, suffix: str) -> str:
+        if suffix not in SUFFIXES:
+            raise ValueError(f"未対応の拡張子: {suffix}")
+        return os.path.join(self.disk_dir, f'{key}{suffix}')
+
+    def get(self, key: str, suffix: str = '.pdf') -> Optional[bytes]:
+        """キャッシュから取り出す（suffix はディスク層のファイルの拡張子。内容の形式に合わせる）
+
+        ディスク層はブロックする読み込みなので、イベントループからは aget を使う。
+        """
+        content = self._get_memory(key)
+        if content is None and self.disk_dir:
+            content = self._get_disk(key, suffix)
+        return self._count(content)
+
+    async def aget(self, key: str, suffix: str = '.pdf') -> Optional[bytes]:
+        """get の非同期版（メモリ層はそのまま、ディスク層はスレッドプールで読む）"""
+        content = self._get_memory(key)
+        if content is None and self.disk_dir:
+            content = await run_in_threadpool(self._get_disk, key, suffix)
+        return self._count(content)
+
+    def put(self, key: str, content: bytes, pin: bool = False, suffix: str = '.pdf'):
+        """キャッシュに登録（pin=True はLRU対象外で常駐。suffix はディスク層のファイルの拡張子）
+
+        ディスク層への書き込みはブロックするので、イベントループからは aput を使う。
+        """
+        if self._put_pinned_or_memory(key, content, pin) and self.disk_dir:
+            self._put_disk(key, content, suffix)
+
+    async def aput(self, key: str, content: bytes, pin: bool = False, suffix: str = '.pdf'):
+        """put の非同期版（ディスク層への書き込みはスレッドプールで行う）"""
+        if self._put_pinned_or_memory(key, content, pin) and self.disk_dir:
+            await run_in_threadpool(self._put_disk, key, content, suffix)
+
+    def _get_memory(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            content = self._pinned.get(key)
+            if content is None:
+                content = self._entries.get(key)
+                if content is not None:
+                    self._entries.move_to_end(key)
+            if content is not None:
+                self.hits += 1
+            return content
+
+    def _get_disk(self, key: str, suffix: str) -> Optional[bytes]:
+        path = self._disk_path(key, suffix)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+            # 更新日時を最終使用日時として使う（削除は古い順）
+            os.utime(path)
+        except OSError:
+            return None
+        with self._lock:
+            self.disk_hits += 1
+        self._put_memory(key, content)
+        return content
+
+    def _count(self, content: Optional[bytes]) -> Optional[bytes]:
+        if content is None:
+            with self._lock:
+                self.misses += 1
+        return content
+
+    def _put_pinned_or_memory(self, key: str, content: bytes, pin: bool) -> bool:
+        """常駐（pin）かメモリ層に登録。ディスク層にも書くなら True"""
+        if pin:
+            with self._lock:
+                self._pinned[key] = content
+            return False
+        self._put_memory(key, content)
+        return True
+
+    def _put_memory(self, key: str, content: bytes):
+        size = len(content)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = content
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def _put_disk(self, key: str, content: bytes, suffix: str):
+        # 書き込み途中のファイルを読まれないよう一時ファイル経由で置き換える
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, self._disk_path(key, suffix))
+        except OSError:
+            return
+        if not self.max_disk_bytes:
+            return
+        with self._disk_lock:
+            self._disk_bytes += len(content)
+            over = self._disk_bytes > self.max_disk_bytes
+        if over:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """ディスクを走査して使用量を数え直し、上限を超えていれば更新日時の古いファイルから削除
+
+        同じディレクトリを複数のプロセスで共有していても、走査するので他のプロセスが書いた分も数える
+        （走査の間に増えた分は次の走査まで上限を超えうる）。
+        """
+        if not self.max_disk_bytes:
+            return
+        with self._disk_lock:
+            files = []
+            try:
+                with os.scandir(self.disk_dir) as it:
+                    for entry in it:
+                        if not entry.name.endswith(SUFFIXES):
+                            continue
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        files.append((st.st_mtime, st.st_size, entry.path))
+            except OSError:
+                return
+            total = sum(size for _, size, _ in files)
+            if total > self.max_disk_bytes:
+                target = self.max_disk_bytes * DISK_EVICT_RATIO
+                files.sort()
+                for _, size, path in files:
+                    if total <= target:
+                        break
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        continue
+                    total -= size
+                    self.disk_evictions += 1
+            self._disk_bytes = total
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "pinned": len(self._pinned),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "disk_dir": self.disk_dir,
+                "disk_bytes": self._disk_bytes,
+                "max_disk_bytes": self.max_disk_bytes,
+                "disk_evictions": self.disk_evictions,
+            }
+
+
+pdf_cache = PDFCache.from_env()
@@ -2,43 +2,169 @@
 PDF生成用共通ユーティリティ
 
 日本語フォント登録のフォールバックチェーン:
-  Windows (游ゴシック/MSゴシック/メイリオ) → Linux Noto CJK → CID HeiseiKakuGo → Helvetica
+  Windows (游ゴシック/MSゴシック/メイリオ) → Linux IPA Gothic → CID HeiseiKakuGo → Helvetica
+
+TTF/TTC の解析は重いため、モジュール読み込み時ではなく最初のレンダリング時に
+1プロセスにつき1回だけ登録する（スレッドセーフ）。
+
+ParagraphStyle / TableStyle はフォントごとに1回だけ組み立て（StyleTemplates）、
+試合・グループ・リクエストをまたいで使い回す。
 """
 
+import io
 import os
+import threading
+import time
+import zipfile
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 
+FONT_CANDIDATES = [
+    # Windows 標準フォント
+    ('YuGothic', r'C:\Windows\Fonts\YuGothR.ttc', 0),
+    ('MSGothic', r'C:\Windows\Fonts\msgothic.ttc', 0),
+    ('Meiryo', r'C:\Windows\Fonts\meiryo.ttc', 0),
+    ('MSMincho', r'C:\Windows\Fonts\msmincho.ttc', 0),
+    # Linux IPA Gothic (Docker / Render) - TrueType形式
+    ('IPAGothic', '/usr/share/fonts/opentype/ipafont-gothic/ipag.ttf', None),
+]
 
-def register_japanese_font() -> str:
-    """利用可能な日本語フォントを登録して名前を返す"""
-    font_candidates = [
-        # Windows 標準フォント
-        ('YuGothic', r'C:\Windows\Fonts\YuGothR.ttc', 0),
-        ('MSGothic', r'C:\Windows\Fonts\msgothic.ttc', 0),
-        ('Meiryo', r'C:\Windows\Fonts\meiryo.ttc', 0),
-        ('MSMincho', r'C:\Windows\Fonts\msmincho.ttc', 0),
-        # Linux IPA Gothic (Docker / Render) - TrueType形式
-        ('IPAGothic', '/usr/share/fonts/opentype/ipafont-gothic/ipag.ttf', None),
-    ]
-
-    for font_name, font_path, subfont_index in font_candidates:
-        if os.path.exists(font_path):
-            try:
-                if subfont_index is not None:
-                    pdfmetrics.registerFont(TTFont(font_name, font_path, subfontIndex=subfont_index))
-                else:
-                    pdfmetrics.registerFont(TTFont(font_name, font_path))
+CID_FALLBACK = 'HeiseiKakuGo-W5'
+
+
+class FontRegistry:
+    """日本語フォントの遅延登録（プロセス内で共有）"""
+
+    def __init__(self, candidates=None):
+        self.candidates = candidates if candidates is not None else FONT_CANDIDATES
+        self._lock = threading.Lock()
+        self._name: Optional[str] = None
+        self.path: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._name is not None
+
+    def get(self) -> str:
+        """フォントを登録して名前を返す（2回目以降は登録済みの名前を返すだけ）"""
+        name = self._name
+        if name is not None:
+            return name
+        with self._lock:
+            if self._name is None:
+                started = time.perf_counter()
+                self._name, self.path = self._register()
+                self.load_seconds = time.perf_counter() - started
+            return self._name
+
+    def expected_name(self) -> str:
+        """登録せずに、選ばれるはずのフォント名を返す（キャッシュキー用）"""
+        if self._name is not None:
+            return self._name
+        for font_name, font_path, _ in self.candidates:
+            if os.path.exists(font_path):
                 return font_name
-            except Exception:
-                continue
-
-    # CID フォントにフォールバック
-    try:
-        from reportlab.pdfbase.cidfonts import UnicodeCIDFont
-        pdfmetrics.registerFont(UnicodeCIDFont('HeiseiKakuGo-W5'))
-        return 'HeiseiKakuGo-W5'
-    except Exception:
-        pass
-
-    return 'Helvetica'
+        return CID_FALLBACK
+
+    def prewarm(self) -> threading.Thread:
+        """バックグラウンドスレッドでフォントを先読みする"""
+        thread = threading.Thread(target=self.get, name='font-prewarm', daemon=True)
+        thread.start()
+        return thread
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "font": self._name,
+            "path": self.path,
+            "load_ms": round(self.load_seconds * 1000, 1) if self.load_seconds is not None else None,
+        }
+
+    def _register(self):
+        for font_name, font_path, subfont_index in self.candidates:
+            if os.path.exists(font_path):
+                try:
+                    if subfont_index is not None:
+                        pdfmetrics.registerFont(TTFont(font_name, font_path, subfontIndex=subfont_index))
+                    else:
+                        pdfmetrics.registerFont(TTFont(font_name, font_path))
+                    return font_name, font_path
+                except Exception:
+                    continue
+
+        # CID フォントにフォールバック
+        try:
+            from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+            pdfmetrics.registerFont(UnicodeCIDFont(CID_FALLBACK))
+            return CID_FALLBACK, None
+        except Exception:
+            pass
+
+        return 'Helvetica', None
+
+
+font_registry = FontRegistry()
+
+
+def get_font() -> str:
+    """レンダリング時に使うフォント名（初回呼び出し時に登録）"""
+    return font_registry.get()
+
+
+def register_japanese_font() -> str:
+    """利用可能な日本語フォントを登録して名前を返す（get_font の互換名）"""
+    return font_registry.get()
+
+
+class StyleTemplates:
+    """フォントごとに1回だけ組み立てるスタイル集（モジュールレベルで共有する）
+
+    build(font) は {名前: ParagraphStyle / TableStyle} を返す関数。
+    Table.setStyle は TableStyle を変更しないため、同じテンプレートを何度でも適用できる。
+    行ごとに変わる部分（上位ハイライト・対角セルなど）は、テンプレートの後に
+    小さな差分のコマンドリストだけを setStyle で追加する。
+    返すスタイル集は読み取り専用（個々のスタイルも変更しないこと）。
+    """
+
+    def __init__(self, build: Callable[[str], Dict[str, Any]]):
+        self._build = build
+        self._by_font: Dict[str, Mapping[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, font: str) -> Mapping[str, Any]:
+        styles = self._by_font.get(font)
+        if styles is None:
+            with self._lock:
+                styles = self._by_font.get(font)
+                if styles is None:
+                    styles = MappingProxyType(self._build(font))
+                    self._by_font[font] = styles
+        return styles
+
+    def clear(self):
+        """組み立て済みのスタイルを破棄（ベンチマーク用）"""
+        with self._lock:
+            self._by_font.clear()
+
+
+def merge_pdfs(contents: List[bytes]) -> bytes:
+    """複数のPDFを順番に結合して1つのPDFにする"""
+    from pypdf import PdfReader, PdfWriter
+
+    writer = PdfWriter()
+    for content in contents:
+        writer.append(PdfReader(io.BytesIO(content)))
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def zip_pdfs(files: List[Tuple[str, bytes]]) -> bytes:
+    """(ファイル名, PDF) の一覧をZIPにまとめる（PDFは圧縮済みなので無圧縮で格納）"""
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for name, content in files:
+            zf.writestr(name, content)
+    return out.getvalue()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+予選リーグの会場・時間枠の割り当て（局所探索）
+
+総当たりの各試合を (会場, 時間枠) のマスに割り当てる。
+時間枠の数は「全試合 ÷ 会場数」の最小値から始め、ハード制約を満たせない場合だけ増やす。
+
+ハード制約（docs/schedule-generation-specification.md 2.1）
+- 同時刻重複: 同じチームが同じ時間枠に2試合
+- 1つのマスには1試合（同カード・自チーム対戦は総当たりの生成時点で起きない）
+
+ソフト制約（辞書式。上が絶対的に優先）
+- 連戦: 同じチームが連続する時間枠で試合
+- 会場移動: チームが使う会場の数 - 1 の合計（グループはなるべく同じ会場で）
+
+探索は焼きなまし法。
+- 初期解は、試合を順に「両チームが空いている最初の時間枠」の空き会場に置く貪欲法
+  （置けない試合は空いているマスに置き、同時刻重複は探索で消す）
+- 近傍は「1試合を空きマスへ移す」か「2試合のマスを入れ替える」
+- スコアは辞書式の各項目を桁で重み付けした整数（encode_score）
+- チームごとの時間枠・会場の試合数と、各項目の合計を置く・外すたびに更新するので、
+  1手の評価は動かした試合の両チーム分の O(1)
+- 反復回数は time_budget_ms から決めるので、同じ seed なら同じ結果になる
+  （マシンが遅くて時間を超えそうなときはそこで打ち切る）
+"""
+
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# 辞書式スコアの重み（spec 4.2.3 の encodeLexToScore と同じ考え方）
+CONFLICT_WEIGHT = 10 ** 6
+CONSECUTIVE_WEIGHT = 10 ** 3
+VENUE_CHANGE_WEIGHT = 1
+
+# 1ミリ秒あたりの反復回数（反復回数を時間から決めるための目安）
+ITERATIONS_PER_MS = 50
+
+
+@dataclass
+class ScheduleScore:
+    """割り当ての評価（すべて小さいほど良い）"""
+    conflicts: int = 0       # 同時刻重複（ハード制約）
+    consecutive: int = 0     # 連戦
+    venue_changes: int = 0   # 会場移動
+    slots: int = 0           # 使った時間枠の数（参考）
+
+    def encode(self) -> int:
+        return encode_score(self.conflicts, self.consecutive, self.venue_changes)
+
+    def to_dict(self) -> dict:
+        return {
+            "conflicts": self.conflicts,
+            "consecutive": self.consecutive,
+            "venueChanges": self.venue_changes,
+            "slots": self.slots,
+            "score": self.encode(),
+        }
+
+
+def encode_score(conflicts: int, consecutive: int, venue_changes: int) -> int:
+    return conflicts * CONFLICT_WEIGHT + consecutive * CONSECUTIVE_WEIGHT + venue_changes * VENUE_CHANGE_WEIGHT
+
+
+class PreliminaryScheduler:
+    """試合（ホーム・アウェイのチームID）を会場・時間枠に割り当てる"""
+
+    def __init__(
+        self,
+        pairs: Sequence[Tuple[int, int]],
+        venue_count: int,
+        time_budget_ms: int = 300,
+        seed: Optional[int] = 0,
+    ):
+        if venue_count <= 0:
+            raise ValueError("会場がありません")
+        team_index: Dict[int, int] = {}
+        for pair in pairs:
+            for team in pair:
+                team_index.setdefault(team, len(team_index))
+        # チームは 0 始まりの番号で持つ
+        self.pairs = [(team_index[home], team_index[away]) for home, away in pairs]
+        self.team_count = len(team_index)
+        self.venue_count = venue_count
+        self.time_budget_ms = time_budget_ms
+        self.rng = random.Random(seed)
+        self.iterations = 0
+
+    # ------------------------------------------------------------------
+    # 状態
+    # ------------------------------------------------------------------
+
+    def _reset(self, slot_count: int):
+        self.slot_count = slot_count
+        self.grid: List[List[Optional[int]]] = [[None] * self.venue_count for _ in range(slot_count)]
+        self.cells: List[Optional[Tuple[int, int]]] = [None] * len(self.pairs)
+        # チーム × 時間枠 / チーム × 会場 の試合数
+        self.team_slots = [[0] * slot_count for _ in range(self.team_count)]
+        self.team_venues = [[0] * self.venue_count for _ in range(self.team_count)]
+        # 全チームの合計（同時刻重複, 連戦, 使っている会場の数）
+        self.conflicts = 0
+        self.consecutive = 0
+        self.venues_used = 0
+
+    def _current(self) -> int:
+        # 全試合を置いた状態では全チームが1会場以上使っている
+        return encode_score(self.conflicts, self.consecutive, self.venues_used - self.team_count)
+
+    def _place(self, m: int, venue: int, slot: int):
+        self.grid[slot][venue] = m
+        self.cells[m] = (venue, slot)
+        last = self.slot_count - 1
+        for team in self.pairs[m]:
+            slots = self.team_slots[team]
+            if slots[slot]:
+                self.conflicts += 1
+            else:
+                self.consecutive += (slot > 0 and slots[slot - 1] > 0) + (slot < last and slots[slot + 1] > 0)
+            slots[slot] += 1
+            venues = self.team_venues[team]
+            if not venues[venue]:
+                self.venues_used += 1
+            venues[venue] += 1
+
+    def _remove(self, m: int):
+        venue, slot = self.cells[m]
+        self.grid[slot][venue] = None
+        self.cells[m] = None
+        last = self.slot_count - 1
+        for team in self.pairs[m]:
+            slots = self.team_slots[team]
+            slots[slot] -= 1
+            if slots[slot]:
+                self.conflicts -= 1
+            else:
+                self.consecutive -= (slot > 0 and slots[slot - 1] > 0) + (slot < last and slots[slot + 1] > 0)
+            venues = self.team_venues[team]
+            venues[venue] -= 1
+            if not venues[venue]:
+                self.venues_used -= 1
+
+    def score(self) -> ScheduleScore:
+        used = [slot for slot in range(self.slot_count) if any(m is not None for m in self.grid[slot])]
+        return ScheduleScore(
+            conflicts=self.conflicts,
+            consecutive=self.consecutive,
+            venue_changes=self.venues_used - self.team_count,
+            slots=used[-1] + 1 if used else 0,
+        )
+
+    # ------------------------------------------------------------------
+    # 初期解
+    # ------------------------------------------------------------------
+
+    def _greedy(self):
+        """両チームが空いている最初の時間枠の空き会場に順に置く（なければ最初の空きマス）"""
+        # 初期解では各時間枠の会場を前から埋めるので、埋まった数がそのまま次の空き会場
+        filled = [0] * self.slot_count
+        for m, (home, away) in enumerate(self.pairs):
+            home_slots, away_slots = self.team_slots[home], self.team_slots[away]
+            fallback = None
+            for slot in range(self.slot_count):
+                if filled[slot] == self.venue_count:
+                    continue
+                if not home_slots[slot] and not away_slots[slot]:
+                    break
+                if fallback is None:
+                    fallback = slot
+            else:
+                slot = fallback
+            self._place(m, filled[slot], slot)
+            filled[slot] += 1
+
+    # ------------------------------------------------------------------
+    # 探索
+    # ------------------------------------------------------------------
+
+    def _try_move(self, m: int, venue: int, slot: int, temperature: float) -> int:
+        """m を (venue, slot) に移す（埋まっていれば入れ替え）。採用したらスコアの差分、しなければ 0"""
+        other = self.grid[slot][venue]
+        if other == m:
+            return 0
+        before = self._current()
+        origin = self.cells[m]
+        self._remove(m)
+        if other is not None:
+            self._remove(other)
+            self._place(other, *origin)
+        self._place(m, venue, slot)
+        delta = self._current() - before
+
+        if delta <= 0 or (temperature > 0 and self.rng.random() < math.exp(-delta / temperature)):
+            return delta
+        # 元に戻す
+        self._remove(m)
+        if other is not None:
+            self._remove(other)
+            self._place(other, venue, slot)
+        self._place(m, *origin)
+        return 0
+
+    def _anneal(self, iterations: int, deadline: float) -> Tuple[int, List[Tuple[int, int]]]:
+        """iterations 回（deadline まで）焼きなまし、最良のスコアと割り当てを返す"""
+        current = self._current()
+        best, best_cells = current, list(self.cells)
+        match_count = len(self.pairs)
+        rng = self.rng
+        for i in range(iterations):
+            if best == 0:
+                break
+            if i % 256 == 0 and time.perf_counter() > deadline:
+                break
+            # 連戦1つ分を受け入れる程度から、会場移動1つ分未満まで下げる
+            temperature = CONSECUTIVE_WEIGHT * (1 - i / iterations) ** 3
+            self.iterations += 1
+            current += self._try_move(
+                rng.randrange(match_count), rng.randrange(self.venue_count),
+                rng.randrange(self.slot_count), temperature,
+            )
+            if current < best:
+                best, best_cells = current, list(self.cells)
+        return best, best_cells
+
+    def solve(self) -> Tuple[List[Tuple[int, int]], ScheduleScore]:
+        """[(会場インデックス, 時間枠)]（試合の順）と評価を返す"""
+        deadline = time.perf_counter() + self.time_budget_ms / 1000
+        remaining = self.time_budget_ms * ITERATIONS_PER_MS
+        slot_count = max(math.ceil(len(self.pairs) / self.venue_count), 1)
+        while True:
+            self._reset(slot_count)
+            self._greedy()
+            if self.conflicts:
+                # この枠数で同時刻重複を消せるか、残りの半分まで探す
+                iterations = remaining // 2
+            else:
+                iterations = remaining
+            remaining -= iterations
+            best, best_cells = self._anneal(iterations, deadline) if self.pairs else (0, [])
+            if best < CONFLICT_WEIGHT:
+                break
+            slot_count += 1
+
+        # 最良解に戻す
+        self._reset(slot_count)
+        for m, (venue, slot) in enumerate(best_cells):
+            self._place(m, venue, slot)
+        return best_cells, self.score()
@@ -0,0 +1,254 @@
+"""
+帳票PDFレンダリング用プロセスプール
+
+ReportLabによるPDF生成はCPUバウンドのため、async エンドポイント内で直接実行すると
+uvicornワーカー全体（/generate-schedule や /api/standings/calculate を含む）が停止する。
+帳票生成はこのプールに投入し、別プロセスでレンダリングする。
+
+環境変数:
+  REPORT_WORKERS       ワーカープロセス数（デフォルト: 2）
+  REPORT_QUEUE_LIMIT   実行中ジョブ以外に待機できるジョブ数（デフォルト: 8）
+  REPORT_TIMEOUT       1ジョブあたりのタイムアウト秒（デフォルト: 60）
+  REPORT_RETRY_AFTER   混雑時に返す Retry-After 秒（デフォルト: 5）
+  REPORT_SPILL_BYTES   これを超えるPDFは一時ファイル経由で受け渡す（デフォルト: 8MB）
+  REPORT_PREWARM       1ならサーバー起動後にワーカーを立ち上げてフォントを先読み（デフォルト: 1）
+"""
+
+import asyncio
+import io
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional
+
+from generate_daily_report_pdf import DailyReportGenerator
+from generate_final_result_pdf import FinalResultPDFGenerator
+from generate_standings_pdf import StandingsPDFGenerator
+from generate_star_table_pdf import StarTablePDFGenerator
+from pdf_utils import font_registry
+
+# 帳票種別 → 生成クラス
+GENERATORS = {
+    'daily': DailyReportGenerator,
+    'final': FinalResultPDFGenerator,
+    'standings': StandingsPDFGenerator,
+    'star_table': StarTablePDFGenerator,
+}
+
+
+class ReportPoolSaturated(Exception):
+    """実行中 + 待機中のジョブ数が上限に達している"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("帳票生成が混雑しています。しばらくしてから再度お試しください")
+        self.retry_after = retry_after
+
+
+class ReportTimeout(Exception):
+    """ジョブがタイムアウト秒以内に完了しなかった"""
+
+    def __init__(self, timeout: float):
+        super().__init__(f"帳票生成が{timeout:g}秒以内に完了しませんでした")
+        self.timeout = timeout
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class RenderedReport:
+    """生成済みPDF（通常はメモリ上、巨大な場合のみ一時ファイル）"""
+    size: int
+    content: Optional[bytes] = None
+    path: Optional[str] = None
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        if self.content is not None:
+            for start in range(0, self.size, CHUNK_SIZE):
+                yield self.content[start:start + CHUNK_SIZE]
+            return
+        with open(self.path, 'rb') as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+    def read(self) -> bytes:
+        """PDF全体をバイト列で取得（一時ファイルは読み込み後に削除）"""
+        if self.content is not None:
+            return self.content
+        with open(self.path, 'rb') as f:
+            content = f.read()
+        self.cleanup()
+        return content
+
+    def cleanup(self):
+        """一時ファイルを削除（レスポンス送信後に呼ぶ）"""
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+
+def render_report(kind: str, data: dict, spill_bytes: int) -> RenderedReport:
+    """ワーカープロセス内で帳票を生成する（picklable なトップレベル関数）"""
+    buffer = io.BytesIO()
+    GENERATORS[kind]().generate(data, buffer)
+    size = buffer.tell()
+    if size <= spill_bytes:
+        return RenderedReport(size=size, content=buffer.getvalue())
+
+    # 巨大なPDFはプロセス間でバイト列を転送せず一時ファイルで渡す
+    fd, path = tempfile.mkstemp(prefix=f'{kind}_', suffix='.pdf')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(buffer.getbuffer())
+    return RenderedReport(size=size, path=path)
+
+
+def _init_worker():
+    # ワーカー起動直後からバックグラウンドでフォントを読み込んでおく
+    font_registry.prewarm()
+
+
+def warm_font() -> Dict[str, Any]:
+    """ワーカーのフォント読込完了を待って結果を返す"""
+    font_registry.get()
+    return {**font_registry.info(), "pid": os.getpid()}
+
+
+class ReportExecutor:
+    """上限付きの帳票レンダリングプール"""
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        queue_limit: int = 8,
+        timeout: float = 60.0,
+        retry_after: int = 5,
+        spill_bytes: int = 8 * 1024 * 1024,
+        prewarm: bool = True,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.queue_limit = max(0, queue_limit)
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.spill_bytes = spill_bytes
+        self.prewarm_enabled = prewarm
+        self.font_info: Optional[Dict[str, Any]] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._inflight = 0
+
+    @classmethod
+    def from_env(cls) -> "ReportExecutor":
+        return cls(
+            max_workers=int(os.environ.get('REPORT_WORKERS', 2)),
+            queue_limit=int(os.environ.get('REPORT_QUEUE_LIMIT', 8)),
+            timeout=float(os.environ.get('REPORT_TIMEOUT', 60)),
+            retry_after=int(os.environ.get('REPORT_RETRY_AFTER', 5)),
+            spill_bytes=int(os.environ.get('REPORT_SPILL_BYTES', 8 * 1024 * 1024)),
+            prewarm=os.environ.get('REPORT_PREWARM', '1') == '1',
+        )
+
+    @property
+    def capacity(self) -> int:
+        """同時に受け付けられるジョブ数（実行中 + 待機中）"""
+        return self.max_workers + self.queue_limit
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # 初回利用時に起動（サーバー起動を遅くしない）
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers, initializer=_init_worker
+                )
+            return self._pool
+
+    def _acquire(self) -> bool:
+        with self._lock:
+            if self._inflight >= self.capacity:
+                return False
+            self._inflight += 1
+            return True
+
+    def _release(self, _future=None):
+        # タイムアウトしたジョブもプロセス上では完了まで走るため、
+        # 枠はジョブが実際に終わった時点で返却する
+        with self._lock:
+            self._inflight -= 1
+
+    def _reset_pool(self, broken: ProcessPoolExecutor):
+        with self._lock:
+            if self._pool is broken:
+                self._pool = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, kind: str, data: dict) -> RenderedReport:
+        """帳票生成ジョブを投入して完了を待つ"""
+        if kind not in GENERATORS:
+            raise ValueError(f"未知の帳票種別です: {kind}")
+        if not self._acquire():
+            raise ReportPoolSaturated(self.retry_after)
+
+        pool = self._get_pool()
+        try:
+            future = pool.submit(render_report, kind, data, self.spill_bytes)
+        except BrokenProcessPool:
+            self._release()
+            self._reset_pool(pool)
+            raise
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise ReportTimeout(self.timeout)
+        except BrokenProcessPool:
+            # ワーカーが異常終了した場合は次回のジョブで作り直す
+            self._reset_pool(pool)
+            raise
+
+    async def prewarm(self):
+        """ワーカーを起動してフォントを先読みし、選ばれたフォントと読込時間を記録"""
+        if not self.prewarm_enabled:
+            return
+        pool = self._get_pool()
+        futures = [
+            asyncio.wrap_future(pool.submit(warm_font)) for _ in range(self.max_workers)
+        ]
+        try:
+            results = await asyncio.gather(*futures)
+        except Exception as e:
+            print(f"[WARN] フォント先読みに失敗: {e}")
+            return
+        self.font_info = max(results, key=lambda r: r["load_ms"] or 0)
+        print(f"[OK] フォント先読み完了: {self.font_info['font']} ({self.font_info['load_ms']}ms)")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queue_limit": self.queue_limit,
+                "inflight": self._inflight,
+                "timeout": self.timeout,
+                "font": self.font_info,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+report_executor = ReportExecutor.from_env()
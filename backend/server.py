@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
@@ -10,6 +11,9 @@ from api.scheduling import endpoints as scheduling_endpoints
 from api.standings import endpoints as standings_endpoints
 from api.reports import endpoints as reports_endpoints
 from api.matches import endpoints as matches_endpoints
+from report_executor import report_executor
+from match_store import match_store
+from final_day_generator_v2 import shutdown_search_pool
 
 app = FastAPI(
     title="Urawa Cup Core API",
@@ -22,6 +26,30 @@ app.include_router(standings_endpoints.router, tags=["standings"])
 app.include_router(reports_endpoints.router, tags=["reports"])
 app.include_router(matches_endpoints.router, tags=["matches"])
 
+
+@app.on_event("startup")
+async def prewarm_report_executor():
+    # 起動をブロックしないよう、ワーカー起動とフォント先読みはバックグラウンドで行う
+    asyncio.create_task(report_executor.prewarm())
+
+
+@app.on_event("startup")
+def load_match_store_files():
+    # MATCH_STORE_FILES の試合を GET /api/matches 用に読み込む（壊れたファイルは飛ばす）
+    match_store.load_env_files()
+
+
+@app.on_event("shutdown")
+def shutdown_report_executor():
+    # 帳票生成ワーカープロセスを停止
+    report_executor.shutdown()
+
+
+@app.on_event("shutdown")
+def shutdown_final_day_search():
+    # 最終日の多スタート探索のワーカープロセスを停止
+    shutdown_search_pool()
+
 # CORS設定（フロントエンドからのアクセスを許可）
 app.add_middleware(
     CORSMiddleware,
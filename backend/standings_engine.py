@@ -0,0 +1,277 @@
+"""
+順位計算エンジン（NumPy）
+
+試合結果を列ごとの配列（ホーム/アウェイのチーム番号・得点）に詰め、
+試合数・勝分負・得失点・勝ち点を bincount でまとめて集計する。
+順位は (勝ち点, 得失点差, 総得点, チーム名) の1回の lexsort で決め、
+勝ち点・得失点差・総得点が並んだチームの塊だけを直接対決で並べ替える。
+
+直接対決: 塊のチーム同士の試合だけでミニリーグを作り、勝ち点 → 得失点差 → 総得点で並べる。
+それでも並ぶチームが残れば、その中だけで同じ手順を繰り返す（分かれなければチーム名順）。
+ミニリーグは (チーム, 相手) → 直接対決の成績 の索引から引くので、塊ごとに全試合を
+見直すことはない。
+"""
+
+from dataclasses import dataclass
+from itertools import chain
+from operator import attrgetter
+from typing import Any, Dict, Hashable, List, Mapping, Sequence, Tuple, Union
+
+import numpy as np
+
+# 1チーム分の成績のキー（レスポンスのキー順）
+STAT_FIELDS = (
+    "played", "won", "drawn", "lost",
+    "goals_for", "goals_against", "goal_difference", "points",
+)
+
+# MatchResult から列に詰める整数項目（is_b_match は 0/1）
+_MATCH_FIELDS = attrgetter("home_team_id", "away_team_id", "home_score", "away_score", "is_b_match")
+
+
+@dataclass
+class MatchArrays:
+    """試合結果の列配列（チームIDはそのまま）"""
+    home_team_id: np.ndarray
+    away_team_id: np.ndarray
+    home_score: np.ndarray
+    away_score: np.ndarray
+    is_b_match: np.ndarray
+    completed: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.home_team_id)
+
+    @classmethod
+    def from_models(cls, matches: Sequence[Any]) -> "MatchArrays":
+        """MatchResult のリストから作る"""
+        count = len(matches)
+        raw = np.fromiter(
+            chain.from_iterable(map(_MATCH_FIELDS, matches)), dtype=np.int64, count=count * 5
+        ).reshape(count, 5)
+        completed = np.fromiter((m.status == "completed" for m in matches), dtype=bool, count=count)
+        return cls(
+            home_team_id=raw[:, 0],
+            away_team_id=raw[:, 1],
+            home_score=raw[:, 2],
+            away_score=raw[:, 3],
+            is_b_match=raw[:, 4].astype(bool),
+            completed=completed,
+        )
+
+
+@dataclass
+class MatchColumns:
+    """順位計算の対象試合（チーム番号はチーム一覧でのインデックス）"""
+    home: np.ndarray
+    away: np.ndarray
+    home_score: np.ndarray
+    away_score: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.home)
+
+
+def index_teams(teams: Sequence[Dict[str, Any]]) -> Dict[Any, Dict[str, Any]]:
+    """チームID → チーム（IDが重複した場合は先に出た位置に後のデータを使う）"""
+    by_id: Dict[Any, Dict[str, Any]] = {}
+    for team in teams:
+        by_id[team["id"]] = team
+    return by_id
+
+
+def _lookup(team_index: Dict[Any, int], ids: np.ndarray) -> np.ndarray:
+    """チームIDの配列 → チーム番号の配列（一覧にないIDは -1）"""
+    if not all(type(team_id) is int for team_id in team_index):
+        # 整数以外のチームIDが混ざる場合は dict で突き合わせる
+        return np.array(
+            [team_index.get(team_id, -1) for team_id in ids.ravel().tolist()], dtype=np.int64
+        ).reshape(ids.shape)
+    keys = np.fromiter(team_index.keys(), dtype=np.int64, count=len(team_index))
+    values = np.fromiter(team_index.values(), dtype=np.int64, count=len(team_index))
+    sorter = np.argsort(keys)
+    keys, values = keys[sorter], values[sorter]
+    if len(keys) == 0:
+        return np.full(ids.shape, -1, dtype=np.int64)
+    pos = np.searchsorted(keys, ids).clip(0, len(keys) - 1)
+    return np.where(keys[pos] == ids, values[pos], -1)
+
+
+def pack_matches(matches: MatchArrays, team_index: Dict[Any, int], exclude_b_matches: bool) -> MatchColumns:
+    """集計対象の試合（完了済み・両チームが一覧にある・必要ならB戦以外）をチーム番号の列に詰める"""
+    home = _lookup(team_index, matches.home_team_id)
+    away = _lookup(team_index, matches.away_team_id)
+    keep = matches.completed & (home >= 0) & (away >= 0)
+    if exclude_b_matches:
+        keep &= ~matches.is_b_match
+    return MatchColumns(
+        home=home[keep],
+        away=away[keep],
+        home_score=matches.home_score[keep],
+        away_score=matches.away_score[keep],
+    )
+
+
+def compute_stats(n_teams: int, cols: MatchColumns) -> Dict[str, np.ndarray]:
+    """チームごとの成績を配列で集計"""
+    def count(idx: np.ndarray, weights: np.ndarray = None) -> np.ndarray:
+        out = np.bincount(idx, weights=weights, minlength=n_teams)
+        return out.astype(np.int64) if weights is not None else out
+
+    home, away = cols.home, cols.away
+    hs, as_ = cols.home_score, cols.away_score
+    home_win = hs > as_
+    away_win = hs < as_
+    draw = hs == as_
+
+    played = count(home) + count(away)
+    goals_for = count(home, hs) + count(away, as_)
+    goals_against = count(home, as_) + count(away, hs)
+    won = count(home[home_win]) + count(away[away_win])
+    lost = count(home[away_win]) + count(away[home_win])
+    drawn = count(home[draw]) + count(away[draw])
+
+    return {
+        "played": played,
+        "won": won,
+        "drawn": drawn,
+        "lost": lost,
+        "goals_for": goals_for,
+        "goals_against": goals_against,
+        "goal_difference": goals_for - goals_against,
+        "points": 3 * won + drawn,
+    }
+
+
+def pair_results(cols: MatchColumns, n_teams: int) -> Dict[Tuple[int, int], Tuple[int, int, int]]:
+    """(チーム, 相手) → そのチームから見た直接対決の (勝ち点, 得失点差, 総得点)"""
+    if len(cols) == 0:
+        return {}
+    team = np.concatenate((cols.home, cols.away))
+    opponent = np.concatenate((cols.away, cols.home))
+    gf = np.concatenate((cols.home_score, cols.away_score))
+    ga = np.concatenate((cols.away_score, cols.home_score))
+    points = np.where(gf > ga, 3, np.where(gf == ga, 1, 0))
+
+    keys, inverse = np.unique(team * n_teams + opponent, return_inverse=True)
+    sums = [
+        np.bincount(inverse, weights=values, minlength=len(keys)).astype(np.int64).tolist()
+        for values in (points, gf - ga, gf)
+    ]
+    return {divmod(key, n_teams): result for key, result in zip(keys.tolist(), zip(*sums))}
+
+
+def resolve_ties(cluster: List[Hashable], pairs: Mapping[Tuple[Hashable, Hashable], Tuple[int, int, int]]) -> List[Hashable]:
+    """並んだチームを直接対決のミニリーグで並べ替える（cluster の順が最後の決め手）"""
+    if len(cluster) < 2:
+        return cluster
+    mini = {}
+    for team in cluster:
+        points = diff = goals = 0
+        for opponent in cluster:
+            result = pairs.get((team, opponent))
+            if result is not None:
+                points += result[0]
+                diff += result[1]
+                goals += result[2]
+        mini[team] = (-points, -diff, -goals)
+
+    ordered = sorted(cluster, key=mini.__getitem__)
+    if mini[ordered[0]] == mini[ordered[-1]]:
+        # 直接対決でも分かれない
+        return cluster
+
+    result = []
+    start = 0
+    for end in range(1, len(ordered) + 1):
+        if end == len(ordered) or mini[ordered[end]] != mini[ordered[start]]:
+            result.extend(resolve_ties(ordered[start:end], pairs))
+            start = end
+    return result
+
+
+def break_ties(order: List[Hashable], primary: Mapping[Hashable, tuple], pairs) -> List[Hashable]:
+    """order の中で primary（勝ち点・得失点差・総得点）が同じ連続区間を直接対決で並べ替える"""
+    result = []
+    start = 0
+    for end in range(1, len(order) + 1):
+        if end == len(order) or primary[order[end]] != primary[order[start]]:
+            result.extend(resolve_ties(order[start:end], pairs) if end - start > 1 else order[start:end])
+            start = end
+    return result
+
+
+def rank_order(stats: Dict[str, np.ndarray], names: List[Any]) -> np.ndarray:
+    """勝ち点 → 得失点差 → 総得点 → チーム名 の順（完全に同じなら一覧順）。直接対決は含まない"""
+    name_rank = np.empty(len(names), dtype=np.int64)
+    name_rank[sorted(range(len(names)), key=names.__getitem__)] = np.arange(len(names))
+    # lexsort は最後のキーが第1キー（安定ソートなので同順位は一覧順のまま）
+    return np.lexsort((name_rank, -stats["goals_for"], -stats["goal_difference"], -stats["points"]))
+
+
+def _has_ties(stats: Dict[str, np.ndarray], order: np.ndarray) -> bool:
+    keys = np.stack([stats[field][order] for field in ("points", "goal_difference", "goals_for")])
+    return bool((keys[:, 1:] == keys[:, :-1]).all(axis=0).any())
+
+
+def calculate(
+    teams: Sequence[Dict[str, Any]],
+    matches: Union[Sequence[Any], MatchArrays],
+    use_group_system: bool = True,
+    exclude_b_matches: bool = True,
+    head_to_head: bool = True,
+) -> List[Dict[str, Any]]:
+    """試合結果（MatchResult のリストまたは MatchArrays）から順位表（1チーム1行の dict のリスト）を計算
+
+    head_to_head=False なら直接対決を使わず、勝ち点・得失点差・総得点の次はチーム名順。
+    """
+    if not isinstance(matches, MatchArrays):
+        matches = MatchArrays.from_models(matches)
+    by_id = index_teams(teams)
+    team_ids = list(by_id)
+    team_index = {team_id: i for i, team_id in enumerate(team_ids)}
+    names = [team.get("name", f"Team {team_id}") for team_id, team in by_id.items()]
+    groups = [team.get("groupId") or team.get("group_id") for team in by_id.values()]
+
+    cols = pack_matches(matches, team_index, exclude_b_matches)
+    stats = compute_stats(len(team_ids), cols)
+    base_order = rank_order(stats, names)
+    order = base_order.tolist()
+
+    columns = {field: stats[field].tolist() for field in STAT_FIELDS}
+    pairs = None
+    if head_to_head and _has_ties(stats, base_order):
+        # 並びがある場合だけ直接対決の索引を作る
+        pairs = pair_results(cols, len(team_ids))
+        primary = list(zip(columns["points"], columns["goal_difference"], columns["goals_for"]))
+        order = break_ties(order, primary, pairs)
+
+    overall_rank = [0] * len(team_ids)
+    for rank, i in enumerate(order, 1):
+        overall_rank[i] = rank
+
+    def row(i: int, group_id: Any, rank: int) -> Dict[str, Any]:
+        stat = {"team_id": team_ids[i], "team_name": names[i], "group_id": group_id}
+        for field in STAT_FIELDS:
+            stat[field] = columns[field][i]
+        stat["rank"] = rank
+        stat["overall_rank"] = overall_rank[i]
+        return stat
+
+    if not use_group_system:
+        # 全体で順位付け（新フォーマット）
+        return [row(i, groups[i], rank) for rank, i in enumerate(order, 1)]
+
+    # グループ別に順位付け（グループは一覧で最初に出た順）
+    # 直接対決はグループ内で並んだチームの間だけで比べる
+    labels = [group or "unknown" for group in groups]
+    grouped: Dict[str, List[int]] = {label: [] for label in labels}
+    for i in base_order.tolist():
+        grouped[labels[i]].append(i)
+
+    result = []
+    for label, members in grouped.items():
+        if pairs is not None:
+            members = break_ties(members, primary, pairs)
+        result.extend(row(i, label, rank) for rank, i in enumerate(members, 1))
+    return result
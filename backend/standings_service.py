@@ -0,0 +1,273 @@
+"""
+差分更新の順位表サービス（tournament_id ごとにプロセス内で保持）
+
+試合当日のスコア入力のたびに全チーム・全試合を送って作り直すのではなく、
+1試合分の結果を差分として反映する。
+
+- 反映（apply）/ 取り消し（reverse）/ 差し替え（replace）は、変更前の試合の寄与を
+  引いてから変更後の寄与を足すだけ（status の変更・B戦の切り替えも同じ扱い）
+- 成績が変わるのは対戦した2チームだけなので、その2チームをソート済みリストの中で
+  動かし、順位が動いた範囲の行だけを書き換える
+- 勝ち点・得失点差・総得点が並ぶ塊は直接対決で並べ替える。直接対決の成績は
+  (チーム, 相手) ごとに差分で持ち、動いた範囲にかかる塊だけを並べ直す
+- 変更のたびに version を1つ上げ、行ごとに最後に変わった version を記録する。
+  クライアントは前回見た version 以降に変わった行だけを取得できる
+
+順位の決め方・行の形式は standings_engine.calculate（POST /api/standings/calculate）と同じ。
+状態はこのプロセス内だけに持つ（複数ワーカーで動かす場合は振り分けを固定すること）。
+"""
+
+import threading
+from bisect import bisect_left, insort
+from operator import itemgetter
+from typing import Any, Dict, List, Sequence
+
+import standings_engine
+
+
+class StandingsNotLoaded(KeyError):
+    """tournament_id の順位表が読み込まれていない"""
+
+
+class TournamentStandings:
+    """1大会分の順位表と、集計に使った試合結果"""
+
+    def __init__(
+        self,
+        tournament_id: int,
+        teams: Sequence[Dict[str, Any]],
+        matches: Sequence[Any],
+        use_group_system: bool = True,
+        exclude_b_matches: bool = True,
+        head_to_head: bool = True,
+    ):
+        self.tournament_id = tournament_id
+        self.use_group_system = use_group_system
+        self.exclude_b_matches = exclude_b_matches
+        self.head_to_head = head_to_head
+        self.version = 1
+        self.matches: Dict[int, Any] = {m.id: m for m in matches}
+
+        rows = standings_engine.calculate(
+            teams, list(self.matches.values()), use_group_system, exclude_b_matches, head_to_head
+        )
+        # 一覧での位置（完全に同じ成績・名前のときの並び順）
+        position = {team_id: i for i, team_id in enumerate(standings_engine.index_teams(teams))}
+        self._rows: Dict[Any, Dict[str, Any]] = {row["team_id"]: row for row in rows}
+        self._position = position
+        self._row_versions: Dict[Any, int] = {team_id: self.version for team_id in self._rows}
+        self._keys: Dict[Any, tuple] = {team_id: self._sort_key(row) for team_id, row in self._rows.items()}
+
+        # (チーム, 相手) → 直接対決の [勝ち点, 得失点差, 総得点]
+        self._pairs: Dict[tuple, List[int]] = {}
+        for match in self.matches.values():
+            if self._counts(match):
+                self._add_pair(match, 1)
+
+        # 全体・グループごとのソート済みキー（直接対決を除いた並び。グループは一覧で最初に出た順）
+        self._overall: List[tuple] = sorted(self._keys.values())
+        self._groups: Dict[Any, List[tuple]] = {}
+        if use_group_system:
+            for team_id in position:
+                self._groups.setdefault(self._rows[team_id]["group_id"], []).append(self._keys[team_id])
+            for keys in self._groups.values():
+                keys.sort()
+
+    def _sort_key(self, row: Dict[str, Any]) -> tuple:
+        return (-row["points"], -row["goal_difference"], -row["goals_for"],
+                row["team_name"], self._position[row["team_id"]], row["team_id"])
+
+    # ------------------------------------------------------------------
+    # 差分の反映
+    # ------------------------------------------------------------------
+
+    def _counts(self, match: Any) -> bool:
+        """この試合が順位計算の対象か（完了済み・B戦除外・両チームが一覧にある）"""
+        if match is None or match.status != "completed":
+            return False
+        if self.exclude_b_matches and match.is_b_match:
+            return False
+        return match.home_team_id in self._rows and match.away_team_id in self._rows
+
+    def _add_pair(self, match: Any, sign: int):
+        """直接対決の成績に試合の寄与を足す / 引く（両チームの視点）"""
+        hs, as_ = match.home_score, match.away_score
+        for key, gf, ga in (((match.home_team_id, match.away_team_id), hs, as_),
+                            ((match.away_team_id, match.home_team_id), as_, hs)):
+            result = self._pairs.setdefault(key, [0, 0, 0])
+            result[0] += sign * (3 if gf > ga else 1 if gf == ga else 0)
+            result[1] += sign * (gf - ga)
+            result[2] += sign * gf
+
+    def _add(self, match: Any, sign: int):
+        """試合の寄与を足す（sign=1）/ 引く（sign=-1）"""
+        self._add_pair(match, sign)
+        hs, as_ = match.home_score, match.away_score
+        for team_id, gf, ga in ((match.home_team_id, hs, as_), (match.away_team_id, as_, hs)):
+            row = self._rows[team_id]
+            row["played"] += sign
+            row["goals_for"] += sign * gf
+            row["goals_against"] += sign * ga
+            row["goal_difference"] = row["goals_for"] - row["goals_against"]
+            if gf > ga:
+                row["won"] += sign
+                row["points"] += 3 * sign
+            elif gf < ga:
+                row["lost"] += sign
+            else:
+                row["drawn"] += sign
+                row["points"] += sign
+
+    def _rerank(self, team_ids: set):
+        """成績が変わったチームだけをソート済みリストの中で動かし、順位が動いた範囲を書き換える
+
+        直接対決で並べ替える塊がはみ出さないよう、範囲は勝ち点・得失点差・総得点が
+        同じチームの切れ目まで広げてから並べ直す。
+        """
+        moved: Dict[int, List[int]] = {}  # id(リスト) → 動いた位置の範囲 [lo, hi]
+
+        def move(keys: List[tuple], old: tuple, new: tuple):
+            i = bisect_left(keys, old)
+            del keys[i]
+            insort(keys, new)
+            j = bisect_left(keys, new)
+            span = moved.setdefault(id(keys), [len(keys), -1])
+            span[0] = min(span[0], i, j)
+            span[1] = max(span[1], i, j)
+
+        for team_id in team_ids:
+            old = self._keys[team_id]
+            new = self._sort_key(self._rows[team_id])
+            if old == new:
+                continue
+            self._keys[team_id] = new
+            move(self._overall, old, new)
+            if self.use_group_system:
+                move(self._groups[self._rows[team_id]["group_id"]], old, new)
+
+        lists = [(self._overall, "overall_rank")]
+        if self.use_group_system:
+            lists += [(keys, "rank") for keys in self._groups.values()]
+        for keys, field in lists:
+            span = moved.get(id(keys))
+            if span is None:
+                continue
+            lo = max(span[0] - 2, 0)
+            hi = min(span[1] + 2, len(keys) - 1)
+            while lo > 0 and keys[lo - 1][:3] == keys[lo][:3]:
+                lo -= 1
+            while hi < len(keys) - 1 and keys[hi + 1][:3] == keys[hi][:3]:
+                hi += 1
+            order = [key[-1] for key in keys[lo:hi + 1]]
+            if self.head_to_head:
+                primary = {key[-1]: key[:3] for key in keys[lo:hi + 1]}
+                order = standings_engine.break_ties(order, primary, self._pairs)
+            for pos, team_id in enumerate(order, lo + 1):
+                row = self._rows[team_id]
+                if row[field] != pos:
+                    row[field] = pos
+                    if not self.use_group_system:
+                        row["rank"] = pos
+                    team_ids.add(team_id)
+
+        for team_id in team_ids:
+            self._row_versions[team_id] = self.version
+
+    def replace(self, match_id: int, match: Any = None) -> List[Dict[str, Any]]:
+        """試合結果を差し替える（match=None なら取り消し、未登録なら新規反映）。変わった行を返す"""
+        old = self.matches.get(match_id)
+        touched = set()
+        if self._counts(old):
+            touched.update((old.home_team_id, old.away_team_id))
+        if self._counts(match):
+            touched.update((match.home_team_id, match.away_team_id))
+        # 同じ結果の再送信などで成績が変わらなかった行は変わった扱いにしない
+        before = {team_id: dict(self._rows[team_id]) for team_id in touched}
+        if self._counts(old):
+            self._add(old, -1)
+        if match is None:
+            self.matches.pop(match_id, None)
+        else:
+            self.matches[match_id] = match
+        if self._counts(match):
+            self._add(match, 1)
+
+        self.version += 1
+        self._rerank({team_id for team_id in touched if self._rows[team_id] != before[team_id]})
+        return self.changes_since(self.version - 1)
+
+    def apply(self, match: Any) -> List[Dict[str, Any]]:
+        """試合結果を反映（同じIDの試合があれば差し替え）"""
+        return self.replace(match.id, match)
+
+    def reverse(self, match_id: int) -> List[Dict[str, Any]]:
+        """試合結果を取り消す"""
+        return self.replace(match_id, None)
+
+    # ------------------------------------------------------------------
+    # 取得
+    # ------------------------------------------------------------------
+
+    def standings(self) -> List[Dict[str, Any]]:
+        """順位表全体（standings_engine.calculate と同じ並び）"""
+        if not self.use_group_system:
+            return sorted((self._rows[key[-1]] for key in self._overall), key=itemgetter("rank"))
+        return [
+            row
+            for keys in self._groups.values()
+            for row in sorted((self._rows[key[-1]] for key in keys), key=itemgetter("rank"))
+        ]
+
+    def changes_since(self, version: int) -> List[Dict[str, Any]]:
+        """version より後に変わった行（順位表の並び順）"""
+        return [row for row in self.standings() if self._row_versions[row["team_id"]] > version]
+
+
+class StandingsService:
+    """tournament_id → TournamentStandings"""
+
+    def __init__(self):
+        self._tournaments: Dict[int, TournamentStandings] = {}
+        self._lock = threading.Lock()
+
+    def load(
+        self, tournament_id: int, teams, matches,
+        use_group_system=True, exclude_b_matches=True, head_to_head=True,
+    ) -> TournamentStandings:
+        """全チーム・全試合から作り直して登録"""
+        standings = TournamentStandings(
+            tournament_id, teams, matches, use_group_system, exclude_b_matches, head_to_head
+        )
+        with self._lock:
+            previous = self._tournaments.get(tournament_id)
+            if previous is not None:
+                # 作り直しても version は戻さない（クライアントの差分取得が壊れないように）
+                standings.version = previous.version + 1
+                standings._row_versions = dict.fromkeys(standings._row_versions, standings.version)
+            self._tournaments[tournament_id] = standings
+        return standings
+
+    def get(self, tournament_id: int) -> TournamentStandings:
+        standings = self._tournaments.get(tournament_id)
+        if standings is None:
+            raise StandingsNotLoaded(tournament_id)
+        return standings
+
+    def apply(self, tournament_id: int, match: Any) -> List[Dict[str, Any]]:
+        """試合結果を反映（同じIDがあれば差し替え）して、変わった行を返す"""
+        standings = self.get(tournament_id)
+        with self._lock:
+            return standings.apply(match)
+
+    def reverse(self, tournament_id: int, match_id: int) -> List[Dict[str, Any]]:
+        """試合結果を取り消して、変わった行を返す"""
+        standings = self.get(tournament_id)
+        with self._lock:
+            return standings.reverse(match_id)
+
+    def discard(self, tournament_id: int) -> bool:
+        with self._lock:
+            return self._tournaments.pop(tournament_id, None) is not None
+
+
+standings_service = StandingsService()
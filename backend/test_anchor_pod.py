@@ -0,0 +1,176 @@
+"""anchor_pod（会場配置の Anchor-Pod 最適化）と /generate-venue-assignment のテスト（サーバー不要）
+
+使い方:
+    python test_anchor_pod.py
+    python -m pytest test_anchor_pod.py
+"""
+
+import random
+from itertools import permutations
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from anchor_pod import (
+    A_MATCH_PAIRS, B_MATCH_PAIRS, AnchorPodOptimizer, PodScore, PodTeam, build_optimizer, compute_pod_plan,
+)
+from api.scheduling import endpoints as scheduling_endpoints
+from api.venues import endpoints as venues_endpoints
+from bench_venue_assignment import make_teams
+
+# (チーム数, 会場数)。21×6 は 3チームの Pod、27×6 は 5チームの Pod を含む
+SIZES = [(21, 6), (24, 6), (27, 6), (48, 12)]
+
+
+def optimizer_for(n_teams: int, n_venues: int, budget_ms: int = 0, seed: int = 0) -> AnchorPodOptimizer:
+    teams, venue_ids, (banned_a, banned_b) = make_teams(n_teams, n_venues)
+    return AnchorPodOptimizer(
+        teams, venue_ids, banned_a_pairs=banned_a, banned_b_pairs=banned_b, time_budget_ms=budget_ms, seed=seed,
+    )
+
+
+def recount(optimizer: AnchorPodOptimizer, pods) -> PodScore:
+    """チームの項目と対戦禁止ペアから評価を数え直す（コスト表を使わない）"""
+    total = PodScore()
+    for pod in pods:
+        for pairs, banned, is_a in ((A_MATCH_PAIRS, optimizer.banned_a, True), (B_MATCH_PAIRS, optimizer.banned_b, False)):
+            for i, j in pairs:
+                if j >= len(pod):
+                    continue
+                x, y = optimizer.teams[pod[i]], optimizer.teams[pod[j]]
+                league = int(x.league_id is not None and x.league_id == y.league_id)
+                region = int(bool(x.region) and x.region == y.region)
+                local = int(x.local and y.local)
+                total.day1_repeat += (min(x.id, y.id), max(x.id, y.id)) in banned
+                if is_a:
+                    total.same_league += league
+                    total.same_region += region
+                    total.local_vs_local += local
+                else:
+                    total.b_same_league += league
+                    total.b_same_region += region
+                    total.b_local_vs_local += local
+    return total
+
+
+def test_best_order_matches_permutations():
+    """並びのパターンだけ試した最良の並びは、全ての並びを評価した最小と同じスコア"""
+    rng = random.Random(0)
+    for n_teams, n_venues in SIZES:
+        optimizer = optimizer_for(n_teams, n_venues)
+        for size in set(optimizer.pod_sizes):
+            for _ in range(30):
+                pod = rng.sample(range(n_teams), size)
+                cost, order = optimizer._best_order(pod)
+                assert sorted(order) == sorted(pod)
+                assert optimizer.score([order]).encode() == cost
+                assert cost == min(optimizer.score([list(p)]).encode() for p in permutations(pod))
+
+
+def test_solve_valid_assignment():
+    """全チームを1回ずつ、Pod のサイズどおりに配置し、ホストは自会場。評価は数え直しと一致"""
+    for n_teams, n_venues in SIZES:
+        for budget_ms in (0, 40):
+            optimizer = optimizer_for(n_teams, n_venues, budget_ms)
+            pods, score = optimizer.solve()
+            assert [len(pod) for pod in pods] == compute_pod_plan(n_teams, n_venues)
+            assert sorted(t for pod in pods for t in pod) == list(range(n_teams))
+            for v, venue_id in enumerate(optimizer.venue_ids):
+                hosts = [t for t in range(n_teams) if optimizer.teams[t].host_venue_id == venue_id]
+                assert all(t in pods[v] for t in hosts)
+            assert score == recount(optimizer, pods)
+
+
+def test_search_not_worse_than_greedy():
+    for n_teams, n_venues in SIZES:
+        _, greedy = optimizer_for(n_teams, n_venues, 0).solve()
+        _, searched = optimizer_for(n_teams, n_venues, 100).solve()
+        assert searched.encode() <= greedy.encode()
+        # Day1の会場をそのまま切った対戦禁止なら、探索で再戦はなくせる
+        assert searched.day1_repeat == 0
+
+
+def test_same_seed_same_result():
+    assert optimizer_for(48, 12, 40, seed=5).solve()[0] == optimizer_for(48, 12, 40, seed=5).solve()[0]
+
+
+def test_pod_size_fallback():
+    """3〜5チームで割り切れなければ teams_per_venue で揃え、収まらなければ ValueError"""
+    teams = [PodTeam(id=i + 1, league_id=i % 3) for i in range(11)]
+    optimizer = AnchorPodOptimizer(teams, [100, 101], teams_per_venue=6, time_budget_ms=0)
+    assert optimizer.pod_sizes == [6, 6]
+    pods, _ = optimizer.solve()
+    assert sorted(t for pod in pods for t in pod) == list(range(11))
+    for bad in (dict(venue_ids=[100, 101], teams_per_venue=4), dict(venue_ids=[])):
+        try:
+            AnchorPodOptimizer(teams, **bad)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"ValueError が送出されない: {bad}")
+
+
+def make_body(n_teams: int = 24, n_venues: int = 6, **options):
+    teams = [
+        {
+            "id": i, "name": f"チーム{i:02d}", "region": f"地域{i % 4}", "leagueId": i % 6,
+            "teamType": "local" if i % 3 == 0 else "invited",
+            "isHost": i <= n_venues, "hostVenueId": 100 + i if i <= n_venues else None,
+        }
+        for i in range(1, n_teams + 1)
+    ]
+    venues = [{"id": 100 + v, "name": f"会場{v}"} for v in range(1, n_venues + 1)]
+    body = {
+        "teams": teams, "venues": venues, "timeBudgetMs": 30,
+        "day1Assignments": {101: [1, 7, 13, 19], 102: [2, 8, 14, 20]}, "bannedPairs": [[3, 9]],
+    }
+    body.update(options)
+    return body
+
+
+def test_endpoint():
+    """/generate-venue-assignment: 全チームを配置し、以前からの anchor_pod（venues の API）と同じ結果。不正な入力は400"""
+    app = FastAPI()
+    app.include_router(scheduling_endpoints.router)
+    app.include_router(venues_endpoints.router)
+    client = TestClient(app)
+
+    body = make_body()
+    response = client.post("/generate-venue-assignment", json=body)
+    assert response.status_code == 200
+    data = response.json()
+    assert sorted(a["teamId"] for a in data["assignments"]) == list(range(1, 25))
+    hosts = {(a["venueId"], a["teamId"]) for a in data["assignments"] if a["teamId"] <= 6}
+    assert hosts == {(100 + i, i) for i in range(1, 7)}
+    assert data["score"]["day1Repeat"] == 0
+
+    legacy = client.post(
+        "/api/venue-assignments/auto-generate-with-data",
+        json={**body, "tournamentId": 1, "strategy": "anchor_pod"},
+    ).json()
+    assert [(a["venueId"], a["teamId"], a["slotOrder"]) for a in data["assignments"]] == [
+        (a["venue_id"], a["team_id"], a["slot_order"]) for a in legacy["assignments"]
+    ]
+    assert legacy["score"] == data["score"]
+
+    for options in ({"bannedPairs": [[1, 2, 3]]}, {"bannedPairs": [[1]]}, {"teams": []}, {"venues": []}):
+        assert client.post("/generate-venue-assignment", json=make_body(**options)).status_code == 400
+    try:
+        build_optimizer([], [100], banned_pairs=[[1, 2, 3]])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("bannedPairs の不正な要素で ValueError が送出されない")
+
+
+if __name__ == "__main__":
+    test_best_order_matches_permutations()
+    print("✓ 並びのパターンと全ての並びの評価が一致: OK")
+    test_solve_valid_assignment()
+    test_search_not_worse_than_greedy()
+    test_same_seed_same_result()
+    test_pod_size_fallback()
+    print("✓ 配置と評価の数え直し: OK")
+    test_endpoint()
+    print("✓ /generate-venue-assignment: OK")
+    print("All tests passed.")
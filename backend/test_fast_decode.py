@@ -0,0 +1,166 @@
+"""fast_decode（FAST_DECODE=1 の本文デコード）のテスト（サーバー不要）
+
+使い方:
+    python test_fast_decode.py
+    python -m pytest test_fast_decode.py
+
+FAST_DECODE はルートを作るときに読むので、fast_decode.ENABLED を切り替えてから
+ルーターをアプリに取り込み直し、両方のアプリで同じ本文の応答が一致することを確かめる。
+"""
+
+import json
+import random
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import fast_decode
+import standings_engine
+from api.standings import endpoints as standings_endpoints
+from api.matches import endpoints as matches_endpoints
+from api.standings.endpoints import CalculateStandingsRequest, _fast_calculate_body
+from bench_decode import make_body
+
+
+def make_app(enabled: bool, calls: list = None) -> FastAPI:
+    """FAST_DECODE を enabled にしたときのアプリ（calls を渡すと前処理の呼び出しを記録する）"""
+    saved = fast_decode.ENABLED
+    patched = []
+    if calls is not None:
+        for endpoint in (standings_endpoints.calculate_standings, standings_endpoints.calculate_bulk_standings,
+                         matches_endpoints.filter_matches):
+            def spy(payload, prepare=endpoint.fast_body, name=endpoint.__name__):
+                prepared = prepare(payload)
+                calls.append((name, prepared is not None))
+                return prepared
+            patched.append((endpoint, endpoint.fast_body))
+            endpoint.fast_body = spy
+    fast_decode.ENABLED = enabled
+    try:
+        app = FastAPI()
+        app.include_router(standings_endpoints.router)
+        app.include_router(matches_endpoints.router)
+    finally:
+        fast_decode.ENABLED = saved
+        for endpoint, prepare in patched:
+            endpoint.fast_body = prepare
+    return app
+
+
+def response_of(client: TestClient, path: str, body, content_type: str = "application/json"):
+    data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+    response = client.post(path, content=data, headers={"content-type": content_type})
+    if response.headers.get("content-type", "").startswith("application/x-ndjson"):
+        # 一括計算は終わった順に返すので本文の順に並べ直す
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        return response.status_code, sorted(lines, key=lambda line: line.get("index", len(lines)))
+    return response.status_code, response.json()
+
+
+def calculate_bodies():
+    body = json.loads(make_body(random.Random(1), 300))
+    string_score = json.loads(json.dumps(body))
+    string_score["matches"][0]["homeScore"] = "2"
+    snake_case = json.loads(json.dumps(body))
+    snake_case["matches"][0] = {
+        "id": 0, "home_team_id": 1, "away_team_id": 2, "home_score": 1, "away_score": 0,
+    }
+    bad_team = json.loads(json.dumps(body))
+    bad_team["teams"] = "なし"
+    missing = {k: v for k, v in body.items() if k != "tournamentId"}
+    return [body, string_score, snake_case, bad_team, missing, {"matches": "x"}, [], b"{", b""]
+
+
+def test_match_arrays_same_standings():
+    """試合リストを MatchArrays に直接詰めても、モデルで検証した場合と同じ順位表"""
+    body = make_body(random.Random(42), 2000)
+    strict = CalculateStandingsRequest.model_validate(json.loads(body))
+    slim, arrays = _fast_calculate_body(fast_decode.loads(body))
+    request = CalculateStandingsRequest.model_validate(slim)
+    assert isinstance(arrays, standings_engine.MatchArrays)
+    assert request.matches == []
+    for use_group_system in (True, False):
+        for exclude_b_matches in (True, False):
+            assert standings_engine.calculate(strict.teams, strict.matches, use_group_system, exclude_b_matches) == \
+                standings_engine.calculate(request.teams, arrays, use_group_system, exclude_b_matches)
+
+
+def test_match_arrays_falls_back():
+    """変換が要る値・キーの欠け・snake_case のキーなら None（通常の検証に任せる）"""
+    row = {"id": 1, "homeTeamId": 1, "awayTeamId": 2, "homeScore": 1, "awayScore": 0}
+    assert fast_decode.match_arrays([row]) is not None
+    assert fast_decode.match_arrays([]) is not None
+    assert fast_decode.match_arrays([{**row, "homeScore": "1"}]) is None
+    assert fast_decode.match_arrays([{**row, "isBMatch": 1}]) is None
+    assert fast_decode.match_arrays([{k: v for k, v in row.items() if k != "id"}]) is None
+    assert fast_decode.match_arrays([{"id": 1, "home_team_id": 1, "away_team_id": 2,
+                                      "home_score": 1, "away_score": 0}]) is None
+    assert fast_decode.match_arrays([{**row, "homeScore": 1 << 70}]) is None
+    assert fast_decode.match_arrays([row, [1]]) is None
+    assert fast_decode.match_arrays({"matches": []}) is None
+
+
+def test_is_json():
+    assert fast_decode.is_json(None)
+    assert fast_decode.is_json("application/json; charset=utf-8")
+    assert fast_decode.is_json("application/vnd.api+json")
+    assert not fast_decode.is_json("text/plain")
+    assert not fast_decode.is_json("application/x-www-form-urlencoded")
+
+
+def test_endpoints_same_response():
+    """FAST_DECODE=0 と 1 で、正常・422 のどちらも応答が一致する"""
+    calls = []
+    normal = TestClient(make_app(False))
+    fast = TestClient(make_app(True, calls))
+
+    bodies = calculate_bodies()
+    cases = [("/api/standings/calculate", body) for body in bodies]
+    cases += [("/api/standings/bulk", {"tournaments": [body, body]}) for body in bodies[:5]]
+    cases.append(("/api/standings/bulk", {"tournaments": [bodies[0]] * 5}))  # スレッドプールで並列
+    matches = bodies[0]["matches"]
+    filter_params = {"tournamentId": 1, "matchDay": 2, "excludeBMatches": True}
+    cases += [
+        ("/api/matches/filter", {"filter_params": filter_params, "matches": matches}),
+        ("/api/matches/filter?limit=5&fields=id,matchDay", {"filter_params": filter_params, "matches": matches}),
+        ("/api/matches/filter", {"filter_params": {"matchDay": 2}, "matches": matches}),
+        ("/api/matches/filter", {"filter_params": filter_params, "matches": [1, 2]}),
+    ]
+    for path, body in cases:
+        assert response_of(normal, path, body) == response_of(fast, path, body), path
+
+    # JSON でない Content-Type は前処理せず、通常と同じエラー
+    body = make_body(random.Random(2), 10)
+    calls.clear()
+    assert response_of(normal, "/api/standings/calculate", body, "text/plain") == \
+        response_of(fast, "/api/standings/calculate", body, "text/plain")
+    assert calls == []
+
+
+def test_fast_path_used():
+    """FAST_DECODE=1 なら前処理が通り、0 なら前処理を呼ばない"""
+    body = json.loads(make_body(random.Random(3), 50))
+    calls = []
+    client = TestClient(make_app(True, calls))
+    assert client.post("/api/standings/calculate", json=body).status_code == 200
+    assert client.post("/api/matches/filter", json={"filter_params": {"tournamentId": 1},
+                                                    "matches": body["matches"]}).status_code == 200
+    assert calls == [("calculate_standings", True), ("filter_matches", True)]
+
+    calls.clear()
+    client = TestClient(make_app(False, calls))
+    assert client.post("/api/standings/calculate", json=body).status_code == 200
+    assert calls == []
+
+
+if __name__ == "__main__":
+    test_match_arrays_same_standings()
+    print("✓ MatchArrays の順位表: OK")
+    test_match_arrays_falls_back()
+    test_is_json()
+    print("✓ 通常の検証に戻す条件: OK")
+    test_endpoints_same_response()
+    print("✓ FAST_DECODE=0/1 の応答が一致: OK")
+    test_fast_path_used()
+    print("✓ 前処理の有無: OK")
+    print("All tests passed.")
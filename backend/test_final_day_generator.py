@@ -0,0 +1,131 @@
+"""final_day_generator_v2 の決勝トーナメント（7グループ以上の山）のテスト（サーバー不要）
+
+使い方:
+    python test_final_day_generator.py
+    python -m pytest test_final_day_generator.py
+"""
+
+from final_day_generator_v2 import FinalDayGenerator, MatchType, Team, TournamentConfig
+
+
+def make_standings(num_groups: int, teams_per_group: int = 4, runner_up_points=None):
+    """グループ順（A が最強）に1位の成績が下がる順位表。runner_up_points で2位の勝点を指定できる"""
+    standings = {}
+    team_id = 1
+    for g in range(num_groups):
+        group = chr(65 + g)
+        teams = []
+        for rank in range(1, teams_per_group + 1):
+            points = 30 - g - rank * 5
+            if rank == 2 and runner_up_points is not None:
+                points = runner_up_points[g]
+            teams.append(Team(team_id, f"{group}{rank}チーム", group, rank, points, 0, 0))
+            team_id += 1
+        standings[group] = teams
+    return standings
+
+
+def bracket(num_groups: int, wildcard_runners_up: int = 0, runner_up_points=None):
+    config = TournamentConfig(num_groups=num_groups, wildcard_runners_up=wildcard_runners_up)
+    generator = FinalDayGenerator(make_standings(num_groups, runner_up_points=runner_up_points), [], config)
+    return generator, generator._generate_tournament()
+
+
+def team_seeds(generator):
+    """進出チームのシード順（1位 → 2位、それぞれ勝点順）"""
+    return [t.team_id for t in sorted(
+        (t for group in generator.standings.values() for t in group if t.team_id in generator.qualifier_ids),
+        key=lambda t: (t.rank, -t.points),
+    )]
+
+
+def test_bracket_7_groups():
+    generator, matches = bracket(7)
+    assert [m.match_id for m in matches] == [
+        "final-qf1", "final-qf2", "final-qf3", "final-sf1", "final-sf2", "final-3rd", "final-final",
+    ]
+    seeds = team_seeds(generator)
+    # 8の山: 位置の順は シード 1,8,4,5,2,7,3,6。シード1（8はいない）は不戦勝
+    qf = matches[:3]
+    assert [(m.home_team.team_id, m.away_team.team_id) for m in qf] == [
+        (seeds[3], seeds[4]), (seeds[1], seeds[6]), (seeds[2], seeds[5]),
+    ]
+    sf1, sf2 = matches[3:5]
+    assert sf1.home_team.team_id == seeds[0] and sf1.away_seed == "QF1勝者"
+    assert (sf2.home_seed, sf2.away_seed) == ("QF2勝者", "QF3勝者")
+    assert (sf1.match_type, sf2.match_type) == (MatchType.SEMIFINAL1, MatchType.SEMIFINAL2)
+    assert (matches[-1].home_seed, matches[-1].away_seed) == ("SF1勝者", "SF2勝者")
+    assert (matches[-2].home_seed, matches[-2].away_seed) == ("SF1敗者", "SF2敗者")
+    assert [m.kickoff for m in matches] == ["9:30"] * 3 + ["11:00"] * 2 + ["12:30", "14:00"]
+    assert any("1回戦不戦勝" in w for w in generator.warnings)
+
+
+def test_bracket_8_groups():
+    generator, matches = bracket(8)
+    seeds = team_seeds(generator)
+    assert [m.match_id for m in matches][:4] == ["final-qf1", "final-qf2", "final-qf3", "final-qf4"]
+    assert all(m.match_type == MatchType.QUARTERFINAL for m in matches[:4])
+    # 不戦勝なし。1 vs 8, 4 vs 5, 2 vs 7, 3 vs 6
+    assert [(m.home_team.team_id, m.away_team.team_id) for m in matches[:4]] == [
+        (seeds[0], seeds[7]), (seeds[3], seeds[4]), (seeds[1], seeds[6]), (seeds[2], seeds[5]),
+    ]
+    assert len(matches) == 8
+    assert not any("不戦勝" in w for w in generator.warnings)
+
+
+def test_bracket_10_groups():
+    generator, matches = bracket(10)
+    seeds = team_seeds(generator)
+    # 16の山: 位置の順は 1,16,8,9,4,13,5,12,2,15,7,10,3,14,6,11。1回戦は 8 vs 9 と 7 vs 10 だけ
+    assert [m.match_id for m in matches] == [
+        "final-r16-1", "final-r16-2",
+        "final-qf1", "final-qf2", "final-qf3", "final-qf4",
+        "final-sf1", "final-sf2", "final-3rd", "final-final",
+    ]
+    r16 = matches[:2]
+    assert all(m.match_type == MatchType.KNOCKOUT for m in r16)
+    assert [(m.home_team.team_id, m.away_team.team_id) for m in r16] == [
+        (seeds[7], seeds[8]), (seeds[6], seeds[9]),
+    ]
+    # 準々決勝: シード1 vs R16-1勝者、4 vs 5、2 vs R16-2勝者、3 vs 6
+    qf = matches[2:6]
+    assert [(m.home_team.team_id, m.away_seed) for m in qf[::2]] == [(seeds[0], "R16-1勝者"), (seeds[1], "R16-2勝者")]
+    assert [(m.home_team.team_id, m.away_team.team_id) for m in qf[1::2]] == [
+        (seeds[3], seeds[4]), (seeds[2], seeds[5]),
+    ]
+    assert [m.kickoff for m in matches] == ["9:30"] * 2 + ["11:00"] * 4 + ["12:30"] * 2 + ["14:00", "15:30"]
+    assert any("10チームで決勝T" in w and "シード上位6チーム" in w for w in generator.warnings)
+
+
+def test_wildcard_runner_up_avoids_own_group():
+    """2位が1回戦で同じグループの1位と当たる配置は入れ替える。進出した2位は研修試合から外す"""
+    # 7グループ + 2位1チーム = 8チーム。A組の2位が最上位の2位（シード8）なので、そのままだとシード1（A1）と当たる
+    points = [29] + [0] * 6
+    generator, matches = bracket(7, wildcard_runners_up=1, runner_up_points=points)
+    a1, a2 = generator.standings["A"][0], generator.standings["A"][1]
+    assert a2.team_id in generator.qualifier_ids
+    opening = matches[:4]
+    assert all(m.home_team.group != m.away_team.group for m in opening)
+    assert {t.team_id for m in opening for t in (m.home_team, m.away_team)} == generator.qualifier_ids
+    assert a2.team_id not in {t.team_id for t in generator._training_teams()}
+    assert generator.standings["B"][1].team_id in {t.team_id for t in generator._training_teams()}
+    assert a1.team_id not in {t.team_id for t in generator._training_teams()}
+
+
+def test_six_groups_unchanged():
+    """6グループ以下は以前の形式のまま（山を使わない）"""
+    generator, matches = bracket(6)
+    assert not any(m.match_type == MatchType.QUARTERFINAL for m in matches)
+    assert {m.match_type for m in matches} >= {MatchType.FINAL, MatchType.THIRD_PLACE}
+
+
+if __name__ == "__main__":
+    test_bracket_7_groups()
+    test_bracket_8_groups()
+    test_bracket_10_groups()
+    print("✓ 7・8・10グループの山とシード・不戦勝: OK")
+    test_wildcard_runner_up_avoids_own_group()
+    print("✓ 2位の進出と同じグループの回避: OK")
+    test_six_groups_unchanged()
+    print("✓ 6グループ以下: OK")
+    print("All tests passed.")
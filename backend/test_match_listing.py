@@ -0,0 +1,151 @@
+"""match_listing（ページ分割・項目の絞り込み・NDJSON）のテスト（サーバー不要）
+
+使い方:
+    python test_match_listing.py
+    python -m pytest test_match_listing.py
+"""
+
+import base64
+import json
+import random
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from match_listing import decode_cursor, encode_cursor, paginate, sort_matches
+from api.matches import endpoints as matches_endpoints
+
+
+def make_matches(rng: random.Random, n_matches: int):
+    """キーの表記・時刻の桁・値の欠けを混ぜた試合"""
+    matches = []
+    for k in range(n_matches):
+        match = {"id": k + 1, "matchDay": rng.randint(1, 3), "homeScore": rng.randint(0, 3)}
+        if rng.random() < 0.9:
+            match["match_date" if rng.random() < 0.5 else "matchDate"] = f"2025-03-{rng.randint(29, 31)}"
+        if rng.random() < 0.9:
+            match["matchTime"] = f"{rng.randint(9, 15)}:{rng.choice(['00', '30'])}"
+        if rng.random() < 0.9:
+            match["venueId"] = rng.randint(1, 4)
+        if rng.random() < 0.5:
+            match["venueName"] = f"会場{rng.randint(1, 4)}"
+        if rng.random() < 0.8:
+            match["matchOrder"] = rng.randint(1, 6)
+        matches.append(match)
+    # 同じ試合の重複（並び順の項目がすべて同じ）も入れる
+    matches.append(dict(matches[0]))
+    return matches
+
+
+def walk(items, keys, limit):
+    """limit 件ずつ最後までたどる"""
+    pages, cursor = [], None
+    while True:
+        page, cursor = paginate(items, keys, cursor, limit)
+        pages.append(list(page))
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip():
+    matches = make_matches(random.Random(0), 200)
+    _, keys = sort_matches(matches)
+    for key in keys:
+        cursor = encode_cursor(key)
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == key
+
+
+def test_pages_cover_all():
+    """どの limit でも、ページをつなぐと全件を並び順に1回ずつ"""
+    matches = make_matches(random.Random(1), 120)
+    order, keys = sort_matches(matches)
+    assert keys == sorted(keys)
+    for limit in (1, 7, 50, 120, 121, 1000):
+        pages = walk(order, keys, limit)
+        assert [i for page in pages for i in page] == order
+        assert all(len(page) == limit for page in pages[:-1])
+    assert paginate(order, keys, None, None) == (order, None)
+    assert paginate([], [], None, 10) == ([], None)
+
+
+def test_cursor_stable_when_matches_change():
+    """カーソルは位置ではなく並び順のキーなので、前のページで試合が増減しても続きがずれない"""
+    matches = make_matches(random.Random(2), 60)
+    order, keys = sort_matches(matches)
+    first, cursor = paginate(order, keys, None, 20)
+    rest = [matches[i] for i in paginate(order, keys, cursor, None)[0]]
+
+    # 1ページ目の試合を取り消し、結果を入力し、前の日付の試合を追加する
+    changed = [m for i, m in enumerate(matches) if i != first[0]]
+    for m in changed:
+        m["homeScore"] = 9
+    changed.insert(0, {"id": 999, "matchDate": "2025-01-01", "matchTime": "09:00", "venueId": 1, "matchOrder": 1})
+    order, keys = sort_matches(changed)
+    assert [changed[i]["id"] for i in paginate(order, keys, cursor, None)[0]] == [m["id"] for m in rest]
+
+
+def test_bad_cursor():
+    def encoded(value) -> str:
+        return base64.urlsafe_b64encode(json.dumps(value).encode("utf-8")).decode("ascii")
+
+    good = list(sort_matches(make_matches(random.Random(3), 5))[1][0])
+    bad_cursors = [
+        "", "!!!", "e30", encoded({}), encoded(good[:-1]), encoded(good + [0]),
+        encoded(good[:-1] + ["0"]), encoded([0] + good[1:]), encoded(good[:5] + [1.5] + good[6:]),
+    ]
+    for cursor in bad_cursors:
+        try:
+            decode_cursor(cursor)
+        except HTTPException as e:
+            assert e.status_code == 400
+        else:
+            raise AssertionError(f"不正なカーソルが通る: {cursor!r}")
+
+
+def test_filter_endpoint_pages():
+    """/api/matches/filter: ページをつなぐと絞り込んだ全件。fields・NDJSON・不正なカーソルの400"""
+    app = FastAPI()
+    app.include_router(matches_endpoints.router)
+    client = TestClient(app)
+    matches = make_matches(random.Random(4), 90)
+    body = {"filter_params": {"tournamentId": 1, "matchDay": 2}, "matches": matches}
+    order, _ = sort_matches(matches)
+    expected = [matches[i]["id"] for i in order if matches[i]["matchDay"] == 2]
+
+    ids, cursor = [], None
+    while True:
+        params = {"limit": 4, "fields": "id,matchTime"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.post("/api/matches/filter", params=params, json=body)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == len(expected)
+        assert all(set(m) <= {"id", "matchTime"} for m in data["matches"])
+        ids += [m["id"] for m in data["matches"]]
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    assert ids == expected
+
+    response = client.post("/api/matches/filter", params={"format": "ndjson", "indicesOnly": "true"}, json=body)
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[-1] == {"done": True, "total": len(expected), "count": len(expected), "next_cursor": None}
+    assert [matches[i]["id"] for i in lines[:-1]] == [m["id"] for m in matches if m["matchDay"] == 2]
+
+    response = client.post("/api/matches/filter", params={"limit": 4, "cursor": "abc"}, json=body)
+    assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    test_cursor_round_trip()
+    print("✓ カーソルの往復: OK")
+    test_pages_cover_all()
+    test_cursor_stable_when_matches_change()
+    print("✓ ページ分割: OK")
+    test_bad_cursor()
+    print("✓ 不正なカーソル: OK")
+    test_filter_endpoint_pages()
+    print("✓ /api/matches/filter: OK")
+    print("All tests passed.")
@@ -0,0 +1,241 @@
+"""match_store（試合のインメモリストア）のテスト（サーバー不要）
+
+使い方:
+    python test_match_store.py
+    python -m pytest test_match_store.py
+"""
+
+import itertools
+import json
+import os
+import random
+import tempfile
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from match_store import MatchRowError, MatchStore, compile_filter, match_store, normalize_match
+from api.matches import endpoints as matches_endpoints
+
+
+def make_rows(rng: random.Random, n_matches: int):
+    """Supabase の行（snake_case）と手入力の行（camelCase・文字列の値）を混ぜる"""
+    rows = []
+    for k in range(n_matches):
+        row = {
+            "id": k + 1,
+            "match_day": rng.choice([1, 2, 3]),
+            "group_id": rng.choice(["A", "B", "C", None]),
+            "stage": rng.choice(["preliminary", "training", "final"]),
+            "venue_id": rng.choice([10, 11, 12]),
+            "is_b_match": rng.random() < 0.2,
+            "match_time": f"{rng.randint(9, 15):02d}:{rng.choice(['00', '30'])}",
+            "match_order": rng.randint(1, 6),
+        }
+        if rng.random() < 0.3:
+            row = {
+                "id": str(row["id"]), "matchDay": str(row["match_day"]), "groupId": row["group_id"] or "",
+                "stage": {"preliminary": "予選", "training": "研修", "final": "決勝"}[row["stage"]],
+                "venueId": row["venue_id"], "isBMatch": "○" if row["is_b_match"] else "",
+                "matchTime": row["match_time"], "matchOrder": row["match_order"],
+            }
+        rows.append(row)
+    return rows
+
+
+def legacy_filter(matches, match_day=None, is_b_match=None, group_id=None, stage=None, venue_id=None,
+                  exclude_b_matches=False):
+    """以前の /api/matches/filter（条件ごとにリストを作り直す）。比較用"""
+    filtered = matches
+    if match_day is not None:
+        filtered = [m for m in filtered if m.get("match_day") == match_day or m.get("matchDay") == match_day]
+    if is_b_match is not None:
+        filtered = [m for m in filtered if m.get("is_b_match") == is_b_match or m.get("isBMatch") == is_b_match]
+    if exclude_b_matches:
+        filtered = [m for m in filtered if not (m.get("is_b_match") or m.get("isBMatch"))]
+    if group_id is not None:
+        filtered = [m for m in filtered if m.get("group_id") == group_id or m.get("groupId") == group_id]
+    if stage is not None:
+        filtered = [m for m in filtered if m.get("stage") == stage]
+    if venue_id is not None:
+        filtered = [m for m in filtered if m.get("venue_id") == venue_id or m.get("venueId") == venue_id]
+    return filtered
+
+
+def make_client_rows(rng: random.Random, n_matches: int):
+    """クライアントが送る試合の dict（項目ごとに snake_case / camelCase / None の snake_case + camelCase / なし）
+
+    同じ項目を snake_case と camelCase の両方に別の値で入れた行は作らない
+    （その場合、以前の実装はどちらかが一致すれば該当、compile_filter は snake_case を優先する）。
+    """
+    rows = []
+    for _ in range(n_matches):
+        row = {}
+        for field, camel, values in (
+            ("match_day", "matchDay", [1, 2, 3, None]),
+            ("group_id", "groupId", ["A", "B", None]),
+            ("venue_id", "venueId", [1, 2, None]),
+            ("stage", None, ["preliminary", "final", None]),
+            ("is_b_match", "isBMatch", [True, False, None, 0, 1]),
+        ):
+            r = rng.random()
+            if r < 0.4 or camel is None:
+                if r < 0.9:
+                    row[field] = rng.choice(values)
+            elif r < 0.8:
+                row[camel] = rng.choice(values)
+            elif r < 0.9:
+                row[field] = None
+                row[camel] = rng.choice(values)
+        rows.append(row)
+    return rows
+
+
+def test_compile_filter_matches_legacy():
+    """compile_filter は以前の条件ごとの絞り込みと同じ試合を同じ順で選ぶ"""
+    rows = make_client_rows(random.Random(0), 400)
+    for match_day, is_b_match, group_id, stage, venue_id, exclude_b_matches in itertools.product(
+        [None, 1, 2], [None, True, False], [None, "A"], [None, "final"], [None, 1], [False, True],
+    ):
+        filters = dict(match_day=match_day, is_b_match=is_b_match, group_id=group_id, stage=stage,
+                       venue_id=venue_id, exclude_b_matches=exclude_b_matches)
+        expected = legacy_filter(rows, **filters)
+        assert [rows[i] for i in compile_filter(**filters, camel_case=True)(rows)] == expected, filters
+
+
+def test_compile_filter_snake_case_only():
+    """camel_case=False（ストアの正規化済みの試合）なら camelCase のキーは見ない"""
+    rows = [{"match_day": 1}, {"matchDay": 1}, {"match_day": None, "matchDay": 1}]
+    assert compile_filter(match_day=1)(rows) == [0]
+    assert compile_filter(match_day=1, camel_case=True)(rows) == [0, 1, 2]
+    assert compile_filter(is_b_match=True, exclude_b_matches=True, camel_case=True)(rows) == []
+    assert compile_filter()(rows) == [0, 1, 2]
+
+
+def test_normalize_match():
+    match = normalize_match({"matchDay": " 2 ", "isBMatch": "○", "groupId": "", "stage": "準決勝", "venueId": 3})
+    assert match == {"match_day": 2, "is_b_match": True, "group_id": None, "stage": "semifinal", "venue_id": 3}
+    # B戦フラグがなければ False。snake_case と camelCase の両方があれば先に出た方
+    assert normalize_match({"match_day": 1, "matchDay": 2}) == {"match_day": 1, "is_b_match": False}
+
+
+def test_normalize_match_bad_int():
+    """整数の列が整数にできなければ MatchRowError（行の位置と送られたキー）"""
+    for value in ("2日目", "1.5", [1], {"day": 1}):
+        try:
+            normalize_match({"id": 1, "matchDay": value}, row=4)
+        except MatchRowError as e:
+            assert (e.row, e.field, e.value) == (4, "matchDay", value)
+            assert "matches[4].matchDay" in str(e)
+        else:
+            raise AssertionError(f"MatchRowError が送出されない: {value!r}")
+
+
+def test_positions_match_scan():
+    """索引の積集合は、並べた試合を条件で1件ずつ調べた結果と一致する"""
+    store = MatchStore()
+    table = store.load(1, make_rows(random.Random(0), 600))
+    assert len(table) == 600
+    assert table.keys == sorted(table.keys)
+    for match_day, group_id, stage, venue_id, is_b_match in itertools.product(
+        [None, 1, 3], [None, "A", "C"], [None, "preliminary", "semifinal"], [None, 11], [None, True, False],
+    ):
+        filters = dict(match_day=match_day, group_id=group_id, stage=stage, venue_id=venue_id, is_b_match=is_b_match)
+        assert table.positions(**filters) == compile_filter(**filters)(table.matches), filters
+
+
+def test_load_replaces_only_when_valid():
+    """読み込み直すと置き換え。不正な行があれば例外で、前の試合のまま"""
+    store = MatchStore()
+    store.load(1, [{"id": 1, "match_day": 1}])
+    store.load(1, [{"id": 2, "match_day": 2}, {"id": 3, "match_day": 2}])
+    assert [m["id"] for m in store.query(1, match_day=2)] == [2, 3]
+    try:
+        store.load(1, [{"id": 4}, {"id": 5, "venueId": "会場A"}])
+    except MatchRowError as e:
+        assert (e.row, e.field) == (1, "venueId")
+    else:
+        raise AssertionError("MatchRowError が送出されない")
+    assert len(store.get(1)) == 2
+    assert store.query(2) == []
+
+
+def test_load_env_files():
+    """MATCH_STORE_FILES の読めない・不正なファイルは飛ばして残りを読み込む"""
+    with tempfile.TemporaryDirectory() as tmp:
+        good_json = os.path.join(tmp, "matches.json")
+        with open(good_json, "w", encoding="utf-8") as f:
+            json.dump([{"id": 1, "tournament_id": 7, "match_day": 1}, {"id": 2, "tournament_id": 8}], f)
+        good_csv = os.path.join(tmp, "day3_matches.csv")
+        with open(good_csv, "w", encoding="utf-8") as f:
+            f.write("日付,時間,会場ID,グループ,B戦,ステージ,試合日\n2025-03-31,09:00,1,A,,予選,3\n")
+        broken = os.path.join(tmp, "broken.json")
+        with open(broken, "w", encoding="utf-8") as f:
+            f.write("[{")
+        bad_row = os.path.join(tmp, "bad_row.json")
+        with open(bad_row, "w", encoding="utf-8") as f:
+            json.dump([{"id": 1, "tournament_id": 9, "match_day": "初日"}], f)
+        missing = os.path.join(tmp, "missing.json")
+
+        saved = {key: os.environ.get(key) for key in ("MATCH_STORE_FILES", "MATCH_STORE_TOURNAMENT_ID")}
+        os.environ["MATCH_STORE_FILES"] = ", ".join([broken, good_json, missing, bad_row, good_csv])
+        os.environ["MATCH_STORE_TOURNAMENT_ID"] = "3"
+        try:
+            store = MatchStore()
+            store.load_env_files()
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+    assert sorted(store.tournaments()) == [3, 7, 8]
+    assert store.query(3)[0]["stage"] == "preliminary"
+    assert store.query(3)[0]["match_day"] == 3
+
+
+def test_load_endpoint():
+    """POST /api/matches/load: 整数にできない値は400で行と項目を返す。読み込んだ試合を GET で引ける"""
+    app = FastAPI()
+    app.include_router(matches_endpoints.router)
+    client = TestClient(app)
+    tournament_id = 990001
+    try:
+        rows = make_rows(random.Random(1), 50)
+        response = client.post("/api/matches/load", json={"tournamentId": tournament_id, "matches": rows})
+        assert response.status_code == 200
+        assert response.json()["total"] == 50
+
+        for field, value in (("matchDay", "2日目"), ("id", "x"), ("venueId", "1.5")):
+            bad = rows[:3] + [{"id": 99, field: value}]
+            response = client.post("/api/matches/load", json={"tournamentId": tournament_id, "matches": bad})
+            assert response.status_code == 400
+            assert f"matches[3].{field}" in response.json()["detail"]
+        assert len(match_store.get(tournament_id)) == 50
+
+        response = client.get("/api/matches", params={"tournamentId": tournament_id, "matchDay": 2,
+                                                      "excludeBMatches": "true"})
+        assert response.status_code == 200
+        expected = [m for m in match_store.get(tournament_id).matches if m["match_day"] == 2 and not m["is_b_match"]]
+        assert response.json()["matches"] == expected
+        assert client.get("/api/matches", params={"tournamentId": tournament_id + 1}).status_code == 404
+    finally:
+        match_store._tables.pop(tournament_id, None)
+
+
+if __name__ == "__main__":
+    test_normalize_match()
+    test_normalize_match_bad_int()
+    print("✓ 行の正規化: OK")
+    test_positions_match_scan()
+    print("✓ 索引と走査が一致: OK")
+    test_compile_filter_matches_legacy()
+    test_compile_filter_snake_case_only()
+    print("✓ compile_filter: OK")
+    test_load_replaces_only_when_valid()
+    test_load_env_files()
+    print("✓ 読み込み: OK")
+    test_load_endpoint()
+    print("✓ POST /api/matches/load・GET /api/matches: OK")
+    print("All tests passed.")
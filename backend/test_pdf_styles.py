@@ -0,0 +1,103 @@
+"""帳票のスタイル共有（pdf_utils.StyleTemplates）のテスト（サーバー不要）
+
+使い方:
+    python test_pdf_styles.py
+    python -m pytest test_pdf_styles.py
+
+スタイルを毎回組み立て直した場合（以前の動作相当）と、組み立て済みのテンプレートを
+使い回した場合で、各帳票のPDFがバイト単位で一致することを確かめる。
+"""
+
+import io
+
+from reportlab import rl_config
+
+import generate_daily_report_pdf
+import generate_final_result_pdf
+import generate_standings_pdf
+import generate_star_table_pdf
+from pdf_utils import get_font
+from test_heavy_data import test_data
+
+
+def star_table_data(n_teams: int) -> dict:
+    teams = [{"id": i + 1, "name": f"チーム{i + 1:02d}"} for i in range(n_teams)]
+    matches = [
+        {"homeTeamId": i + 1, "awayTeamId": j + 1, "homeScore": (i * 7 + j) % 4, "awayScore": (i + j * 3) % 3}
+        for i in range(n_teams) for j in range(i + 1, n_teams) if (i + j) % 3
+    ]
+    return {"title": "星取表", "teams": teams, "matches": matches}
+
+
+# (モジュール, 生成クラス, データ)
+REPORTS = [
+    (generate_daily_report_pdf, generate_daily_report_pdf.DailyReportGenerator, test_data),
+    (generate_daily_report_pdf, generate_daily_report_pdf.DailyReportGenerator,
+     generate_daily_report_pdf.create_sample_data()),
+    (generate_final_result_pdf, generate_final_result_pdf.FinalResultPDFGenerator,
+     generate_final_result_pdf.create_sample_data()),
+    (generate_standings_pdf, generate_standings_pdf.StandingsPDFGenerator,
+     generate_standings_pdf.create_sample_data()),
+    (generate_star_table_pdf, generate_star_table_pdf.StarTablePDFGenerator, star_table_data(8)),
+    (generate_star_table_pdf, generate_star_table_pdf.StarTablePDFGenerator, star_table_data(30)),
+]
+
+
+def render(generator_class, data: dict) -> bytes:
+    out = io.BytesIO()
+    generator_class().generate(data, out)
+    return out.getvalue()
+
+
+def snapshot(styles) -> dict:
+    """スタイル集の中身（TableStyle はコマンド、ParagraphStyle は属性）"""
+    result = {}
+    for name, style in styles.items():
+        if hasattr(style, "getCommands"):
+            result[name] = [tuple(command) for command in style.getCommands()]
+        else:
+            result[name] = dict(vars(style))
+    return result
+
+
+def test_shared_templates_same_pdf():
+    """テンプレートを使い回しても、毎回組み立て直した場合と同じPDF"""
+    saved = rl_config.invariant
+    rl_config.invariant = 1  # 作成日時・ID を固定してバイト単位で比べる
+    try:
+        for module, generator_class, data in REPORTS:
+            module.STYLES.clear()
+            fresh = render(generator_class, data)
+            shared = [render(generator_class, data) for _ in range(2)]
+            assert shared == [fresh, fresh], generator_class.__name__
+    finally:
+        rl_config.invariant = saved
+
+
+def test_templates_not_mutated():
+    """描画してもテンプレートのスタイルは変わらない"""
+    font = get_font()
+    for module, generator_class, data in REPORTS:
+        before = snapshot(module.STYLES.get(font))
+        render(generator_class, data)
+        assert snapshot(module.STYLES.get(font)) == before, generator_class.__name__
+
+
+def test_templates_read_only():
+    styles = generate_daily_report_pdf.STYLES.get(get_font())
+    assert generate_daily_report_pdf.STYLES.get(get_font()) is styles
+    try:
+        styles["title"] = None
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("スタイル集に書き込めてしまう")
+
+
+if __name__ == "__main__":
+    test_shared_templates_same_pdf()
+    print("✓ テンプレート共有でも同じPDF: OK")
+    test_templates_not_mutated()
+    test_templates_read_only()
+    print("✓ テンプレートは変更されない: OK")
+    print("All tests passed.")
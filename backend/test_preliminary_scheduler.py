@@ -0,0 +1,190 @@
+"""preliminary_scheduler（予選リーグの会場・時間枠の割り当て）と /generate-preliminary のテスト（サーバー不要）
+
+使い方:
+    python test_preliminary_scheduler.py
+    python -m pytest test_preliminary_scheduler.py
+"""
+
+from collections import defaultdict
+from itertools import combinations
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from preliminary_scheduler import PreliminaryScheduler, ScheduleScore
+from api.scheduling import endpoints as scheduling_endpoints
+
+
+def round_robin(n_groups: int, teams_per_group: int):
+    pairs = []
+    for g in range(n_groups):
+        teams = [g * teams_per_group + i + 1 for i in range(teams_per_group)]
+        pairs.extend(combinations(teams, 2))
+    return pairs
+
+
+def recount(pairs, cells) -> ScheduleScore:
+    """割り当てから評価を数え直す（差分で持っている集計と比べる）"""
+    slots = defaultdict(list)
+    venues = defaultdict(set)
+    for (home, away), (venue, slot) in zip(pairs, cells):
+        for team in (home, away):
+            slots[team].append(slot)
+            venues[team].add(venue)
+    conflicts = consecutive = 0
+    for team_slots in slots.values():
+        used = set(team_slots)
+        conflicts += len(team_slots) - len(used)
+        consecutive += sum(1 for slot in used if slot + 1 in used)
+    return ScheduleScore(
+        conflicts=conflicts,
+        consecutive=consecutive,
+        venue_changes=sum(len(v) - 1 for v in venues.values()),
+        slots=max(slot for _, slot in cells) + 1 if cells else 0,
+    )
+
+
+def solve(pairs, venue_count, budget_ms, seed=0):
+    scheduler = PreliminaryScheduler(pairs, venue_count, time_budget_ms=budget_ms, seed=seed)
+    cells, score = scheduler.solve()
+    return scheduler, cells, score
+
+
+def test_score_matches_recount():
+    """探索中に差分で更新した評価は、最良解を数え直した評価と一致する"""
+    for n_groups, teams_per_group, venue_count in ((6, 4, 3), (4, 5, 2), (3, 6, 3), (12, 4, 6)):
+        pairs = round_robin(n_groups, teams_per_group)
+        for budget_ms in (0, 50):
+            scheduler, cells, score = solve(pairs, venue_count, budget_ms)
+            assert len(cells) == len(pairs)
+            assert len(set(cells)) == len(cells)  # 1マス1試合
+            assert all(0 <= venue < venue_count for venue, _ in cells)
+            assert score == recount(pairs, cells)
+            assert score.conflicts == 0
+
+
+def test_search_not_worse_than_greedy():
+    pairs = round_robin(6, 4)
+    _, _, greedy = solve(pairs, 3, 0)
+    _, _, searched = solve(pairs, 3, 100)
+    assert searched.encode() <= greedy.encode()
+    assert searched.slots == greedy.slots
+
+
+def test_same_seed_same_result():
+    pairs = round_robin(4, 5)
+    assert solve(pairs, 2, 30, seed=3)[1] == solve(pairs, 2, 30, seed=3)[1]
+
+
+def test_adds_slots_when_needed():
+    """試合数 ÷ 会場数の枠では同時刻重複が残るなら枠を増やす"""
+    # 5チーム総当たり10試合・10会場: 1枠に入るのは2試合まで、各チーム4試合なので5枠以上
+    pairs = round_robin(1, 5)
+    _, cells, score = solve(pairs, 10, 50)
+    assert score.conflicts == 0
+    assert score.slots >= 5
+    assert score == recount(pairs, cells)
+
+
+def test_no_venues():
+    try:
+        PreliminaryScheduler(round_robin(1, 4), 0)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("会場なしで ValueError が送出されない")
+    # 試合がなければ何もしない
+    assert PreliminaryScheduler([], 2).solve() == ([], ScheduleScore())
+
+
+def make_body(n_groups: int = 6, teams_per_group: int = 4, n_venues: int = 3, **options):
+    teams = [
+        {"id": i + 1, "name": f"チーム{i + 1:02d}", "group": f"G{i // teams_per_group + 1}", "rank": 0}
+        for i in range(n_groups * teams_per_group)
+    ]
+    venues = [{"id": 100 - v, "name": f"会場{v + 1}"} for v in range(n_venues)]
+    return {"teams": teams, "venues": venues, "matchDate": "2025-03-29", **options}
+
+
+def client() -> TestClient:
+    app = FastAPI()
+    app.include_router(scheduling_endpoints.router)
+    return TestClient(app)
+
+
+def test_endpoint_day_overflow():
+    """1日に収まらない・会場がない・時刻が不正なら400"""
+    c = client()
+    # 36試合・3会場で12枠。23:00開始（試合15分・休憩5分）なら3枠しかない
+    response = c.post("/generate-preliminary", json=make_body(startTime="23:00"))
+    assert response.status_code == 400
+    assert "1日に収まりません" in response.json()["detail"]
+    # 昼休みで押し出されても収まらない
+    response = c.post("/generate-preliminary", json=make_body(startTime="20:00", lunchStart="20:30", lunchEnd="23:30"))
+    assert response.status_code == 400
+    assert c.post("/generate-preliminary", json=make_body(n_venues=0)).status_code == 400
+    assert c.post("/generate-preliminary", json=make_body(startTime="9時半")).status_code == 400
+    assert c.post("/generate-preliminary", json=make_body(matchDuration=0)).status_code == 400
+    # ちょうど収まる（12枠目が23:40〜23:55）
+    response = c.post("/generate-preliminary", json=make_body(startTime="20:00"))
+    assert response.status_code == 200
+    assert max(m["matchTime"] for m in response.json()["matches"]) == "23:40"
+
+
+def test_endpoint_schedule():
+    """昼休みにかかる枠は使わず、同じチームが同じ時刻に2試合入らない。既定は探索なし"""
+    c = client()
+    body = make_body(lunchStart="11:00", lunchEnd="12:00")
+    response = c.post("/generate-preliminary", json=body)
+    assert response.status_code == 200
+    data = response.json()
+    matches = data["matches"]
+    assert data["total"] == len(matches) == 36
+    busy = set()
+    for m in matches:
+        hour, minute = map(int, m["matchTime"].split(":"))
+        start = hour * 60 + minute
+        assert start + 15 <= 11 * 60 or start >= 12 * 60
+        for team in (m["homeTeamId"], m["awayTeamId"]):
+            assert (team, m["matchTime"]) not in busy
+            busy.add((team, m["matchTime"]))
+
+    pairs = [(m["homeTeamId"], m["awayTeamId"]) for m in sorted(matches, key=lambda m: m["matchNumber"])]
+    _, _, greedy = solve(pairs, 3, 0)
+    assert data["score"] == greedy.to_dict()
+    searched = c.post("/generate-preliminary", json={**body, "timeBudgetMs": 100}).json()
+    assert searched["score"]["score"] <= data["score"]["score"]
+
+
+def test_endpoint_sort_order():
+    """会場の並び順の表 + 整数の分で並べた結果は、以前の並べ替え（会場リストを先頭から探す + 時刻の文字列）と同じ"""
+    c = client()
+    for n_groups, n_venues, start in ((6, 3, "09:30"), (12, 5, "8:50"), (16, 4, "9:40")):
+        body = make_body(n_groups=n_groups, n_venues=n_venues, startTime=start, timeBudgetMs=30)
+        # 同じIDの会場が後ろにもある場合は最初の会場の位置で並べる
+        body["venues"].append(dict(body["venues"][0]))
+        matches = c.post("/generate-preliminary", json=body).json()["matches"]
+        venues = body["venues"]
+        legacy = sorted(matches, key=lambda m: (
+            next((i for i, v in enumerate(venues) if v["id"] == m["venueId"]), 0),
+            m["matchTime"]
+        ))
+        assert matches == legacy
+        # 9時台と10時台が混ざっても時刻順（時刻は0埋め）
+        assert all(len(m["matchTime"]) == 5 for m in matches)
+
+
+if __name__ == "__main__":
+    test_score_matches_recount()
+    print("✓ 差分の評価と数え直しが一致: OK")
+    test_search_not_worse_than_greedy()
+    test_same_seed_same_result()
+    test_adds_slots_when_needed()
+    test_no_venues()
+    print("✓ 探索: OK")
+    test_endpoint_day_overflow()
+    print("✓ 1日に収まらない・不正な入力の400: OK")
+    test_endpoint_schedule()
+    test_endpoint_sort_order()
+    print("✓ /generate-preliminary: OK")
+    print("All tests passed.")
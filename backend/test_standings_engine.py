@@ -0,0 +1,114 @@
+"""standings_engine（NumPy の順位計算）のテスト（サーバー不要）
+
+使い方:
+    python test_standings_engine.py
+    python -m pytest test_standings_engine.py
+"""
+
+import random
+
+import standings_engine
+from standings_engine import MatchArrays
+from bench_standings import legacy_calculate, make_tournament
+from api.standings.endpoints import MatchResult
+
+
+def result(match_id, home, away, home_score, away_score):
+    return MatchResult(id=match_id, homeTeamId=home, awayTeamId=away, homeScore=home_score, awayScore=away_score)
+
+
+def pairs_of(results):
+    """[(チーム, 相手, 得点, 失点)] → resolve_ties に渡す直接対決の成績"""
+    pairs = {}
+    for home, away, hs, as_ in results:
+        for key, gf, ga in (((home, away), hs, as_), ((away, home), as_, hs)):
+            points = 3 if gf > ga else 1 if gf == ga else 0
+            pairs[key] = (points, gf - ga, gf)
+    return pairs
+
+
+def test_matches_legacy_loop():
+    """直接対決なしなら、従来の1試合ずつ dict を更新する実装と全大会で一致する"""
+    rng = random.Random(42)
+    for t in range(20):
+        teams, matches = make_tournament(rng, 500, t * 1000)
+        for use_group_system in (True, False):
+            for exclude_b_matches in (True, False):
+                assert standings_engine.calculate(
+                    teams, matches, use_group_system, exclude_b_matches, head_to_head=False
+                ) == legacy_calculate(teams, matches, use_group_system, exclude_b_matches)
+
+
+def test_match_arrays_same_as_models():
+    """MatchResult のリストでも列配列（MatchArrays）でも結果は同じ"""
+    rng = random.Random(7)
+    teams, matches = make_tournament(rng, 300, 0)
+    arrays = MatchArrays.from_models(matches)
+    for use_group_system in (True, False):
+        assert standings_engine.calculate(teams, matches, use_group_system) == \
+            standings_engine.calculate(teams, arrays, use_group_system)
+
+
+def test_no_matches():
+    """試合がなければ全チーム0のまま、チーム名順"""
+    teams = [{"id": 2, "name": "B", "groupId": "A"}, {"id": 1, "name": "A", "groupId": "A"}]
+    rows = standings_engine.calculate(teams, [], use_group_system=False)
+    assert [row["team_id"] for row in rows] == [1, 2]
+    assert all(row["played"] == 0 and row["points"] == 0 for row in rows)
+    assert rows == legacy_calculate(teams, [], False, True)
+
+
+def test_head_to_head_two_teams():
+    """勝ち点・得失点差・総得点が並べば、チーム名より直接対決の勝者が上"""
+    teams = [{"id": i, "name": name, "groupId": "A"} for i, name in enumerate("ABCD", 1)]
+    matches = [
+        result(1, 2, 1, 1, 0),  # B 1-0 A
+        result(2, 1, 3, 1, 0),  # A 1-0 C
+        result(3, 4, 2, 1, 0),  # D 1-0 B
+    ]
+    for use_group_system in (True, False):
+        rows = standings_engine.calculate(teams, matches, use_group_system)
+        assert [row["team_name"] for row in rows][:3] == ["D", "B", "A"]
+        assert [row["overall_rank"] for row in rows][:3] == [1, 2, 3]
+        # 直接対決なしならチーム名順
+        rows = standings_engine.calculate(teams, matches, use_group_system, head_to_head=False)
+        assert [row["team_name"] for row in rows][:3] == ["D", "A", "B"]
+
+
+def test_head_to_head_mini_league():
+    """3チームの三すくみはミニリーグの得失点差・総得点で並べる"""
+    pairs = pairs_of([("A", "B", 2, 0), ("B", "C", 1, 0), ("C", "A", 1, 0)])
+    assert standings_engine.resolve_ties(["B", "C", "A"], pairs) == ["A", "C", "B"]
+
+
+def test_head_to_head_recursive():
+    """ミニリーグで1チームが抜けたら、残りはその中だけの直接対決で並べ直す"""
+    pairs = pairs_of([
+        ("A", "B", 1, 0), ("C", "A", 1, 0), ("B", "C", 1, 0),
+        ("A", "D", 2, 0), ("B", "D", 1, 0), ("C", "D", 1, 0),
+    ])
+    # 4チームでは A が上・D が下、B と C は並ぶが B が C に勝っている
+    assert standings_engine.resolve_ties(["D", "C", "B", "A"], pairs) == ["A", "B", "C", "D"]
+
+
+def test_head_to_head_unresolved():
+    """直接対決でも分かれなければ元の並び（チーム名・一覧順）のまま"""
+    pairs = pairs_of([("A", "B", 1, 0), ("B", "C", 1, 0), ("C", "A", 1, 0)])
+    assert standings_engine.resolve_ties(["C", "A", "B"], pairs) == ["C", "A", "B"]
+    # 対戦がなければ何もしない
+    assert standings_engine.resolve_ties(["B", "A"], {}) == ["B", "A"]
+
+
+if __name__ == "__main__":
+    test_matches_legacy_loop()
+    print("✓ 従来の実装と一致: OK")
+    test_match_arrays_same_as_models()
+    print("✓ MatchArrays: OK")
+    test_no_matches()
+    print("✓ 試合なし: OK")
+    test_head_to_head_two_teams()
+    test_head_to_head_mini_league()
+    test_head_to_head_recursive()
+    test_head_to_head_unresolved()
+    print("✓ 直接対決: OK")
+    print("All tests passed.")
@@ -0,0 +1,105 @@
+"""standings_service（差分更新の順位表）のテスト（サーバー不要）
+
+使い方:
+    python test_standings_service.py
+    python -m pytest test_standings_service.py
+"""
+
+import random
+
+import standings_engine
+from standings_service import StandingsService, StandingsNotLoaded
+from api.standings.endpoints import MatchResult
+
+
+def make_teams(n_teams: int = 12):
+    # 名前が同じチームを混ぜて、チーム名でも分かれない並びを作る
+    return [{"id": i + 1, "name": f"チーム{i % 10:02d}", "groupId": "ABC"[i % 3]} for i in range(n_teams)]
+
+
+def random_match(rng: random.Random, teams, match_id: int) -> MatchResult:
+    home, away = rng.sample(teams, 2)
+    return MatchResult(
+        id=match_id,
+        homeTeamId=home["id"],
+        awayTeamId=away["id"],
+        # 点差を小さくして勝ち点・得失点差の並びを多くする
+        homeScore=rng.randint(0, 2),
+        awayScore=rng.randint(0, 2),
+        isBMatch=rng.random() < 0.1,
+        status="completed" if rng.random() < 0.9 else "scheduled",
+    )
+
+
+def check_incremental(use_group_system: bool, head_to_head: bool, seed: int, steps: int = 300):
+    rng = random.Random(seed)
+    teams = make_teams()
+    matches = {k: random_match(rng, teams, k) for k in range(20)}
+    service = StandingsService()
+    live = service.load(1, teams, list(matches.values()), use_group_system, True, head_to_head)
+
+    for _ in range(steps):
+        before = {row["team_id"]: dict(row) for row in live.standings()}
+        version = live.version
+        action = rng.random()
+        if action < 0.2 and matches:
+            match_id = rng.choice(list(matches))
+            del matches[match_id]
+            changed = service.reverse(1, match_id)
+        else:
+            # 既存の試合の差し替えと新しい試合の反映
+            match_id = rng.randrange(40)
+            matches[match_id] = random_match(rng, teams, match_id)
+            changed = service.apply(1, matches[match_id])
+
+        # 全試合から計算し直した結果と行も並びも一致する
+        expected = standings_engine.calculate(
+            teams, list(matches.values()), use_group_system, True, head_to_head
+        )
+        assert live.standings() == expected
+        # 返した行は変わった行ちょうど（順位表の並び順）
+        after = {row["team_id"]: row for row in expected}
+        assert changed == [row for row in expected if before[row["team_id"]] != after[row["team_id"]]]
+        assert live.changes_since(version) == changed
+
+
+def test_incremental_matches_full_recompute():
+    for use_group_system in (True, False):
+        for head_to_head in (True, False):
+            for seed in range(3):
+                check_incremental(use_group_system, head_to_head, seed)
+
+
+def test_reload_keeps_version():
+    """作り直しても version は戻らず、全行が変わった扱いになる"""
+    rng = random.Random(0)
+    teams = make_teams()
+    matches = [random_match(rng, teams, k) for k in range(10)]
+    service = StandingsService()
+    first = service.load(1, teams, matches)
+    service.apply(1, random_match(rng, teams, 99))
+    version = first.version
+    second = service.load(1, teams, matches)
+    assert second.version == version + 1
+    assert len(second.changes_since(version)) == len(teams)
+
+
+def test_not_loaded():
+    service = StandingsService()
+    try:
+        service.get(5)
+    except StandingsNotLoaded:
+        pass
+    else:
+        raise AssertionError("StandingsNotLoaded が送出されない")
+    assert not service.discard(5)
+
+
+if __name__ == "__main__":
+    test_incremental_matches_full_recompute()
+    print("✓ 差分更新と全件の再計算が一致: OK")
+    test_reload_keeps_version()
+    print("✓ 作り直しの version: OK")
+    test_not_loaded()
+    print("✓ 未読み込み: OK")
+    print("All tests passed.")
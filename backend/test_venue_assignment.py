@@ -0,0 +1,105 @@
+"""会場配置の region_dispersed（api.venues.endpoints._disperse_by_region）のテスト（サーバー不要）
+
+使い方:
+    python test_venue_assignment.py
+    python -m pytest test_venue_assignment.py
+"""
+
+import random
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.venues import endpoints as venues_endpoints
+from api.venues.endpoints import _disperse_by_region
+from bench_venue_assignment import REGION_MIXES, legacy_disperse, make_region_teams, same_region_pairs
+
+SIZES = [(24, 6), (48, 12), (200, 50)]
+
+
+def region_of(team) -> str:
+    return team.region or team.prefecture or "unknown"
+
+
+def spread_pairs(teams, venue_count: int) -> int:
+    """地域ごとに全会場へ均等に分けたときの同じ地域のペア数（会場の定員を考えない下限）"""
+    counts = {}
+    for team in teams:
+        counts[region_of(team)] = counts.get(region_of(team), 0) + 1
+    total = 0
+    for count in counts.values():
+        per_venue, extra = divmod(count, venue_count)
+        total += extra * (per_venue + 1) * per_venue // 2 + (venue_count - extra) * per_venue * (per_venue - 1) // 2
+    return total
+
+
+def test_places_every_team_once():
+    """定員を超えず、全チーム（定員を超える分は配置しない）を1回ずつ"""
+    for n_teams, n_venues in SIZES + [(30, 6), (5, 3)]:
+        for mix in REGION_MIXES:
+            teams = make_region_teams(n_teams, mix)
+            random.seed(0)
+            venues = _disperse_by_region(teams, n_venues, 4)
+            assert len(venues) == n_venues
+            assert all(len(va) <= 4 for va in venues)
+            placed = [t.id for va in venues for t in va]
+            assert len(placed) == len(set(placed)) == min(n_teams, 4 * n_venues)
+    assert _disperse_by_region(make_region_teams(8, "混在"), 2, 0) == [[], []]
+    assert _disperse_by_region([], 3, 4) == [[], [], []]
+
+
+def test_not_worse_than_legacy():
+    """同じ乱数で、会場内の同じ地域のペア数は以前の手順以下（地域が1〜3なら均等に分けた下限どおり）"""
+    for n_teams, n_venues in SIZES:
+        for mix in REGION_MIXES:
+            teams = make_region_teams(n_teams, mix)
+            legacy, heap = 0, 0
+            for seed in range(20):
+                random.seed(seed)
+                legacy += same_region_pairs(legacy_disperse(teams, n_venues, 4))
+                random.seed(seed)
+                pairs = same_region_pairs(_disperse_by_region(teams, n_venues, 4))
+                heap += pairs
+                if mix != "混在":
+                    assert pairs == spread_pairs(teams, n_venues), (n_teams, mix, seed)
+            # 24×6 の混在はどちらも1回0〜2ペアで、合計の差は乱数の違い程度なので比べない
+            if n_teams >= 48:
+                assert heap <= legacy, (n_teams, mix)
+
+
+def test_same_seed_same_result():
+    teams = make_region_teams(48, "混在")
+    random.seed(3)
+    first = _disperse_by_region(teams, 12, 4)
+    random.seed(3)
+    assert _disperse_by_region(teams, 12, 4) == first
+
+
+def test_endpoint():
+    """/api/venue-assignments/auto-generate-with-data（region_dispersed）: 会場ごとにスロット順で全チーム"""
+    app = FastAPI()
+    app.include_router(venues_endpoints.router)
+    client = TestClient(app)
+    teams = [t.model_dump() for t in make_region_teams(24, "混在")]
+    venues = [{"id": 100 + v, "name": f"会場{v}"} for v in range(6)]
+    response = client.post(
+        "/api/venue-assignments/auto-generate-with-data",
+        json={"tournamentId": 1, "teams": teams, "venues": venues, "strategy": "region_dispersed"},
+    )
+    assert response.status_code == 200
+    assignments = response.json()["assignments"]
+    assert sorted(a["team_id"] for a in assignments) == list(range(1, 25))
+    for venue in venues:
+        slots = [a["slot_order"] for a in assignments if a["venue_id"] == venue["id"]]
+        assert slots == [1, 2, 3, 4]
+
+
+if __name__ == "__main__":
+    test_places_every_team_once()
+    print("✓ 定員と配置の重複: OK")
+    test_not_worse_than_legacy()
+    test_same_seed_same_result()
+    print("✓ 地域の分散（以前の手順との比較）: OK")
+    test_endpoint()
+    print("✓ region_dispersed の API: OK")
+    print("All tests passed.")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+キックオフ時刻の生成（予選リーグ・最終日の日程生成で共通）
+
+時刻はすべて 0時からの分（int）で扱い、"HH:MM" にするのは出力するときだけ。
+
+- 開始時刻・試合時間・休憩から時間枠を順に作る（キックオフの間隔 = 試合時間 + 休憩）
+- 昼休みなどの時間帯（lunch）に試合がかかる枠は、その時間帯の終わりまで後ろにずらす
+- 先頭の時刻を固定した一覧（最終日の kickoff_times など）も渡せる。一覧を使い切ったら
+  最後の時刻から同じ間隔で続ける
+- 枠は参照されたところまでしか作らない（試合数が多い大会でも一覧を作り置きしない）
+- 23時で止めたりせず、1日の終わり（day_end）に試合が収まらない枠は fits() が False になる
+"""
+
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+# 1日の終わり（0時からの分）
+DAY_END = 24 * 60
+
+
+def parse_time(value: str) -> int:
+    """"9:30" / "09:30" → 570（不正な形式は ValueError）"""
+    try:
+        hour, minute = str(value).strip().split(":")
+        hour, minute = int(hour), int(minute)
+    except ValueError:
+        raise ValueError(f"時刻の形式が不正です: {value!r}（HH:MM）")
+    if hour < 0 or not 0 <= minute < 60:
+        raise ValueError(f"時刻の形式が不正です: {value!r}（HH:MM）")
+    return hour * 60 + minute
+
+
+def format_time(minutes: int, pad: bool = True) -> str:
+    """570 → "09:30"（pad=False なら "9:30"）"""
+    hour, minute = divmod(minutes, 60)
+    return f"{hour:02d}:{minute:02d}" if pad else f"{hour}:{minute:02d}"
+
+
+class TimeSlots:
+    """時間枠の番号 → キックオフ時刻（0時からの分）"""
+
+    def __init__(
+        self,
+        start: int,
+        match_duration: int,
+        break_time: int = 0,
+        lunch: Iterable[Tuple[int, int]] = (),
+        fixed: Sequence[int] = (),
+        day_end: int = DAY_END,
+    ):
+        if match_duration <= 0 or break_time < 0:
+            raise ValueError("試合時間は1分以上、休憩は0分以上にしてください")
+        self.start = start
+        self.match_duration = match_duration
+        self.interval = match_duration + break_time
+        self.lunch = sorted((begin, end) for begin, end in lunch if end > begin)
+        self.day_end = day_end
+        self._slots: List[int] = list(fixed)
+
+    @classmethod
+    def from_request(
+        cls,
+        start_time: str,
+        match_duration: int,
+        break_time: int,
+        lunch_start: Optional[str] = None,
+        lunch_end: Optional[str] = None,
+    ) -> "TimeSlots":
+        """リクエストの "HH:MM" の値から作る（昼休みは両方あるときだけ）"""
+        lunch = []
+        if lunch_start and lunch_end:
+            lunch.append((parse_time(lunch_start), parse_time(lunch_end)))
+        return cls(parse_time(start_time), match_duration, break_time, lunch)
+
+    @classmethod
+    def from_kickoffs(cls, kickoff_times: Sequence[str], match_duration: int) -> "TimeSlots":
+        """キックオフ時刻の一覧から作る（一覧のあとは最後の2つの間隔で続ける）"""
+        fixed = [parse_time(t) for t in kickoff_times]
+        if len(fixed) >= 2 and fixed[-1] > fixed[-2]:
+            break_time = max(fixed[-1] - fixed[-2] - match_duration, 0)
+        else:
+            break_time = 0
+        return cls(fixed[0] if fixed else 0, match_duration, break_time, fixed=fixed)
+
+    def _next(self) -> int:
+        minutes = self._slots[-1] + self.interval if self._slots else self.start
+        for begin, end in self.lunch:
+            # 試合が昼休みにかかるなら昼休みの後へ
+            if minutes < end and minutes + self.match_duration > begin:
+                minutes = end
+        return minutes
+
+    def __getitem__(self, index: int) -> int:
+        while len(self._slots) <= index:
+            self._slots.append(self._next())
+        return self._slots[index]
+
+    def fits(self, index: int) -> bool:
+        """その枠の試合が1日の終わりまでに終わるか"""
+        return self[index] + self.match_duration <= self.day_end
+
+    def capacity(self) -> int:
+        """1日に収まる枠の数"""
+        count = 0
+        while self.fits(count):
+            count += 1
+        return count
+
+    def time(self, index: int, pad: bool = True) -> str:
+        return format_time(self[index], pad)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+研修試合の組み合わせ（最小コストの k 正則部分グラフ）
+
+研修試合に出るチームを頂点、組めるペアを辺とする完全グラフから、各チームがちょうど
+matches_per_team 試合になる辺の集合（k 正則部分グラフ / b-マッチング）で、コストの合計が小さいものを選ぶ。
+グループ数ごとの組み合わせ表は持たないので、グループ数・チーム数によらず使える。
+
+辺のコスト（辞書式。上が絶対的に優先）
+- 対戦済み（played_pairs。予選で当たったペアなど）
+- 同じグループ
+- 順位の差
+
+手順
+1. 辺をコストの安い順に見て、両チームとも試合数が足りなければ採用する（貪欲法。
+   同じコストの辺の中では試合数の少ないチーム同士を先に組む）
+2. 試合数が足りないチームが残れば、増加路で補う
+   （足りないチーム同士を組む / u-x を足して x-y を外し y-w を足す）
+3. 2試合の相手を入れ替える（a-b, c-d → a-c, b-d または a-d, b-c）と安くなる限り入れ替え、
+   そのあとコストが変わらない入れ替えも受け入れながらランダムに入れ替える（rng を渡さなければ seed 固定なので結果は毎回同じ）
+4. 各チームが1ラウンドに1試合になるようにラウンドに分けて並べる（辺彩色の貪欲法）
+
+チーム数 × 試合数が奇数のときなど、全チームをちょうど k 試合にできない場合は足りないチームを返す。
+"""
+
+import random
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, TypeVar
+
+# 辺のコストの重み
+PLAYED_COST = 10 ** 6
+SAME_GROUP_COST = 10 ** 3
+RANK_COST = 1
+
+# 同じコストの入れ替えも受け入れるランダムな入れ替えの回数（辺1本あたり）。
+# 安くならないまま RANDOM_PATIENCE_PER_EDGE 回続いたら打ち切る
+RANDOM_SWAPS_PER_EDGE = 200
+RANDOM_PATIENCE_PER_EDGE = 20
+
+# team_id / group / rank を持つもの（final_day_generator_v2.Team）
+T = TypeVar("T")
+
+
+def pair_cost(a, b, played_pairs: Set[Tuple[int, int]]) -> int:
+    """2チームを組むときのコスト"""
+    cost = RANK_COST * abs(a.rank - b.rank)
+    if a.group == b.group:
+        cost += SAME_GROUP_COST
+    if (min(a.team_id, b.team_id), max(a.team_id, b.team_id)) in played_pairs:
+        cost += PLAYED_COST
+    return cost
+
+
+def _greedy(n: int, k: int, cost: List[List[int]], adj: List[Set[int]], rng: Optional[random.Random] = None):
+    """コストの安い辺から採用する。同じコストの辺の中では試合数の少ないチーム同士を先に組む
+
+    （同じコストの辺を順番どおりに取ると、同順位の4チームで三角形ができて1チームが余りやすい）
+    """
+    buckets: Dict[int, List[Tuple[int, int]]] = {}
+    for i in range(n):
+        for j in range(i + 1, n):
+            buckets.setdefault(cost[i][j], []).append((i, j))
+    for c in sorted(buckets):
+        edges = buckets[c]
+        if rng is not None:
+            rng.shuffle(edges)
+        # 両チームの試合数の合計が 0, 1, ... の辺の順に採用する
+        for limit in range(2 * k - 1):
+            for i, j in edges:
+                if len(adj[i]) < k and len(adj[j]) < k and len(adj[i]) + len(adj[j]) <= limit and j not in adj[i]:
+                    adj[i].add(j)
+                    adj[j].add(i)
+
+
+def _repair(n: int, k: int, cost: List[List[int]], adj: List[Set[int]]):
+    """試合数が足りないチームを、コストの増え方が最小の増加路で補う（補えないチームはあきらめる）"""
+    stuck: Set[int] = set()
+    while True:
+        deficient = [u for u in range(n) if len(adj[u]) < k]
+        targets = [u for u in deficient if u not in stuck]
+        if not targets:
+            return
+        u = targets[0]
+        best = None  # (コストの増分, 足す辺, 外す辺)
+
+        # 足りないチーム同士を組む
+        for w in deficient:
+            if w != u and w not in adj[u]:
+                if best is None or cost[u][w] < best[0]:
+                    best = (cost[u][w], [(u, w)], [])
+
+        # u-x を足して x-y を外し、y-w を足す（w は足りないチーム。u 自身でもよい）
+        for x in range(n):
+            if x == u or x in adj[u]:
+                continue
+            for y in adj[x]:
+                base = cost[u][x] - cost[x][y]
+                for w in deficient:
+                    if w == y or w == x or w in adj[y]:
+                        continue
+                    if w == u and len(adj[u]) + 1 >= k:
+                        continue
+                    delta = base + cost[y][w]
+                    if best is None or delta < best[0]:
+                        best = (delta, [(u, x), (y, w)], [(x, y)])
+
+        if best is None:
+            stuck.add(u)
+            continue
+        _, added, removed = best
+        for a, b in removed:
+            adj[a].discard(b)
+            adj[b].discard(a)
+        for a, b in added:
+            adj[a].add(b)
+            adj[b].add(a)
+
+
+def _swap(cost: List[List[int]], adj: List[Set[int]], edges: List[Tuple[int, int]], p: int, q: int, cross: bool) -> int:
+    """edges[p], edges[q] の相手を入れ替えたときのコストの増分（組めなければ None。入れ替えはしない）"""
+    a, b = edges[p]
+    c, d = edges[q]
+    if a == c or a == d or b == c or b == d:
+        return None
+    (w, x), (y, z) = ((a, d), (b, c)) if cross else ((a, c), (b, d))
+    if x in adj[w] or z in adj[y]:
+        return None
+    return cost[w][x] + cost[y][z] - cost[a][b] - cost[c][d]
+
+
+def _apply_swap(adj: List[Set[int]], edges: List[Tuple[int, int]], p: int, q: int, cross: bool):
+    a, b = edges[p]
+    c, d = edges[q]
+    new = ((a, d), (b, c)) if cross else ((a, c), (b, d))
+    for x, y in ((a, b), (c, d)):
+        adj[x].discard(y)
+        adj[y].discard(x)
+    for x, y in new:
+        adj[x].add(y)
+        adj[y].add(x)
+    edges[p], edges[q] = new
+
+
+def _shift(cost: List[List[int]], adj: List[Set[int]], edges: List[Tuple[int, int]], p: int, keep: int, u: int) -> int:
+    """edges[p] の片方（keep 側でない方）を試合数が足りないチーム u に替えたときのコストの増分（組めなければ None）"""
+    a, b = edges[p] if keep == 0 else edges[p][::-1]
+    if u == a or u == b or u in adj[a]:
+        return None
+    return cost[a][u] - cost[a][b]
+
+
+def _apply_shift(adj: List[Set[int]], edges: List[Tuple[int, int]], p: int, keep: int, u: int):
+    a, b = edges[p] if keep == 0 else edges[p][::-1]
+    adj[a].discard(b)
+    adj[b].discard(a)
+    adj[a].add(u)
+    adj[u].add(a)
+    edges[p] = (a, u)
+
+
+def _improve(k: int, cost: List[List[int]], adj: List[Set[int]], rng: random.Random):
+    """2試合の相手を入れ替えて安くする（試合数が足りないチームがいれば、そのチームへの付け替えも試す）
+
+    まず安くなる入れ替えがなくなるまで全組を調べ、そのあとコストが変わらない入れ替えも受け入れながら
+    ランダムに入れ替えて、同じコストの組み合わせの先にある安い組み合わせを探す
+    （同順位の4チームの輪ができて2チームだけ余ったときなど、1回の入れ替えでは良くならない場合）。
+    全チームが k 試合で、各チームの安い方から k 本の辺の合計（下限）に届いたらやめる。
+    """
+    n = len(adj)
+    edges = [(i, j) for i in range(n) for j in adj[i] if i < j]
+    if not edges:
+        return
+    total = sum(cost[i][j] for i, j in edges)
+    if all(len(adj[i]) == k for i in range(n)):
+        bound = sum(sum(sorted(cost[i][j] for j in range(n) if j != i)[:k]) for i in range(n)) // 2
+    else:
+        bound = -1
+
+    improved = True
+    while improved and total > bound:
+        improved = False
+        for p in range(len(edges)):
+            for q in range(p + 1, len(edges)):
+                for cross in (False, True):
+                    delta = _swap(cost, adj, edges, p, q, cross)
+                    if delta is not None and delta < 0:
+                        _apply_swap(adj, edges, p, q, cross)
+                        total += delta
+                        improved = True
+                        break
+            for u in range(n):
+                if len(adj[u]) >= k:
+                    continue
+                for keep in (0, 1):
+                    delta = _shift(cost, adj, edges, p, keep, u)
+                    if delta is not None and delta < 0:
+                        _apply_shift(adj, edges, p, keep, u)
+                        total += delta
+                        improved = True
+                        break
+
+    m = len(edges)
+    deficient = [u for u in range(n) if len(adj[u]) < k]
+    patience = RANDOM_PATIENCE_PER_EDGE * m
+    idle = 0
+    for _ in range(RANDOM_SWAPS_PER_EDGE * m):
+        if total <= bound or idle >= patience:
+            break
+        idle += 1
+        p = int(rng.random() * m)
+        if deficient and (m < 2 or rng.random() < 0.5):
+            u, keep = deficient[int(rng.random() * len(deficient))], int(rng.random() * 2)
+            delta = _shift(cost, adj, edges, p, keep, u)
+            if delta is not None and delta <= 0:
+                dropped = edges[p][1 - keep]
+                _apply_shift(adj, edges, p, keep, u)
+                total += delta
+                idle = 0 if delta < 0 else idle
+                deficient = [v for v in deficient if v != u or len(adj[u]) < k]
+                deficient.append(dropped)
+            continue
+        if m < 2:
+            break
+        q = int(rng.random() * (m - 1))
+        q += q >= p
+        cross = rng.random() < 0.5
+        delta = _swap(cost, adj, edges, p, q, cross)
+        if delta is not None and delta <= 0:
+            _apply_swap(adj, edges, p, q, cross)
+            total += delta
+            idle = 0 if delta < 0 else idle
+
+
+def _rounds(edges: Iterable[Tuple[int, int]]) -> List[List[Tuple[int, int]]]:
+    """各チームが1ラウンドに1試合になるように辺を分ける"""
+    rounds: List[List[Tuple[int, int]]] = []
+    used: List[Set[int]] = []
+    for i, j in edges:
+        for r, teams in enumerate(used):
+            if i not in teams and j not in teams:
+                break
+        else:
+            rounds.append([])
+            used.append(set())
+            r = len(rounds) - 1
+        rounds[r].append((i, j))
+        used[r].update((i, j))
+    return rounds
+
+
+def pair_training_teams(
+    teams: Sequence[T],
+    played_pairs: Set[Tuple[int, int]],
+    matches_per_team: int,
+    rng: Optional[random.Random] = None,
+) -> Tuple[List[Tuple[T, T]], List[T]]:
+    """研修試合のペア（ラウンド順）と、matches_per_team 試合に届かなかったチームを返す
+
+    played_pairs は (小さいID, 大きいID) の集合。ペアの home は入力で先のチーム。
+    rng を渡すと、同じコストの辺を採る順とランダムな入れ替えがその乱数で決まる
+    （多スタート探索用。省略時は毎回同じ結果）。
+    """
+    n = len(teams)
+    k = matches_per_team
+    cost = [[0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            cost[i][j] = cost[j][i] = pair_cost(teams[i], teams[j], played_pairs)
+    adj: List[Set[int]] = [set() for _ in range(n)]
+
+    _greedy(n, k, cost, adj, rng)
+    _repair(n, k, cost, adj)
+    _improve(k, cost, adj, rng if rng is not None else random.Random(0))
+
+    # ラウンドは安い辺から（同順位の試合が先のラウンドに入る）
+    edges = sorted(((i, j) for i in range(n) for j in adj[i] if i < j), key=lambda e: (cost[e[0]][e[1]], e))
+    pairs = [(teams[i], teams[j]) for round_edges in _rounds(edges) for i, j in round_edges]
+    short = [teams[i] for i in range(n) if len(adj[i]) < k]
+    return pairs, short
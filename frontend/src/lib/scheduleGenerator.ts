@@ -95,6 +95,8 @@ export async function generatePreliminarySchedule(
       venues: venues.map(v => ({ id: v.id, name: v.name })),
       matchDate,
       startTime,
+      // 生成ボタンからの呼び出しなので、連戦・会場移動を減らす探索を有効にする（既定は探索なし）
+      timeBudgetMs: 300,
     }),
   });
 